@@ -99,5 +99,43 @@ def dev(
     )
 
 
+@app.command()
+def recompress_chats(
+    compression: Annotated[
+        Optional[str],
+        typer.Option(help='Defaults to CHAT_PAYLOAD_COMPRESSION, "" stores JSON'),
+    ] = None,
+    train_dictionary: Annotated[
+        bool,
+        typer.Option(help="Train the zstd dictionary at CHAT_PAYLOAD_ZSTD_DICT_PATH"),
+    ] = False,
+):
+    """Store every chat payload with the chat payload compression."""
+    from open_webui.env import CHAT_PAYLOAD_COMPRESSION, CHAT_PAYLOAD_ZSTD_DICT_PATH
+    from open_webui.models.chats import Chats
+
+    if compression is None:
+        compression = CHAT_PAYLOAD_COMPRESSION
+
+    if train_dictionary:
+        if not CHAT_PAYLOAD_ZSTD_DICT_PATH:
+            typer.echo("CHAT_PAYLOAD_ZSTD_DICT_PATH is not set")
+            raise typer.Exit(1)
+        # Chats compressed with an existing dictionary can't be read without it
+        if os.path.exists(CHAT_PAYLOAD_ZSTD_DICT_PATH):
+            typer.echo(f"{CHAT_PAYLOAD_ZSTD_DICT_PATH} already exists")
+            raise typer.Exit(1)
+
+        typer.echo(f"Training a zstd dictionary into {CHAT_PAYLOAD_ZSTD_DICT_PATH}")
+        Chats.train_payload_dictionary(CHAT_PAYLOAD_ZSTD_DICT_PATH)
+
+    try:
+        count = Chats.recompress_chats(compression)
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
+    typer.echo(f"Recompressed {count} chats with {compression or 'no compression'}")
+
+
 if __name__ == "__main__":
     app()
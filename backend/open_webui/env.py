@@ -353,6 +353,18 @@ DATABASE_ENABLE_SQLITE_WAL = (
     os.environ.get("DATABASE_ENABLE_SQLITE_WAL", "False").lower() == "true"
 )
 
+# Threads used to run blocking database calls off the event loop
+DATABASE_EXECUTOR_WORKERS = os.environ.get("DATABASE_EXECUTOR_WORKERS", "")
+try:
+    DATABASE_EXECUTOR_WORKERS = int(DATABASE_EXECUTOR_WORKERS)
+    if DATABASE_EXECUTOR_WORKERS < 1:
+        raise ValueError
+except ValueError:
+    if isinstance(DATABASE_POOL_SIZE, int) and DATABASE_POOL_SIZE > 0:
+        DATABASE_EXECUTOR_WORKERS = DATABASE_POOL_SIZE + DATABASE_POOL_MAX_OVERFLOW
+    else:
+        DATABASE_EXECUTOR_WORKERS = 10
+
 DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL = os.environ.get(
     "DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL", None
 )
@@ -364,6 +376,84 @@ if DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL is not None:
     except Exception:
         DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL = 0.0
 
+# Authenticated users are cached per worker for this many seconds (0 disables)
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "5")
+try:
+    USER_CACHE_TTL = max(float(USER_CACHE_TTL), 0.0)
+except ValueError:
+    USER_CACHE_TTL = 5.0
+
+USER_CACHE_SIZE = os.environ.get("USER_CACHE_SIZE", "1000")
+try:
+    USER_CACHE_SIZE = max(int(USER_CACHE_SIZE), 0)
+except ValueError:
+    USER_CACHE_SIZE = 1000
+
+# Maintained full-text index of chat titles and messages used by the chat search
+ENABLE_CHAT_SEARCH_INDEX = (
+    os.environ.get("ENABLE_CHAT_SEARCH_INDEX", "True").lower() == "true"
+)
+
+# With chat encryption enabled, only index keyed hashes of the words (opt-in)
+ENABLE_CHAT_SEARCH_HASH_INDEX = (
+    os.environ.get("ENABLE_CHAT_SEARCH_HASH_INDEX", "False").lower() == "true"
+)
+
+# Key of the hashed index, defaults to WEBUI_SECRET_KEY
+CHAT_SEARCH_HASH_KEY = os.environ.get("CHAT_SEARCH_HASH_KEY", "")
+
+# Compression of the stored chat payloads, applied before encryption: "zstd",
+# "gzip" or "" to store them as JSON (opt-in). Compressed payloads stay
+# readable whatever this is set to. Chats are stored with it when they're next
+# saved, `open-webui recompress-chats` rewrites the existing ones (and
+# `open-webui recompress-chats --compression ""` stores them all as JSON again).
+CHAT_PAYLOAD_COMPRESSION = os.environ.get("CHAT_PAYLOAD_COMPRESSION", "").lower()
+if CHAT_PAYLOAD_COMPRESSION not in ("", "gzip", "zstd"):
+    log.warning(f"Invalid CHAT_PAYLOAD_COMPRESSION: {CHAT_PAYLOAD_COMPRESSION}")
+    CHAT_PAYLOAD_COMPRESSION = ""
+
+# zstd dictionary trained on chat payloads, trained with
+# `open-webui recompress-chats --train-dictionary`. Payloads compressed with it
+# can't be read without it.
+CHAT_PAYLOAD_ZSTD_DICT_PATH = os.environ.get("CHAT_PAYLOAD_ZSTD_DICT_PATH", "")
+
+####################################
+# EVENT LOOP MONITOR
+####################################
+
+ENABLE_EVENT_LOOP_MONITOR = (
+    os.environ.get("ENABLE_EVENT_LOOP_MONITOR", "True").lower() == "true"
+)
+
+# How often the event loop is sampled and how late a wake-up may be (in seconds)
+# before it is reported as a blocking call
+EVENT_LOOP_MONITOR_INTERVAL = os.environ.get("EVENT_LOOP_MONITOR_INTERVAL", "0.5")
+try:
+    EVENT_LOOP_MONITOR_INTERVAL = float(EVENT_LOOP_MONITOR_INTERVAL)
+    if EVENT_LOOP_MONITOR_INTERVAL <= 0:
+        EVENT_LOOP_MONITOR_INTERVAL = 0.5
+except ValueError:
+    EVENT_LOOP_MONITOR_INTERVAL = 0.5
+
+EVENT_LOOP_LAG_THRESHOLD = os.environ.get("EVENT_LOOP_LAG_THRESHOLD", "0.1")
+try:
+    EVENT_LOOP_LAG_THRESHOLD = float(EVENT_LOOP_LAG_THRESHOLD)
+    if EVENT_LOOP_LAG_THRESHOLD <= 0:
+        EVENT_LOOP_LAG_THRESHOLD = 0.1
+except ValueError:
+    EVENT_LOOP_LAG_THRESHOLD = 0.1
+
+# Number of recent blocking events (with stack traces) kept for the admin endpoint
+EVENT_LOOP_MONITOR_HISTORY_SIZE = os.environ.get(
+    "EVENT_LOOP_MONITOR_HISTORY_SIZE", "100"
+)
+try:
+    EVENT_LOOP_MONITOR_HISTORY_SIZE = int(EVENT_LOOP_MONITOR_HISTORY_SIZE)
+    if EVENT_LOOP_MONITOR_HISTORY_SIZE < 0:
+        EVENT_LOOP_MONITOR_HISTORY_SIZE = 100
+except ValueError:
+    EVENT_LOOP_MONITOR_HISTORY_SIZE = 100
+
 RESET_CONFIG_ON_START = (
     os.environ.get("RESET_CONFIG_ON_START", "False").lower() == "true"
 )
@@ -395,6 +485,25 @@ try:
 except ValueError:
     REDIS_SENTINEL_MAX_RETRY_COUNT = 2
 
+# How often (in seconds) each process refreshes its Redis heartbeat. Tasks of processes
+# whose heartbeat expired (after 3 intervals) are removed from the task registry
+TASK_HEARTBEAT_INTERVAL = os.environ.get("TASK_HEARTBEAT_INTERVAL", "10")
+try:
+    TASK_HEARTBEAT_INTERVAL = int(TASK_HEARTBEAT_INTERVAL)
+    if TASK_HEARTBEAT_INTERVAL < 1:
+        TASK_HEARTBEAT_INTERVAL = 10
+except ValueError:
+    TASK_HEARTBEAT_INTERVAL = 10
+
+# How long (in seconds) to wait for the process running a task to acknowledge a stop command
+TASK_STOP_TIMEOUT = os.environ.get("TASK_STOP_TIMEOUT", "5")
+try:
+    TASK_STOP_TIMEOUT = int(TASK_STOP_TIMEOUT)
+    if TASK_STOP_TIMEOUT < 1:
+        TASK_STOP_TIMEOUT = 5
+except ValueError:
+    TASK_STOP_TIMEOUT = 5
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -426,6 +535,15 @@ BYPASS_MODEL_ACCESS_CONTROL = (
     os.environ.get("BYPASS_MODEL_ACCESS_CONTROL", "False").lower() == "true"
 )
 
+# Number of serialized /api/models responses (one per user or role) kept in memory
+MODELS_RESPONSE_CACHE_SIZE = os.environ.get("MODELS_RESPONSE_CACHE_SIZE", "1024")
+try:
+    MODELS_RESPONSE_CACHE_SIZE = int(MODELS_RESPONSE_CACHE_SIZE)
+    if MODELS_RESPONSE_CACHE_SIZE < 0:
+        MODELS_RESPONSE_CACHE_SIZE = 1024
+except ValueError:
+    MODELS_RESPONSE_CACHE_SIZE = 1024
+
 WEBUI_AUTH_SIGNOUT_REDIRECT_URL = os.environ.get(
     "WEBUI_AUTH_SIGNOUT_REDIRECT_URL", None
 )
@@ -565,6 +683,83 @@ except ValueError:
 WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+# Collaborative documents are compacted into a single snapshot after this many
+# updates, or once no update has been received for the idle timeout (in seconds)
+YDOC_COMPACTION_THRESHOLD = os.environ.get("YDOC_COMPACTION_THRESHOLD", "100")
+try:
+    YDOC_COMPACTION_THRESHOLD = int(YDOC_COMPACTION_THRESHOLD)
+    if YDOC_COMPACTION_THRESHOLD < 1:
+        YDOC_COMPACTION_THRESHOLD = 100
+except ValueError:
+    YDOC_COMPACTION_THRESHOLD = 100
+
+YDOC_COMPACTION_IDLE_TIMEOUT = os.environ.get("YDOC_COMPACTION_IDLE_TIMEOUT", "30")
+try:
+    YDOC_COMPACTION_IDLE_TIMEOUT = float(YDOC_COMPACTION_IDLE_TIMEOUT)
+    if YDOC_COMPACTION_IDLE_TIMEOUT <= 0:
+        YDOC_COMPACTION_IDLE_TIMEOUT = 30.0
+except ValueError:
+    YDOC_COMPACTION_IDLE_TIMEOUT = 30.0
+
+# Collaborative note saves are debounced, but never delayed by more than the max delay (in seconds)
+YDOC_SAVE_DEBOUNCE = os.environ.get("YDOC_SAVE_DEBOUNCE", "0.5")
+try:
+    YDOC_SAVE_DEBOUNCE = float(YDOC_SAVE_DEBOUNCE)
+    if YDOC_SAVE_DEBOUNCE < 0:
+        YDOC_SAVE_DEBOUNCE = 0.5
+except ValueError:
+    YDOC_SAVE_DEBOUNCE = 0.5
+
+YDOC_SAVE_MAX_DELAY = os.environ.get("YDOC_SAVE_MAX_DELAY", "5")
+try:
+    YDOC_SAVE_MAX_DELAY = float(YDOC_SAVE_MAX_DELAY)
+    if YDOC_SAVE_MAX_DELAY < YDOC_SAVE_DEBOUNCE:
+        YDOC_SAVE_MAX_DELAY = max(YDOC_SAVE_DEBOUNCE, 5.0)
+except ValueError:
+    YDOC_SAVE_MAX_DELAY = max(YDOC_SAVE_DEBOUNCE, 5.0)
+
+# Also send Yjs data as JSON int arrays to clients that did not opt into binary payloads
+ENABLE_YDOC_LEGACY_PAYLOADS = (
+    os.environ.get("ENABLE_YDOC_LEGACY_PAYLOADS", "True").lower() == "true"
+)
+
+# Chat events for the same message are batched for this long (in seconds) before being emitted.
+# The window grows up to the max while emits are slow, set it to 0 to emit every event immediately
+CHAT_EVENT_BATCH_WINDOW = os.environ.get("CHAT_EVENT_BATCH_WINDOW", "0.02")
+try:
+    CHAT_EVENT_BATCH_WINDOW = float(CHAT_EVENT_BATCH_WINDOW)
+    if CHAT_EVENT_BATCH_WINDOW < 0:
+        CHAT_EVENT_BATCH_WINDOW = 0.02
+except ValueError:
+    CHAT_EVENT_BATCH_WINDOW = 0.02
+
+CHAT_EVENT_BATCH_MAX_WINDOW = os.environ.get("CHAT_EVENT_BATCH_MAX_WINDOW", "0.25")
+try:
+    CHAT_EVENT_BATCH_MAX_WINDOW = float(CHAT_EVENT_BATCH_MAX_WINDOW)
+    if CHAT_EVENT_BATCH_MAX_WINDOW < CHAT_EVENT_BATCH_WINDOW:
+        CHAT_EVENT_BATCH_MAX_WINDOW = max(CHAT_EVENT_BATCH_WINDOW, 0.25)
+except ValueError:
+    CHAT_EVENT_BATCH_MAX_WINDOW = max(CHAT_EVENT_BATCH_WINDOW, 0.25)
+
+# Recent chat events kept per task for the SSE fallback (0 disables it), and for how long (in seconds).
+# Only chats requested with "event_stream" are buffered. With more than one worker the buffer
+# needs Redis (WEBSOCKET_MANAGER=redis), otherwise "event_stream" requests are refused.
+CHAT_EVENT_BUFFER_SIZE = os.environ.get("CHAT_EVENT_BUFFER_SIZE", "500")
+try:
+    CHAT_EVENT_BUFFER_SIZE = int(CHAT_EVENT_BUFFER_SIZE)
+    if CHAT_EVENT_BUFFER_SIZE < 0:
+        CHAT_EVENT_BUFFER_SIZE = 500
+except ValueError:
+    CHAT_EVENT_BUFFER_SIZE = 500
+
+CHAT_EVENT_BUFFER_TTL = os.environ.get("CHAT_EVENT_BUFFER_TTL", "300")
+try:
+    CHAT_EVENT_BUFFER_TTL = int(CHAT_EVENT_BUFFER_TTL)
+    if CHAT_EVENT_BUFFER_TTL <= 0:
+        CHAT_EVENT_BUFFER_TTL = 300
+except ValueError:
+    CHAT_EVENT_BUFFER_TTL = 300
+
 
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
@@ -659,6 +854,57 @@ else:
     except Exception:
         SENTENCE_TRANSFORMERS_CROSS_ENCODER_MODEL_KWARGS = None
 
+
+# Pairs to rerank from concurrent requests are scored together, in batches of
+# up to RAG_RERANKING_BATCH_SIZE pairs, by a worker thread (local rerankers)
+ENABLE_RAG_RERANKING_BATCHING = (
+    os.environ.get("ENABLE_RAG_RERANKING_BATCHING", "True").lower() == "true"
+)
+
+RAG_RERANKING_BATCH_SIZE = os.environ.get("RAG_RERANKING_BATCH_SIZE", "32")
+try:
+    RAG_RERANKING_BATCH_SIZE = max(int(RAG_RERANKING_BATCH_SIZE), 1)
+except ValueError:
+    RAG_RERANKING_BATCH_SIZE = 32
+
+# How long the worker waits for more pairs before scoring a batch (in seconds)
+RAG_RERANKING_BATCH_WAIT = os.environ.get("RAG_RERANKING_BATCH_WAIT", "0.005")
+try:
+    RAG_RERANKING_BATCH_WAIT = max(float(RAG_RERANKING_BATCH_WAIT), 0)
+except ValueError:
+    RAG_RERANKING_BATCH_WAIT = 0.005
+
+# Number of (query, document) scores kept in memory, 0 to disable the cache
+RAG_RERANKING_CACHE_SIZE = os.environ.get("RAG_RERANKING_CACHE_SIZE", "10000")
+try:
+    RAG_RERANKING_CACHE_SIZE = max(int(RAG_RERANKING_CACHE_SIZE), 0)
+except ValueError:
+    RAG_RERANKING_CACHE_SIZE = 10000
+
+# Texts to embed from concurrent requests are encoded together, in batches of
+# up to RAG_EMBEDDING_WORKER_BATCH_SIZE texts, by a worker thread (local
+# sentence-transformers models)
+ENABLE_RAG_EMBEDDING_BATCHING = (
+    os.environ.get("ENABLE_RAG_EMBEDDING_BATCHING", "True").lower() == "true"
+)
+
+RAG_EMBEDDING_WORKER_BATCH_SIZE = os.environ.get(
+    "RAG_EMBEDDING_WORKER_BATCH_SIZE", "32"
+)
+try:
+    RAG_EMBEDDING_WORKER_BATCH_SIZE = max(int(RAG_EMBEDDING_WORKER_BATCH_SIZE), 1)
+except ValueError:
+    RAG_EMBEDDING_WORKER_BATCH_SIZE = 32
+
+# How long the worker waits for more texts before encoding a batch (in seconds)
+RAG_EMBEDDING_WORKER_BATCH_WAIT = os.environ.get(
+    "RAG_EMBEDDING_WORKER_BATCH_WAIT", "0.005"
+)
+try:
+    RAG_EMBEDDING_WORKER_BATCH_WAIT = max(float(RAG_EMBEDDING_WORKER_BATCH_WAIT), 0)
+except ValueError:
+    RAG_EMBEDDING_WORKER_BATCH_WAIT = 0.005
+
 ####################################
 # OFFLINE_MODE
 ####################################
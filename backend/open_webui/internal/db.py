@@ -1,8 +1,12 @@
 import os
 import json
+import asyncio
 import logging
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Any, Optional
+from typing import Any, Callable, Optional, TypeVar
 
 from open_webui.internal.wrappers import register_connection
 from open_webui.env import (
@@ -15,6 +19,7 @@ from open_webui.env import (
     DATABASE_POOL_SIZE,
     DATABASE_POOL_TIMEOUT,
     DATABASE_ENABLE_SQLITE_WAL,
+    DATABASE_EXECUTOR_WORKERS,
 )
 from peewee_migrate import Router
 from sqlalchemy import Dialect, create_engine, MetaData, event, types
@@ -162,3 +167,49 @@ def get_session():
 
 
 get_db = contextmanager(get_session)
+
+
+####################
+# Async access
+####################
+
+T = TypeVar("T")
+
+# Bounded so concurrent requests queue here instead of exhausting the connection pool
+DB_EXECUTOR = ThreadPoolExecutor(
+    max_workers=DATABASE_EXECUTOR_WORKERS, thread_name_prefix="db"
+)
+
+
+async def run_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a blocking database call on the database executor without blocking the
+    event loop. Context variables (e.g. tracing spans) are carried over.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        DB_EXECUTOR, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+class AsyncTable:
+    """
+    Awaitable view of a synchronous table class: `await AsyncChats.get_chat_by_id(id)`
+    runs `Chats.get_chat_by_id(id)` on the database executor.
+    """
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._table, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await run_db(attr, *args, **kwargs)
+
+        setattr(self, name, method)
+        return method
@@ -64,8 +64,12 @@ from open_webui.utils.audit import AuditLevel, AuditLoggingMiddleware
 from open_webui.utils.logger import start_logger
 from open_webui.socket.main import (
     app as socket_app,
-    periodic_usage_pool_cleanup,
+    periodic_ydoc_compaction,
     get_event_emitter,
+    open_chat_event_stream,
+    close_chat_event_stream,
+    is_chat_event_stream_available,
+    CHAT_EVENT_BUFFER,
     get_models_in_use,
     get_active_user_ids,
 )
@@ -103,9 +107,9 @@ from open_webui.routers.retrieval import (
 from open_webui.internal.db import Session, engine
 
 from open_webui.models.functions import Functions
-from open_webui.models.models import Models
+from open_webui.models.models import AsyncModels
 from open_webui.models.users import UserModel, Users
-from open_webui.models.chats import Chats
+from open_webui.models.chats import AsyncChats
 
 from open_webui.config import (
     # Ollama
@@ -394,6 +398,7 @@ from open_webui.env import (
     ENABLE_WEBSOCKET_SUPPORT,
     BYPASS_MODEL_ACCESS_CONTROL,
     RESET_CONFIG_ON_START,
+    ENABLE_EVENT_LOOP_MONITOR,
     EXTERNAL_PWA_MANIFEST_URL,
     AIOHTTP_CLIENT_SESSION_SSL,
 )
@@ -404,7 +409,10 @@ from open_webui.utils.models import (
     get_all_base_models,
     check_model_access,
     get_filtered_models,
+    get_models_response,
+    ModelsResponseCache,
 )
+from open_webui.utils.model_registry import ModelRegistry
 from open_webui.utils.chat import (
     generate_chat_completion as chat_completion_handler,
     chat_completed as chat_completed_handler,
@@ -424,9 +432,13 @@ from open_webui.utils.auth import (
 from open_webui.utils.plugin import install_tool_and_function_dependencies
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
 from open_webui.utils.redis import get_redis_connection
+from open_webui.utils.loop_monitor import EventLoopMonitor, EventLoopMonitorMiddleware
+from open_webui.utils.pubsub import FILE_STATUS_PUBSUB
+from open_webui.utils.pagination import NEXT_CURSOR_HEADER
 
 from open_webui.tasks import (
     redis_task_command_listener,
+    redis_task_heartbeat,
     list_task_ids_by_item_id,
     create_task,
     stop_task,
@@ -509,12 +521,31 @@ async def lifespan(app: FastAPI):
         app.state.redis_task_command_listener = asyncio.create_task(
             redis_task_command_listener(app)
         )
+        app.state.redis_task_heartbeat = asyncio.create_task(redis_task_heartbeat(app))
+
+        # File processing status updates are published from the thread pool
+        app.state.file_status_listener = asyncio.create_task(
+            FILE_STATUS_PUBSUB.listen(
+                get_redis_connection(
+                    redis_url=REDIS_URL,
+                    redis_sentinels=get_sentinels_from_env(
+                        REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                    ),
+                    redis_cluster=REDIS_CLUSTER,
+                    async_mode=False,
+                ),
+                app.state.redis,
+            )
+        )
 
     if THREAD_POOL_SIZE and THREAD_POOL_SIZE > 0:
         limiter = anyio.to_thread.current_default_thread_limiter()
         limiter.total_tokens = THREAD_POOL_SIZE
 
-    asyncio.create_task(periodic_usage_pool_cleanup())
+    asyncio.create_task(periodic_ydoc_compaction())
+
+    if ENABLE_EVENT_LOOP_MONITOR:
+        app.state.EVENT_LOOP_MONITOR.start()
 
     if app.state.config.ENABLE_BASE_MODELS_CACHE:
         await get_all_models(
@@ -542,6 +573,14 @@ async def lifespan(app: FastAPI):
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    if hasattr(app.state, "redis_task_heartbeat"):
+        app.state.redis_task_heartbeat.cancel()
+
+    if hasattr(app.state, "file_status_listener"):
+        app.state.file_status_listener.cancel()
+
+    app.state.EVENT_LOOP_MONITOR.stop()
+
 
 app = FastAPI(
     title="CryoTensor",
@@ -559,6 +598,7 @@ app.state.config = AppConfig(
     redis_key_prefix=REDIS_KEY_PREFIX,
 )
 app.state.redis = None
+app.state.EVENT_LOOP_MONITOR = EventLoopMonitor()
 
 app.state.WEBUI_NAME = WEBUI_NAME
 app.state.LICENSE_METADATA = None
@@ -1044,7 +1084,9 @@ app.state.config.AUTOCOMPLETE_GENERATION_INPUT_MAX_LENGTH = (
 #
 ########################################
 
-app.state.MODELS = {}
+app.state.MODEL_REGISTRY = ModelRegistry()
+app.state.MODELS = app.state.MODEL_REGISTRY.models
+app.state.MODELS_RESPONSE_CACHE = ModelsResponseCache()
 
 
 class RedirectMiddleware(BaseHTTPMiddleware):
@@ -1068,6 +1110,10 @@ class RedirectMiddleware(BaseHTTPMiddleware):
 
 
 # Add the middleware to the app
+if ENABLE_EVENT_LOOP_MONITOR:
+    # Added first so it stays the innermost middleware and shares the route handler's task
+    app.add_middleware(EventLoopMonitorMiddleware)
+
 if ENABLE_COMPRESSION_MIDDLEWARE:
     app.add_middleware(CompressMiddleware)
 
@@ -1121,6 +1167,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
@@ -1187,45 +1234,50 @@ async def get_models(
 ):
     all_models = await get_all_models(request, refresh=refresh, user=user)
 
-    models = []
-    for model in all_models:
-        # Filter out filter pipelines
-        if "pipeline" in model and model["pipeline"].get("type", None) == "filter":
-            continue
+    def get_user_models():
+        models = []
+        for model in all_models:
+            # Filter out filter pipelines
+            if "pipeline" in model and model["pipeline"].get("type", None) == "filter":
+                continue
 
-        try:
-            model_tags = [
-                tag.get("name")
-                for tag in model.get("info", {}).get("meta", {}).get("tags", [])
-            ]
-            tags = [tag.get("name") for tag in model.get("tags", [])]
-
-            tags = list(set(model_tags + tags))
-            model["tags"] = [{"name": tag} for tag in tags]
-        except Exception as e:
-            log.debug(f"Error processing model tags: {e}")
-            model["tags"] = []
-            pass
-
-        models.append(model)
-
-    model_order_list = request.app.state.config.MODEL_ORDER_LIST
-    if model_order_list:
-        model_order_dict = {model_id: i for i, model_id in enumerate(model_order_list)}
-        # Sort models by order list priority, with fallback for those not in the list
-        models.sort(
-            key=lambda model: (
-                model_order_dict.get(model.get("id", ""), float("inf")),
-                (model.get("name", "") or ""),
+            try:
+                model_tags = [
+                    tag.get("name")
+                    for tag in model.get("info", {}).get("meta", {}).get("tags", [])
+                ]
+                tags = [tag.get("name") for tag in model.get("tags", [])]
+
+                tags = list(set(model_tags + tags))
+                model = {**model, "tags": [{"name": tag} for tag in tags]}
+            except Exception as e:
+                log.debug(f"Error processing model tags: {e}")
+                model = {**model, "tags": []}
+                pass
+
+            models.append(model)
+
+        model_order_list = request.app.state.config.MODEL_ORDER_LIST
+        if model_order_list:
+            model_order_dict = {
+                model_id: i for i, model_id in enumerate(model_order_list)
+            }
+            # Sort models by order list priority, with fallback for those not in the list
+            models.sort(
+                key=lambda model: (
+                    model_order_dict.get(model.get("id", ""), float("inf")),
+                    (model.get("name", "") or ""),
+                )
             )
-        )
 
-    models = get_filtered_models(models, user)
+        models = get_filtered_models(models, user)
 
-    log.debug(
-        f"/api/models returned filtered models accessible to the user: {json.dumps([model.get('id') for model in models])}"
-    )
-    return {"data": models}
+        log.debug(
+            f"/api/models returned filtered models accessible to the user: {json.dumps([model.get('id') for model in models])}"
+        )
+        return models
+
+    return get_models_response(request, user, get_user_models)
 
 
 @app.get("/api/models/base")
@@ -1287,7 +1339,7 @@ async def chat_completion(
                 raise Exception("Model not found")
 
             model = request.app.state.MODELS[model_id]
-            model_info = Models.get_model_by_id(model_id)
+            model_info = await AsyncModels.get_model_by_id(model_id)
 
             # Check if user has access to the model
             if not BYPASS_MODEL_ACCESS_CONTROL and (
@@ -1326,6 +1378,8 @@ async def chat_completion(
             "chat_id": form_data.pop("chat_id", None),
             "message_id": form_data.pop("id", None),
             "session_id": form_data.pop("session_id", None),
+            # Clients without Socket.IO read the events from /api/tasks/{id}/events
+            "event_stream": form_data.pop("event_stream", False),
             "filter_ids": form_data.pop("filter_ids", []),
             "tool_ids": form_data.get("tool_ids", None),
             "tool_servers": form_data.pop("tool_servers", None),
@@ -1350,13 +1404,21 @@ async def chat_completion(
 
         if metadata.get("chat_id") and (user and user.role != "admin"):
             if metadata["chat_id"] != "local":
-                chat = Chats.get_chat_by_id_and_user_id(metadata["chat_id"], user.id)
+                chat = await AsyncChats.get_chat_by_id_and_user_id(
+                    metadata["chat_id"], user.id
+                )
                 if chat is None:
                     raise HTTPException(
                         status_code=status.HTTP_404_NOT_FOUND,
                         detail=ERROR_MESSAGES.DEFAULT(),
                     )
 
+        if metadata["event_stream"] and not is_chat_event_stream_available():
+            raise Exception(
+                "Chat event streams need CHAT_EVENT_BUFFER_SIZE > 0, and Redis "
+                "(WEBSOCKET_MANAGER=redis) with more than one worker"
+            )
+
         request.state.metadata = metadata
         form_data["metadata"] = metadata
 
@@ -1376,7 +1438,7 @@ async def chat_completion(
             response = await chat_completion_handler(request, form_data, user)
             if metadata.get("chat_id") and metadata.get("message_id"):
                 try:
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await AsyncChats.upsert_message_to_chat_by_id_and_message_id(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1403,7 +1465,7 @@ async def chat_completion(
             if metadata.get("chat_id") and metadata.get("message_id"):
                 # Update the chat message with the error
                 try:
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await AsyncChats.upsert_message_to_chat_by_id_and_message_id(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1433,16 +1495,28 @@ async def chat_completion(
                 log.debug(f"Error cleaning up: {e}")
                 pass
 
+            if metadata.get("event_stream"):
+                try:
+                    await close_chat_event_stream(metadata)
+                except Exception as e:
+                    log.debug(f"Error closing chat event stream: {e}")
+
     if (
-        metadata.get("session_id")
+        (metadata.get("session_id") or metadata.get("event_stream"))
         and metadata.get("chat_id")
         and metadata.get("message_id")
     ):
         # Asynchronous Chat Processing
+        metadata["task_id"] = str(uuid4())
+        if metadata["event_stream"]:
+            # The task id is known upfront so every event can be buffered for /api/tasks/{id}/events
+            await open_chat_event_stream(metadata["task_id"], user.id)
+
         task_id, _ = await create_task(
             request.app.state.redis,
             process_chat(request, form_data, user, metadata, model),
             id=metadata["chat_id"],
+            task_id=metadata["task_id"],
         )
         return {"status": True, "task_id": task_id}
     else:
@@ -1503,6 +1577,56 @@ async def stop_task_endpoint(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
+@app.get("/api/tasks/{task_id}/events")
+async def stream_task_events_endpoint(
+    request: Request,
+    task_id: str,
+    last_event_id: Optional[str] = None,
+    user=Depends(get_verified_user),
+):
+    """
+    Stream the chat events of a task as Server-Sent Events, for clients without
+    a Socket.IO connection, which request the task with `"event_stream": true`
+    in the chat completion form. Reconnecting clients resume after the
+    `Last-Event-ID` header (or `last_event_id` query parameter) from the
+    buffered events.
+    """
+    owner_id = await CHAT_EVENT_BUFFER.get_owner(task_id)
+    if owner_id is None or (owner_id != user.id and user.role != "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+    last_event_id = request.headers.get("last-event-id") or last_event_id
+
+    async def event_stream():
+        nonlocal last_event_id
+
+        while not await request.is_disconnected():
+            events = await CHAT_EVENT_BUFFER.read(task_id, last_event_id)
+            if not events:
+                if await CHAT_EVENT_BUFFER.get_owner(task_id) is None:
+                    break
+                # Keeps proxies from closing an idle connection
+                yield ": ping\n\n"
+                continue
+
+            for event_id, payload in events:
+                last_event_id = event_id
+                if payload is None:
+                    yield f"id: {event_id}\nevent: done\ndata: {{}}\n\n"
+                    return
+
+                yield f"id: {event_id}\nevent: chat-events\ndata: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/api/tasks")
 async def list_tasks_endpoint(request: Request, user=Depends(get_verified_user)):
     return {"tasks": await list_tasks(request.app.state.redis)}
@@ -1512,7 +1636,7 @@ async def list_tasks_endpoint(request: Request, user=Depends(get_verified_user))
 async def list_tasks_by_chat_id_endpoint(
     request: Request, chat_id: str, user=Depends(get_verified_user)
 ):
-    chat = Chats.get_chat_by_id(chat_id)
+    chat = await AsyncChats.get_chat_by_id(chat_id)
     if chat is None or chat.user_id != user.id:
         return {"task_ids": []}
 
@@ -1707,12 +1831,24 @@ async def get_current_usage(user=Depends(get_verified_user)):
     This is an experimental endpoint and subject to change.
     """
     try:
-        return {"model_ids": get_models_in_use(), "user_ids": get_active_user_ids()}
+        return {
+            "model_ids": await get_models_in_use(),
+            "user_ids": await get_active_user_ids(),
+        }
     except Exception as e:
         log.error(f"Error getting usage statistics: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@app.get("/api/usage/event-loop")
+async def get_event_loop_usage(user=Depends(get_admin_user)):
+    """
+    Get event loop lag statistics, including recent blocking calls with their
+    stack traces and the routes/tasks they were attributed to.
+    """
+    return app.state.EVENT_LOOP_MONITOR.get_stats()
+
+
 try:
     if REDIS_URL:
         redis_session_store = RedisStore(
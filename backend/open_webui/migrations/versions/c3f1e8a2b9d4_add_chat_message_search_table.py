@@ -0,0 +1,208 @@
+"""Add chat_message_search table
+
+Revision ID: c3f1e8a2b9d4
+Revises: a5c220713937
+Create Date: 2025-10-02 10:12:41.318205
+
+"""
+
+import hashlib
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+log = logging.getLogger(__name__)
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f1e8a2b9d4"
+down_revision: Union[str, None] = "a5c220713937"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+# Copies of the indexing helpers of open_webui.models.chat_search, so the
+# migration keeps indexing chats as they were when it was written
+def get_message_content(message: dict) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        content = " ".join(
+            part.get("text", "")
+            for part in content
+            if isinstance(part, dict) and isinstance(part.get("text"), str)
+        )
+    return content if isinstance(content, str) else ""
+
+
+def get_chat_search_entries(chat: dict) -> dict[str, str]:
+    """Map the message ids of a chat payload to their content, "" to the title."""
+    entries = {"": chat.get("title") or ""}
+
+    messages = (chat.get("history") or {}).get("messages") or {}
+    if not messages:
+        messages = {
+            message.get("id") or str(idx): message
+            for idx, message in enumerate(chat.get("messages") or [])
+            if isinstance(message, dict)
+        }
+
+    for message_id, message in messages.items():
+        if not isinstance(message, dict):
+            continue
+
+        content = get_message_content(message).replace("\u0000", "")
+        if content.strip():
+            entries[message_id] = content
+
+    return entries
+
+
+def upgrade() -> None:
+    # One row per chat title and message, indexed by the database
+    op.create_table(
+        "chat_message_search",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("chat_id", sa.String(), nullable=False),
+        sa.Column("message_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("content_hash", sa.String(), nullable=True),
+        sa.Column("hashed", sa.Boolean(), nullable=True),
+    )
+    op.create_index(
+        "chat_message_search_chat_id_idx",
+        "chat_message_search",
+        ["chat_id", "message_id"],
+    )
+    op.create_index(
+        "chat_message_search_user_id_idx", "chat_message_search", ["user_id"]
+    )
+
+    conn = op.get_bind()
+    if conn.dialect.name == "sqlite":
+        # External content FTS5 table kept in sync with triggers. The trigram
+        # tokenizer (SQLite 3.34+) matches substrings, which also finds words of
+        # scripts written without spaces, unicode61 only matches word prefixes.
+        for tokenize in ("trigram", "unicode61 remove_diacritics 2"):
+            try:
+                op.execute(
+                    "CREATE VIRTUAL TABLE chat_message_fts USING fts5("
+                    "content, content='chat_message_search', content_rowid='id', "
+                    f"tokenize='{tokenize}')"
+                )
+                break
+            except Exception as e:
+                log.warning(f"Unable to create the FTS5 table with {tokenize}: {e}")
+        else:
+            # Without FTS5 the search keeps scanning the chats
+            log.warning("FTS5 is not available, skipping the chat search index")
+            return
+
+        op.execute(
+            "CREATE TRIGGER chat_message_search_ai AFTER INSERT ON chat_message_search BEGIN "
+            "INSERT INTO chat_message_fts(rowid, content) VALUES (new.id, new.content); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER chat_message_search_ad AFTER DELETE ON chat_message_search BEGIN "
+            "INSERT INTO chat_message_fts(chat_message_fts, rowid, content) "
+            "VALUES ('delete', old.id, old.content); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER chat_message_search_au AFTER UPDATE ON chat_message_search BEGIN "
+            "INSERT INTO chat_message_fts(chat_message_fts, rowid, content) "
+            "VALUES ('delete', old.id, old.content); "
+            "INSERT INTO chat_message_fts(rowid, content) VALUES (new.id, new.content); "
+            "END"
+        )
+    elif conn.dialect.name == "postgresql":
+        # Generated tsvector column with a GIN index
+        op.execute(
+            "ALTER TABLE chat_message_search ADD COLUMN content_tsv tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(content, ''))) STORED"
+        )
+        op.execute(
+            "CREATE INDEX chat_message_search_content_tsv_idx "
+            "ON chat_message_search USING GIN (content_tsv)"
+        )
+        # Substrings are matched with ILIKE, which a trigram index speeds up
+        try:
+            with conn.begin_nested():
+                conn.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(
+                    sa.text(
+                        "CREATE INDEX chat_message_search_content_trgm_idx "
+                        "ON chat_message_search USING GIN (content gin_trgm_ops)"
+                    )
+                )
+        except Exception as e:
+            log.warning(f"pg_trgm is not available, substring search scans: {e}")
+    else:
+        return
+
+    # Index the existing chats, encrypted ones are indexed when they're next saved
+    chat_table = sa.table(
+        "chat",
+        sa.column("id", sa.String()),
+        sa.column("user_id", sa.String()),
+        sa.column("chat", sa.JSON()),
+    )
+    search_table = sa.table(
+        "chat_message_search",
+        sa.column("chat_id", sa.String()),
+        sa.column("message_id", sa.String()),
+        sa.column("user_id", sa.String()),
+        sa.column("content", sa.Text()),
+        sa.column("content_hash", sa.String()),
+        sa.column("hashed", sa.Boolean()),
+    )
+
+    last_id = None
+    while True:
+        query = sa.select(chat_table.c.id, chat_table.c.user_id, chat_table.c.chat)
+        if last_id is not None:
+            query = query.where(chat_table.c.id > last_id)
+        rows = conn.execute(query.order_by(chat_table.c.id).limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        values = []
+        for row in rows:
+            # Shared chat copies are owned by "shared-<chat id>" and not searched
+            if not isinstance(row.chat, dict) or row.chat.get("__encrypted__"):
+                continue
+            if (row.user_id or "").startswith("shared-"):
+                continue
+
+            for message_id, content in get_chat_search_entries(row.chat).items():
+                values.append(
+                    {
+                        "chat_id": row.id,
+                        "message_id": message_id,
+                        "user_id": row.user_id,
+                        "content": content,
+                        "content_hash": hashlib.sha256(content.encode()).hexdigest(),
+                        "hashed": False,
+                    }
+                )
+
+        if values:
+            conn.execute(sa.insert(search_table), values)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS chat_message_search_ai")
+        op.execute("DROP TRIGGER IF EXISTS chat_message_search_ad")
+        op.execute("DROP TRIGGER IF EXISTS chat_message_search_au")
+        op.execute("DROP TABLE IF EXISTS chat_message_fts")
+
+    op.drop_index("chat_message_search_user_id_idx", table_name="chat_message_search")
+    op.drop_index("chat_message_search_chat_id_idx", table_name="chat_message_search")
+    op.drop_table("chat_message_search")
@@ -0,0 +1,45 @@
+"""Add keyset pagination indexes
+
+Revision ID: d7a4c2e9f1b3
+Revises: c3f1e8a2b9d4
+Create Date: 2025-10-03 14:27:09.512337
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a4c2e9f1b3"
+down_revision: Union[str, None] = "c3f1e8a2b9d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Listings are ordered by (updated_at, id) and paged with a cursor on both
+    op.create_index(
+        "user_id_archived_updated_at_id_idx",
+        "chat",
+        ["user_id", "archived", "updated_at", "id"],
+    )
+    op.create_index("file_updated_at_id_idx", "file", ["updated_at", "id"])
+    op.create_index(
+        "file_user_id_updated_at_id_idx", "file", ["user_id", "updated_at", "id"]
+    )
+    op.create_index("knowledge_updated_at_id_idx", "knowledge", ["updated_at", "id"])
+    op.create_index("note_updated_at_id_idx", "note", ["updated_at", "id"])
+    op.create_index(
+        "note_user_id_updated_at_id_idx", "note", ["user_id", "updated_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("user_id_archived_updated_at_id_idx", table_name="chat")
+    op.drop_index("file_updated_at_id_idx", table_name="file")
+    op.drop_index("file_user_id_updated_at_id_idx", table_name="file")
+    op.drop_index("knowledge_updated_at_id_idx", table_name="knowledge")
+    op.drop_index("note_updated_at_id_idx", table_name="note")
+    op.drop_index("note_user_id_updated_at_id_idx", table_name="note")
@@ -0,0 +1,87 @@
+"""Add path column to folder
+
+Revision ID: e5b8d3f0a6c2
+Revises: d7a4c2e9f1b3
+Create Date: 2025-10-04 09:41:22.870154
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b8d3f0a6c2"
+down_revision: Union[str, None] = "d7a4c2e9f1b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    # Materialized path of the folder ids from the root, e.g. "/<root id>/<id>/"
+    op.add_column("folder", sa.Column("path", sa.Text(), nullable=True))
+    op.create_index(
+        "folder_user_id_path_idx",
+        "folder",
+        ["user_id", "path"],
+        postgresql_ops={"path": "text_pattern_ops"},
+    )
+
+    folder_table = sa.table(
+        "folder",
+        sa.column("id", sa.Text()),
+        sa.column("parent_id", sa.Text()),
+        sa.column("user_id", sa.Text()),
+        sa.column("path", sa.Text()),
+    )
+
+    conn = op.get_bind()
+    folders = {
+        row.id: row
+        for row in conn.execute(
+            sa.select(
+                folder_table.c.id, folder_table.c.parent_id, folder_table.c.user_id
+            )
+        )
+    }
+
+    paths = {}
+
+    def get_path(id):
+        # Walk up to the root or to a folder whose path is known, folders with
+        # a missing parent (or in a cycle) become roots
+        chain = []
+        while id not in paths:
+            chain.append(id)
+            folder = folders[id]
+            parent_id = folder.parent_id
+            if (
+                parent_id not in folders
+                or parent_id in chain
+                or folders[parent_id].user_id != folder.user_id
+            ):
+                break
+            id = parent_id
+
+        path = paths.get(id, "/")
+        for id in reversed(chain):
+            path = f"{path}{id}/"
+            paths[id] = path
+        return path
+
+    values = [{"_id": id, "path": get_path(id)} for id in folders]
+    for i in range(0, len(values), BATCH_SIZE):
+        conn.execute(
+            folder_table.update()
+            .where(folder_table.c.id == sa.bindparam("_id"))
+            .values(path=sa.bindparam("path")),
+            values[i : i + BATCH_SIZE],
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("folder_user_id_path_idx", table_name="folder")
+    op.drop_column("folder", "path")
@@ -0,0 +1,79 @@
+"""Add chat_tag table
+
+Revision ID: f3c9a1d7e2b4
+Revises: e5b8d3f0a6c2
+Create Date: 2025-10-06 14:12:05.318402
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c9a1d7e2b4"
+down_revision: Union[str, None] = "e5b8d3f0a6c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    # Tags of each chat, mirroring `chat.meta["tags"]`
+    op.create_table(
+        "chat_tag",
+        sa.Column("chat_id", sa.String(), nullable=False),
+        sa.Column("tag_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "tag_id"),
+    )
+    op.create_index("chat_tag_user_id_tag_id_idx", "chat_tag", ["user_id", "tag_id"])
+
+    chat_table = sa.table(
+        "chat",
+        sa.column("id", sa.String()),
+        sa.column("user_id", sa.String()),
+        sa.column("meta", sa.JSON()),
+    )
+    chat_tag_table = sa.table(
+        "chat_tag",
+        sa.column("chat_id", sa.String()),
+        sa.column("tag_id", sa.String()),
+        sa.column("user_id", sa.String()),
+    )
+
+    conn = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(chat_table.c.id, chat_table.c.user_id, chat_table.c.meta)
+        if last_id is not None:
+            query = query.where(chat_table.c.id > last_id)
+        rows = conn.execute(query.order_by(chat_table.c.id).limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        values = []
+        for row in rows:
+            # Shared chat copies are owned by "shared-<chat id>" and not listed
+            if (row.user_id or "").startswith("shared-"):
+                continue
+
+            tags = (row.meta or {}).get("tags") if isinstance(row.meta, dict) else None
+            if not isinstance(tags, list):
+                continue
+
+            for tag_id in {tag for tag in tags if isinstance(tag, str)}:
+                values.append(
+                    {"chat_id": row.id, "tag_id": tag_id, "user_id": row.user_id}
+                )
+
+        if values:
+            conn.execute(sa.insert(chat_tag_table), values)
+
+
+def downgrade() -> None:
+    op.drop_index("chat_tag_user_id_tag_id_idx", table_name="chat_tag")
+    op.drop_table("chat_tag")
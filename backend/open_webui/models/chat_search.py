@@ -0,0 +1,316 @@
+import hashlib
+import hmac
+import logging
+import re
+from typing import Optional
+
+from open_webui.internal.db import Base
+from open_webui.env import (
+    CHAT_SEARCH_HASH_KEY,
+    ENABLE_CHAT_SEARCH_HASH_INDEX,
+    ENABLE_CHAT_SEARCH_INDEX,
+    SRC_LOG_LEVELS,
+    WEBUI_SECRET_KEY,
+)
+from open_webui.utils.secrets import encryption_available
+
+from sqlalchemy import Boolean, Column, Float, Index, Integer, String, Text
+from sqlalchemy import inspect, text
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# Chat Search DB Schema
+####################
+
+
+class ChatMessageSearch(Base):
+    """
+    One row per indexed chat title or message. The full-text index itself is
+    maintained by the database: an external content FTS5 table kept in sync by
+    triggers on SQLite, a generated tsvector column with a GIN index on
+    PostgreSQL (see the migration).
+    """
+
+    __tablename__ = "chat_message_search"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(String, nullable=False)
+    message_id = Column(String, nullable=False)  # "" for the chat title
+    user_id = Column(String, nullable=False)
+
+    content = Column(Text)
+    content_hash = Column(String)
+    hashed = Column(Boolean, default=False)
+
+    __table_args__ = (
+        Index("chat_message_search_chat_id_idx", "chat_id", "message_id"),
+        Index("chat_message_search_user_id_idx", "user_id"),
+    )
+
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def get_search_tokens(content: str) -> list[str]:
+    return TOKEN_PATTERN.findall(content.lower())
+
+
+def get_message_content(message: dict) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        content = " ".join(
+            part.get("text", "")
+            for part in content
+            if isinstance(part, dict) and isinstance(part.get("text"), str)
+        )
+    return content if isinstance(content, str) else ""
+
+
+def get_chat_search_entries(chat: dict) -> dict[str, str]:
+    """Map the message ids of a chat payload to their content, "" to the title."""
+    entries = {"": chat.get("title") or ""}
+
+    messages = (chat.get("history") or {}).get("messages") or {}
+    if not messages:
+        messages = {
+            message.get("id") or str(idx): message
+            for idx, message in enumerate(chat.get("messages") or [])
+            if isinstance(message, dict)
+        }
+
+    for message_id, message in messages.items():
+        if not isinstance(message, dict):
+            continue
+
+        content = get_message_content(message).replace("\u0000", "")
+        if content.strip():
+            entries[message_id] = content
+
+    return entries
+
+
+class ChatSearchTable:
+    def __init__(self):
+        self._available = {}
+        # Whether the FTS5 table was created with the trigram tokenizer
+        self._trigram = False
+
+    def get_mode(self) -> Optional[str]:
+        """
+        "plain" indexes the text, "hashed" only keyed hashes of its words and
+        None disables the index (the search falls back to scanning chats).
+        """
+        if not ENABLE_CHAT_SEARCH_INDEX:
+            return None
+
+        if encryption_available():
+            return "hashed" if ENABLE_CHAT_SEARCH_HASH_INDEX else None
+        return "plain"
+
+    def is_available(self, db) -> bool:
+        dialect_name = db.bind.dialect.name
+        if dialect_name not in self._available:
+            try:
+                inspector = inspect(db.bind)
+                if dialect_name == "sqlite":
+                    available = inspector.has_table("chat_message_fts")
+                    if available:
+                        sql = db.execute(
+                            text(
+                                "SELECT sql FROM sqlite_master "
+                                "WHERE name = 'chat_message_fts'"
+                            )
+                        ).scalar()
+                        self._trigram = "trigram" in (sql or "")
+                elif dialect_name == "postgresql":
+                    available = inspector.has_table("chat_message_search") and any(
+                        column["name"] == "content_tsv"
+                        for column in inspector.get_columns("chat_message_search")
+                    )
+                else:
+                    available = False
+            except Exception as e:
+                log.warning(f"Unable to check the chat search index: {e}")
+                available = False
+
+            self._available[dialect_name] = available
+        return self._available[dialect_name]
+
+    def _hash_token(self, token: str) -> str:
+        key = (CHAT_SEARCH_HASH_KEY or WEBUI_SECRET_KEY).encode()
+        return hmac.new(key, token.encode(), hashlib.sha256).hexdigest()[:24]
+
+    def _get_indexed_content(self, content: str, hashed: bool) -> str:
+        if hashed:
+            return " ".join(
+                self._hash_token(token) for token in set(get_search_tokens(content))
+            )
+        return content
+
+    def index_chat(
+        self, db, chat_id: str, user_id: str, chat: Optional[dict], new: bool = False
+    ):
+        """
+        Bring the index of a chat up to date within the caller's transaction.
+        Only the rows of messages that were added, edited or removed are written,
+        `new` chats have no rows yet and are indexed without looking them up.
+        """
+        if not self.is_available(db):
+            return
+
+        mode = self.get_mode()
+        if mode is None:
+            self.delete_by_chat_ids(db, [chat_id])
+            return
+
+        hashed = mode == "hashed"
+        entries = {
+            message_id: self._get_indexed_content(content, hashed)
+            for message_id, content in get_chat_search_entries(chat or {}).items()
+        }
+
+        rows = []
+        if not new:
+            rows = (
+                db.query(
+                    ChatMessageSearch.id,
+                    ChatMessageSearch.message_id,
+                    ChatMessageSearch.content_hash,
+                    ChatMessageSearch.hashed,
+                )
+                .filter(ChatMessageSearch.chat_id == chat_id)
+                .all()
+            )
+
+        stale_ids = []
+        indexed = set()
+        for row in rows:
+            content = entries.get(row.message_id)
+            if (
+                content is None
+                or bool(row.hashed) != hashed
+                or row.content_hash != hashlib.sha256(content.encode()).hexdigest()
+                or row.message_id in indexed
+            ):
+                stale_ids.append(row.id)
+            else:
+                indexed.add(row.message_id)
+
+        if stale_ids:
+            db.query(ChatMessageSearch).filter(
+                ChatMessageSearch.id.in_(stale_ids)
+            ).delete(synchronize_session=False)
+
+        db.add_all(
+            ChatMessageSearch(
+                chat_id=chat_id,
+                message_id=message_id,
+                user_id=user_id,
+                content=content,
+                content_hash=hashlib.sha256(content.encode()).hexdigest(),
+                hashed=hashed,
+            )
+            for message_id, content in entries.items()
+            if message_id not in indexed
+        )
+
+    def delete_by_chat_ids(self, db, chat_ids):
+        """`chat_ids` may be a list or a select of chat ids."""
+        if self.is_available(db):
+            db.query(ChatMessageSearch).filter(
+                ChatMessageSearch.chat_id.in_(chat_ids)
+            ).delete(synchronize_session=False)
+
+    def delete_by_user_id(self, db, user_id: str):
+        if self.is_available(db):
+            db.query(ChatMessageSearch).filter_by(user_id=user_id).delete(
+                synchronize_session=False
+            )
+
+    def get_search_subquery(self, db, user_id: str, search_text: str):
+        """
+        Subquery of (chat_id, score) for the chats of a user with messages or a
+        title containing all the words of `search_text`, a lower score ranking
+        higher. Words are matched as substrings, unless the index is hashed and
+        only matches whole words. Returns None when the index can't be used.
+        """
+        mode = self.get_mode()
+        tokens = get_search_tokens(search_text)
+        if mode is None or not tokens or not self.is_available(db):
+            return None
+
+        hashed = mode == "hashed"
+        if hashed:
+            tokens = [self._hash_token(token) for token in tokens]
+            match_tokens, like_tokens = tokens, []
+        elif db.bind.dialect.name == "sqlite" and self._trigram:
+            # Trigrams can't match shorter tokens
+            match_tokens = [token for token in tokens if len(token) >= 3]
+            like_tokens = [token for token in tokens if len(token) < 3]
+        else:
+            # unicode61 and tsvector split "今日は東京へ" into a single word, only
+            # LIKE finds "東京" in it
+            match_tokens, like_tokens = [], tokens
+
+        params = {"user_id": user_id, "hashed": hashed}
+        # Tokens are letters and digits only, no LIKE wildcards
+        params.update(
+            {f"like_{idx}": f"%{token}%" for idx, token in enumerate(like_tokens)}
+        )
+
+        if db.bind.dialect.name == "sqlite":
+            like_sql = "".join(
+                f" AND search.content LIKE :like_{idx}"
+                for idx in range(len(like_tokens))
+            )
+            if match_tokens:
+                # `rank` is the bm25 score of the row
+                params["query"] = " ".join(f'"{token}"' for token in match_tokens)
+                sql = text(
+                    f"""
+                    SELECT search.chat_id AS chat_id, MIN(chat_message_fts.rank) AS score
+                    FROM chat_message_fts
+                    JOIN chat_message_search AS search ON search.id = chat_message_fts.rowid
+                    WHERE chat_message_fts MATCH :query
+                        AND search.user_id = :user_id AND search.hashed = :hashed{like_sql}
+                    GROUP BY search.chat_id
+                    """
+                )
+            else:
+                sql = text(
+                    f"""
+                    SELECT search.chat_id AS chat_id, 0 AS score
+                    FROM chat_message_search AS search
+                    WHERE search.user_id = :user_id AND search.hashed = :hashed{like_sql}
+                    GROUP BY search.chat_id
+                    """
+                )
+        else:
+            if hashed:
+                params["query"] = " & ".join(tokens)
+                match_sql = " AND content_tsv @@ to_tsquery('simple', :query)"
+            else:
+                # Only ranks, the words are matched by ILIKE (sped up by pg_trgm)
+                params["query"] = " | ".join(f"{token}:*" for token in tokens)
+                match_sql = "".join(
+                    f" AND content ILIKE :like_{idx}" for idx in range(len(tokens))
+                )
+            sql = text(
+                f"""
+                SELECT chat_id, -MAX(ts_rank(content_tsv, to_tsquery('simple', :query))) AS score
+                FROM chat_message_search
+                WHERE user_id = :user_id AND hashed = :hashed{match_sql}
+                GROUP BY chat_id
+                """
+            )
+
+        return (
+            sql.bindparams(**params)
+            .columns(chat_id=String, score=Float)
+            .subquery("search_hits")
+        )
+
+
+ChatSearch = ChatSearchTable()
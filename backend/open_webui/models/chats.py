@@ -1,12 +1,29 @@
+import json
 import logging
 import time
 import uuid
-from typing import Optional
+from typing import Iterator, Optional
 
-from open_webui.internal.db import Base, get_db
-from open_webui.models.tags import TagModel, Tag, Tags
+from open_webui.internal.db import AsyncTable, Base, get_db
+from open_webui.models.tags import ChatTag, TagModel, Tag, Tags
+from open_webui.models.chat_search import ChatSearch
 from open_webui.models.folders import Folders
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    CHAT_PAYLOAD_COMPRESSION,
+    CHAT_PAYLOAD_ZSTD_DICT_PATH,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.compression import (
+    COMPRESSED_MARKER,
+    ZSTD_AVAILABLE,
+    compress_json,
+    decompress_json,
+    is_compressed_json,
+    load_zstd_dictionary,
+    strip_compressed_json,
+    train_zstd_dictionary,
+)
+from open_webui.utils.pagination import apply_cursor
 from open_webui.utils.secrets import (
     decrypt_sensitive_value,
     encrypt_sensitive_value,
@@ -14,9 +31,9 @@ from open_webui.utils.secrets import (
     encryption_feature_enabled,
 )
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
 from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON, Index
-from sqlalchemy import or_, func, select, and_, text
+from sqlalchemy import or_, func, select, and_, case, text, insert, update
 from sqlalchemy.sql import exists
 from sqlalchemy.sql.expression import bindparam
 
@@ -58,9 +75,25 @@ class Chat(Base):
         Index("updated_at_user_id_idx", "updated_at", "user_id"),
         # WHERE folder_id = ... AND user_id = ...
         Index("folder_id_user_id_idx", "folder_id", "user_id"),
+        # WHERE user_id = ... AND archived = ... ORDER BY updated_at DESC, id DESC
+        Index(
+            "user_id_archived_updated_at_id_idx",
+            "user_id",
+            "archived",
+            "updated_at",
+            "id",
+        ),
     )
 
 
+# Every column but the chat payload, which may be large and encrypted
+CHAT_SUMMARY_COLUMNS = tuple(
+    getattr(Chat, column.key)
+    for column in Chat.__table__.columns
+    if column.key != "chat"
+)
+
+
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -80,6 +113,26 @@ class ChatModel(BaseModel):
     folder_id: Optional[str] = None
 
 
+class ChatSummaryModel(BaseModel):
+    """A chat without its messages, as returned by the chat lists."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+    title: str
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+    share_id: Optional[str] = None
+    archived: bool = False
+    pinned: Optional[bool] = False
+
+    meta: dict = {}
+    folder_id: Optional[str] = None
+
+
 ####################
 # Forms
 ####################
@@ -89,6 +142,12 @@ class ChatForm(BaseModel):
     chat: dict
     folder_id: Optional[str] = None
 
+    @field_validator("chat")
+    @classmethod
+    def strip_compressed_chat(cls, chat: dict) -> dict:
+        # Only payloads compressed by the server are decompressed when read
+        return strip_compressed_json(chat)
+
 
 class ChatImportForm(ChatForm):
     meta: Optional[dict] = {}
@@ -97,6 +156,16 @@ class ChatImportForm(ChatForm):
     updated_at: Optional[int] = None
 
 
+class ChatBulkForm(BaseModel):
+    chat_ids: list[str]
+    delete: bool = False
+    archived: Optional[bool] = None
+    # Moves the chats when given, null moving them out of their folder
+    folder_id: Optional[str] = None
+    add_tags: list[str] = []
+    remove_tags: list[str] = []
+
+
 class ChatTitleMessagesForm(BaseModel):
     title: str
     messages: list[dict]
@@ -127,16 +196,53 @@ class ChatTitleIdResponse(BaseModel):
     created_at: int
 
 
+# Number of chats changed per transaction by the bulk operations
+BULK_BATCH_SIZE = 1000
+
+# Number of chats fetched at a time when exporting, and inserted per
+# transaction when importing
+EXPORT_BATCH_SIZE = 100
+IMPORT_BATCH_SIZE = 100
+
+# Number of chats rewritten per transaction by `recompress_chats`, and chats
+# sampled to train the payload zstd dictionary
+RECOMPRESS_BATCH_SIZE = 200
+DICTIONARY_SAMPLES = 2000
+
+
 class ChatTable:
     _encryption_warning_logged = False
 
-    def _serialize_chat_payload(self, chat: Optional[dict]) -> Optional[dict]:
+    def _get_payload_dictionary(self):
+        if CHAT_PAYLOAD_ZSTD_DICT_PATH:
+            return load_zstd_dictionary(CHAT_PAYLOAD_ZSTD_DICT_PATH)
+        return None
+
+    def _serialize_chat_payload(
+        self, chat: Optional[dict], compression: Optional[str] = None
+    ) -> Optional[dict]:
+        """
+        Chat payload as stored: compressed with `compression` (defaults to
+        CHAT_PAYLOAD_COMPRESSION), then encrypted when encryption is available.
+        """
         if chat is None:
             return None
 
         if isinstance(chat, dict) and chat.get("__encrypted__") == "fernet":
             return chat
 
+        # Chats are always passed in as JSON, a compressed payload can only
+        # come from a client
+        chat = strip_compressed_json(chat)
+
+        if compression is None:
+            compression = CHAT_PAYLOAD_COMPRESSION
+        if compression:
+            try:
+                chat = compress_json(chat, compression, self._get_payload_dictionary())
+            except Exception as exc:
+                log.warning("Failed to compress chat payload: %s", exc)
+
         if encryption_available():
             try:
                 return encrypt_sensitive_value(chat)
@@ -160,12 +266,100 @@ class ChatTable:
             return {}
 
         try:
-            return decrypt_sensitive_value(payload)
+            payload = decrypt_sensitive_value(payload)
         except Exception as exc:
             if isinstance(payload, dict) and payload.get("__encrypted__") == "fernet":
                 log.error("Unable to decrypt chat payload: %s", exc)
                 return {}
-            return payload if isinstance(payload, dict) else {}
+
+        if is_compressed_json(payload):
+            try:
+                payload = decompress_json(payload, self._get_payload_dictionary())
+            except Exception as exc:
+                log.error("Unable to decompress chat payload: %s", exc)
+                return {}
+
+        return payload if isinstance(payload, dict) else {}
+
+    def recompress_chat_payload(
+        self, payload: Optional[dict], compression: str
+    ) -> Optional[dict]:
+        """
+        Stored chat payload re-encoded with `compression` ("" to decompress),
+        None when it doesn't need to change or can't be read.
+        """
+        if not isinstance(payload, dict):
+            return None
+
+        try:
+            decrypted = decrypt_sensitive_value(payload)
+        except Exception:
+            if payload.get("__encrypted__") == "fernet":
+                return None
+            decrypted = payload
+
+        if not isinstance(decrypted, dict) or (
+            decrypted.get(COMPRESSED_MARKER, "") == compression
+        ):
+            return None
+
+        chat = self._deserialize_chat_payload(decrypted)
+        if not chat:
+            return None
+        return self._serialize_chat_payload(chat, compression)
+
+    def train_payload_dictionary(
+        self, path: str, samples: int = DICTIONARY_SAMPLES
+    ) -> None:
+        """Train a zstd dictionary on up to `samples` stored chats into `path`."""
+        with get_db() as db:
+            payloads = [payload for (payload,) in db.query(Chat.chat).limit(samples)]
+
+        dictionary = train_zstd_dictionary(
+            [
+                json.dumps(chat, separators=(",", ":")).encode()
+                for chat in map(self._deserialize_chat_payload, payloads)
+                if chat
+            ]
+        )
+        with open(path, "wb") as f:
+            f.write(dictionary)
+        load_zstd_dictionary.cache_clear()
+
+    def recompress_chats(self, compression: str) -> int:
+        """
+        Store every chat payload with `compression` ("" stores JSON), returns
+        the number of chats rewritten. Refuses to compress with a configured
+        zstd dictionary that can't be loaded.
+        """
+        if (
+            compression == "zstd"
+            and ZSTD_AVAILABLE
+            and CHAT_PAYLOAD_ZSTD_DICT_PATH
+            and self._get_payload_dictionary() is None
+        ):
+            raise ValueError(
+                f"The zstd dictionary {CHAT_PAYLOAD_ZSTD_DICT_PATH} can't be loaded"
+            )
+
+        count = 0
+        last_id = None
+        while True:
+            with get_db() as db:
+                query = db.query(Chat.id, Chat.chat)
+                if last_id is not None:
+                    query = query.filter(Chat.id > last_id)
+                rows = query.order_by(Chat.id).limit(RECOMPRESS_BATCH_SIZE).all()
+                if not rows:
+                    return count
+                last_id = rows[-1].id
+
+                for id, payload in rows:
+                    payload = self.recompress_chat_payload(payload, compression)
+                    if payload is not None:
+                        db.query(Chat).filter_by(id=id).update({"chat": payload})
+                        count += 1
+                db.commit()
 
     def _model_from_record(self, record: Optional[Chat]) -> Optional[ChatModel]:
         if not record:
@@ -178,6 +372,13 @@ class ChatTable:
     def _models_from_records(self, records: list[Chat]) -> list[ChatModel]:
         return [self._model_from_record(record) for record in records if record]
 
+    def _summaries_from_query(self, query) -> list[ChatSummaryModel]:
+        # Only select the summary columns so the chat payloads are never loaded
+        return [
+            ChatSummaryModel.model_validate(row)
+            for row in query.with_entities(*CHAT_SUMMARY_COLUMNS).all()
+        ]
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -195,6 +396,7 @@ class ChatTable:
                 updated_at=now,
             )
             db.add(result)
+            ChatSearch.index_chat(db, id, user_id, form_data.chat, new=True)
             db.commit()
             db.refresh(result)
             return self._model_from_record(result)
@@ -221,10 +423,77 @@ class ChatTable:
                 updated_at=updated_at,
             )
             db.add(result)
+            ChatSearch.index_chat(db, id, user_id, form_data.chat, new=True)
+            Tags.set_chat_tags(db, id, user_id, (form_data.meta or {}).get("tags", []))
             db.commit()
             db.refresh(result)
             return self._model_from_record(result)
 
+    def import_chats(self, user_id: str, forms: list[ChatImportForm]) -> int:
+        """
+        Insert a batch of imported chats with their tags in one transaction.
+        The payloads are encrypted before the transaction starts.
+        """
+        now = int(time.time())
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "title": (
+                    form_data.chat.get("title", "New Chat")
+                    if form_data.chat
+                    else "New Chat"
+                ),
+                "chat": self._serialize_chat_payload(form_data.chat),
+                "meta": form_data.meta or {},
+                "pinned": form_data.pinned,
+                "archived": False,
+                "folder_id": form_data.folder_id,
+                "created_at": form_data.created_at or now,
+                "updated_at": form_data.updated_at or now,
+            }
+            for form_data in forms
+        ]
+        if not rows:
+            return 0
+
+        chat_tags = {
+            (row["id"], tag_id)
+            for row in rows
+            for tag_id in row["meta"].get("tags", [])
+            if isinstance(tag_id, str)
+        }
+        tag_ids = {tag_id.replace(" ", "_").lower() for _, tag_id in chat_tags}
+        tag_ids.discard("none")
+
+        with get_db() as db:
+            db.execute(insert(Chat), rows)
+            for row, form_data in zip(rows, forms):
+                ChatSearch.index_chat(db, row["id"], user_id, form_data.chat, new=True)
+
+            db.add_all(
+                ChatTag(chat_id=chat_id, tag_id=tag_id, user_id=user_id)
+                for chat_id, tag_id in chat_tags
+            )
+            if tag_ids:
+                existing_tag_ids = {
+                    tag_id
+                    for (tag_id,) in db.query(Tag.id).filter(
+                        Tag.user_id == user_id, Tag.id.in_(tag_ids)
+                    )
+                }
+                db.add_all(
+                    Tag(
+                        id=tag_id,
+                        name=" ".join(word.capitalize() for word in tag_id.split("_")),
+                        user_id=user_id,
+                    )
+                    for tag_id in tag_ids - existing_tag_ids
+                )
+            db.commit()
+
+        return len(rows)
+
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
         try:
             with get_db() as db:
@@ -232,6 +501,7 @@ class ChatTable:
                 chat_item.chat = self._serialize_chat_payload(chat)
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
                 chat_item.updated_at = int(time.time())
+                ChatSearch.index_chat(db, id, chat_item.user_id, chat)
                 db.commit()
                 db.refresh(chat_item)
 
@@ -257,10 +527,7 @@ class ChatTable:
             return None
 
         self.delete_all_tags_by_id_and_user_id(id, user.id)
-
-        for tag in chat.meta.get("tags", []):
-            if self.count_chats_by_tag_name_and_user_id(tag, user.id) == 0:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
+        self.delete_orphaned_tags_by_user_id(user.id, chat.meta.get("tags", []))
 
         for tag_name in tags:
             if tag_name.lower() == "none":
@@ -469,7 +736,8 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
+        cursor: Optional[str] = None,
+    ) -> list[ChatSummaryModel]:
 
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id, archived=True)
@@ -483,22 +751,26 @@ class ChatTable:
                 direction = filter.get("direction")
 
                 if order_by and direction and getattr(Chat, order_by):
+                    # Cursors point into the default (updated_at, id) order
+                    if cursor:
+                        raise ValueError("A cursor can't be combined with order_by")
                     if direction.lower() == "asc":
                         query = query.order_by(getattr(Chat, order_by).asc())
                     elif direction.lower() == "desc":
                         query = query.order_by(getattr(Chat, order_by).desc())
                     else:
                         raise ValueError("Invalid direction for ordering")
+                else:
+                    query = apply_cursor(query, Chat.updated_at, Chat.id, cursor)
             else:
-                query = query.order_by(Chat.updated_at.desc())
+                query = apply_cursor(query, Chat.updated_at, Chat.id, cursor)
 
             if skip:
                 query = query.offset(skip)
             if limit:
                 query = query.limit(limit)
 
-            all_chats = query.all()
-            return self._models_from_records(all_chats)
+            return self._summaries_from_query(query)
 
     def get_chat_list_by_user_id(
         self,
@@ -507,7 +779,8 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
+        cursor: Optional[str] = None,
+    ) -> list[ChatSummaryModel]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id)
             if not include_archived:
@@ -522,22 +795,26 @@ class ChatTable:
                 direction = filter.get("direction")
 
                 if order_by and direction and getattr(Chat, order_by):
+                    # Cursors point into the default (updated_at, id) order
+                    if cursor:
+                        raise ValueError("A cursor can't be combined with order_by")
                     if direction.lower() == "asc":
                         query = query.order_by(getattr(Chat, order_by).asc())
                     elif direction.lower() == "desc":
                         query = query.order_by(getattr(Chat, order_by).desc())
                     else:
                         raise ValueError("Invalid direction for ordering")
+                else:
+                    query = apply_cursor(query, Chat.updated_at, Chat.id, cursor)
             else:
-                query = query.order_by(Chat.updated_at.desc())
+                query = apply_cursor(query, Chat.updated_at, Chat.id, cursor)
 
             if skip:
                 query = query.offset(skip)
             if limit:
                 query = query.limit(limit)
 
-            all_chats = query.all()
-            return self._models_from_records(all_chats)
+            return self._summaries_from_query(query)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -546,6 +823,7 @@ class ChatTable:
         include_folders: bool = False,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id)
@@ -558,7 +836,7 @@ class ChatTable:
             if not include_archived:
                 query = query.filter_by(archived=False)
 
-            query = query.order_by(Chat.updated_at.desc()).with_entities(
+            query = apply_cursor(query, Chat.updated_at, Chat.id, cursor).with_entities(
                 Chat.id, Chat.title, Chat.updated_at, Chat.created_at
             )
 
@@ -584,16 +862,15 @@ class ChatTable:
 
     def get_chat_list_by_chat_ids(
         self, chat_ids: list[str], skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+    ) -> list[ChatSummaryModel]:
         with get_db() as db:
-            all_chats = (
+            query = (
                 db.query(Chat)
                 .filter(Chat.id.in_(chat_ids))
                 .filter_by(archived=False)
                 .order_by(Chat.updated_at.desc())
-                .all()
             )
-            return self._models_from_records(all_chats)
+            return self._summaries_from_query(query)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
@@ -643,14 +920,34 @@ class ChatTable:
             )
             return self._models_from_records(all_chats)
 
-    def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
+    def iter_chats(self, user_id: Optional[str] = None) -> Iterator[ChatModel]:
+        """
+        Yield the chats of a user, or every chat, one at a time. Rows are
+        fetched EXPORT_BATCH_SIZE at a time through a server-side cursor so
+        exports don't hold every chat in memory.
+        """
         with get_db() as db:
-            all_chats = (
+            query = db.query(Chat)
+            if user_id:
+                query = query.filter_by(user_id=user_id)
+
+            query = (
+                query.order_by(Chat.updated_at.desc())
+                .execution_options(stream_results=True)
+                .yield_per(EXPORT_BATCH_SIZE)
+            )
+            for record in query:
+                yield self._model_from_record(record)
+                db.expunge(record)
+
+    def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatSummaryModel]:
+        with get_db() as db:
+            query = (
                 db.query(Chat)
                 .filter_by(user_id=user_id, pinned=True, archived=False)
                 .order_by(Chat.updated_at.desc())
             )
-            return self._models_from_records(all_chats)
+            return self._summaries_from_query(query)
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -668,9 +965,10 @@ class ChatTable:
         include_archived: bool = False,
         skip: int = 0,
         limit: int = 60,
-    ) -> list[ChatModel]:
+    ) -> list[ChatSummaryModel]:
         """
-        Filters chats based on a search query using Python, allowing pagination using skip and limit.
+        Filters chats based on a search query, allowing pagination using skip and limit.
+        Message content is matched with the chat search index when it's available.
         """
         search_text = search_text.replace("\u0000", "").lower().strip()
 
@@ -751,7 +1049,42 @@ class ChatTable:
             if folder_ids:
                 query = query.filter(Chat.folder_id.in_(folder_ids))
 
-            query = query.order_by(Chat.updated_at.desc())
+            # Check if there are any tags to filter, it should have all the tags
+            if "none" in tag_ids:
+                query = query.filter(~exists().where(ChatTag.chat_id == Chat.id))
+            elif tag_ids:
+                query = query.filter(
+                    *[
+                        exists().where(
+                            ChatTag.chat_id == Chat.id, ChatTag.tag_id == tag_id
+                        )
+                        for tag_id in set(tag_ids)
+                    ]
+                )
+
+            # Rank matching chats with the full-text index when it can be used,
+            # otherwise fall back to scanning the messages of every chat
+            search_hits = (
+                ChatSearch.get_search_subquery(db, user_id, search_text)
+                if search_text
+                else None
+            )
+            if search_hits is not None:
+                query = query.outerjoin(
+                    search_hits, search_hits.c.chat_id == Chat.id
+                ).filter(
+                    or_(
+                        search_hits.c.chat_id.isnot(None),
+                        Chat.title.ilike(f"%{search_text}%"),
+                    )
+                )
+                query = query.order_by(
+                    case((search_hits.c.score.is_(None), 1), else_=0),
+                    search_hits.c.score,
+                    Chat.updated_at.desc(),
+                )
+            else:
+                query = query.order_by(Chat.updated_at.desc())
 
             # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
@@ -765,40 +1098,12 @@ class ChatTable:
                     ")"
                 )
                 sqlite_content_clause = text(sqlite_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")), sqlite_content_clause
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
-                )
-
-                # Check if there are any tags to filter, it should have all the tags
-                if "none" in tag_ids:
-                    query = query.filter(
-                        text(
-                            """
-                            NOT EXISTS (
-                                SELECT 1
-                                FROM json_each(Chat.meta, '$.tags') AS tag
-                            )
-                            """
-                        )
-                    )
-                elif tag_ids:
+                if search_hits is None:
                     query = query.filter(
-                        and_(
-                            *[
-                                text(
-                                    f"""
-                                    EXISTS (
-                                        SELECT 1
-                                        FROM json_each(Chat.meta, '$.tags') AS tag
-                                        WHERE tag.value = :tag_id_{tag_idx}
-                                    )
-                                    """
-                                ).params(**{f"tag_id_{tag_idx}": tag_id})
-                                for tag_idx, tag_id in enumerate(tag_ids)
-                            ]
-                        )
+                        or_(
+                            Chat.title.ilike(bindparam("title_key")),
+                            sqlite_content_clause,
+                        ).params(title_key=f"%{search_text}%", content_key=search_text)
                     )
 
             elif dialect_name == "postgresql":
@@ -811,41 +1116,12 @@ class ChatTable:
                     ")"
                 )
                 postgres_content_clause = text(postgres_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")),
-                        postgres_content_clause,
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
-                )
-
-                # Check if there are any tags to filter, it should have all the tags
-                if "none" in tag_ids:
+                if search_hits is None:
                     query = query.filter(
-                        text(
-                            """
-                            NOT EXISTS (
-                                SELECT 1
-                                FROM json_array_elements_text(Chat.meta->'tags') AS tag
-                            )
-                            """
-                        )
-                    )
-                elif tag_ids:
-                    query = query.filter(
-                        and_(
-                            *[
-                                text(
-                                    f"""
-                                    EXISTS (
-                                        SELECT 1
-                                        FROM json_array_elements_text(Chat.meta->'tags') AS tag
-                                        WHERE tag = :tag_id_{tag_idx}
-                                    )
-                                    """
-                                ).params(**{f"tag_id_{tag_idx}": tag_id})
-                                for tag_idx, tag_id in enumerate(tag_ids)
-                            ]
-                        )
+                        or_(
+                            Chat.title.ilike(bindparam("title_key")),
+                            postgres_content_clause,
+                        ).params(title_key=f"%{search_text}%", content_key=search_text)
                     )
             else:
                 raise NotImplementedError(
@@ -853,30 +1129,33 @@ class ChatTable:
                 )
 
             # Perform pagination at the SQL level
-            all_chats = query.offset(skip).limit(limit).all()
+            all_chats = self._summaries_from_query(query.offset(skip).limit(limit))
 
             log.info(f"The number of chats: {len(all_chats)}")
 
-            # Validate and return chats
-            return self._models_from_records(all_chats)
+            return all_chats
 
     def get_chats_by_folder_id_and_user_id(
-        self, folder_id: str, user_id: str, skip: int = 0, limit: int = 60
-    ) -> list[ChatModel]:
+        self,
+        folder_id: str,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 60,
+        cursor: Optional[str] = None,
+    ) -> list[ChatSummaryModel]:
         with get_db() as db:
             query = db.query(Chat).filter_by(folder_id=folder_id, user_id=user_id)
             query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
             query = query.filter_by(archived=False)
 
-            query = query.order_by(Chat.updated_at.desc())
+            query = apply_cursor(query, Chat.updated_at, Chat.id, cursor)
 
             if skip:
                 query = query.offset(skip)
             if limit:
                 query = query.limit(limit)
 
-            all_chats = query.all()
-            return self._models_from_records(all_chats)
+            return self._summaries_from_query(query)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -893,6 +1172,29 @@ class ChatTable:
             all_chats = query.all()
             return self._models_from_records(all_chats)
 
+    def get_chats_by_folder_subtree_and_user_id(
+        self, folder_id: str, user_id: str
+    ) -> list[ChatModel]:
+        """Chats in a folder and in all its descendants, in a single query."""
+        folder = Folders.get_folder_by_id_and_user_id(folder_id, user_id)
+        if not folder or not folder.path:
+            return []
+
+        with get_db() as db:
+            query = db.query(Chat).filter(
+                Chat.user_id == user_id,
+                Chat.folder_id.in_(
+                    Folders.get_subtree_folder_ids_query(folder.path, user_id)
+                ),
+            )
+            query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
+            query = query.filter_by(archived=False)
+
+            query = query.order_by(Chat.updated_at.desc())
+
+            all_chats = query.all()
+            return self._models_from_records(all_chats)
+
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
     ) -> Optional[ChatModel]:
@@ -916,34 +1218,21 @@ class ChatTable:
 
     def get_chat_list_by_user_id_and_tag_name(
         self, user_id: str, tag_name: str, skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+    ) -> list[ChatSummaryModel]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
             tag_id = tag_name.replace(" ", "_").lower()
-
-            log.info(f"DB dialect name: {db.bind.dialect.name}")
-            if db.bind.dialect.name == "sqlite":
-                # SQLite JSON1 querying for tags within the meta JSON field
-                query = query.filter(
-                    text(
-                        f"EXISTS (SELECT 1 FROM json_each(Chat.meta, '$.tags') WHERE json_each.value = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-            elif db.bind.dialect.name == "postgresql":
-                # PostgreSQL JSON query for tags within the meta JSON field (for `json` type)
-                query = query.filter(
-                    text(
-                        "EXISTS (SELECT 1 FROM json_array_elements_text(Chat.meta->'tags') elem WHERE elem = :tag_id)"
+            query = db.query(Chat).filter(
+                Chat.user_id == user_id,
+                Chat.id.in_(
+                    select(ChatTag.chat_id).where(
+                        ChatTag.user_id == user_id, ChatTag.tag_id == tag_id
                     )
-                ).params(tag_id=tag_id)
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
-                )
+                ),
+            )
 
-            all_chats = query.all()
+            all_chats = self._summaries_from_query(query)
             log.debug(f"all_chats: {all_chats}")
-            return self._models_from_records(all_chats)
+            return all_chats
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -961,6 +1250,7 @@ class ChatTable:
                         **chat.meta,
                         "tags": list(set(chat.meta.get("tags", []) + [tag_id])),
                     }
+                    Tags.set_chat_tags(db, id, chat.user_id, chat.meta["tags"])
 
                 db.commit()
                 db.refresh(chat)
@@ -969,41 +1259,52 @@ class ChatTable:
             return None
 
     def count_chats_by_tag_name_and_user_id(self, tag_name: str, user_id: str) -> int:
-        with get_db() as db:  # Assuming `get_db()` returns a session object
-            query = db.query(Chat).filter_by(user_id=user_id, archived=False)
-
+        with get_db() as db:
             # Normalize the tag_name for consistency
             tag_id = tag_name.replace(" ", "_").lower()
 
-            if db.bind.dialect.name == "sqlite":
-                # SQLite JSON1 support for querying the tags inside the `meta` JSON field
-                query = query.filter(
-                    text(
-                        f"EXISTS (SELECT 1 FROM json_each(Chat.meta, '$.tags') WHERE json_each.value = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-
-            elif db.bind.dialect.name == "postgresql":
-                # PostgreSQL JSONB support for querying the tags inside the `meta` JSON field
-                query = query.filter(
-                    text(
-                        "EXISTS (SELECT 1 FROM json_array_elements_text(Chat.meta->'tags') elem WHERE elem = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
+            count = (
+                db.query(ChatTag)
+                .join(Chat, Chat.id == ChatTag.chat_id)
+                .filter(
+                    ChatTag.user_id == user_id,
+                    ChatTag.tag_id == tag_id,
+                    Chat.archived == False,
                 )
+                .count()
+            )
 
-            # Get the count of matching records
-            count = query.count()
-
-            # Debugging output for inspection
             log.info(f"Count of chats for tag '{tag_name}': {count}")
 
             return count
 
+    def delete_orphaned_tags_by_user_id(self, user_id: str, tag_names: list[str]):
+        """Delete the tags among `tag_names` that no unarchived chat of the user has."""
+        tag_ids = {tag_name.replace(" ", "_").lower() for tag_name in tag_names}
+        if not tag_ids:
+            return
+
+        with get_db() as db:
+            used_tag_ids = {
+                tag_id
+                for (tag_id,) in db.query(ChatTag.tag_id)
+                .join(Chat, Chat.id == ChatTag.chat_id)
+                .filter(
+                    ChatTag.user_id == user_id,
+                    ChatTag.tag_id.in_(tag_ids),
+                    Chat.archived == False,
+                )
+                .distinct()
+            }
+
+            orphaned_tag_ids = tag_ids - used_tag_ids
+            if orphaned_tag_ids:
+                log.debug(f"deleting tags: {orphaned_tag_ids}")
+                db.query(Tag).filter(
+                    Tag.user_id == user_id, Tag.id.in_(orphaned_tag_ids)
+                ).delete(synchronize_session=False)
+                db.commit()
+
     def count_chats_by_folder_id_and_user_id(self, folder_id: str, user_id: str) -> int:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id)
@@ -1028,6 +1329,7 @@ class ChatTable:
                     **chat.meta,
                     "tags": list(set(tags)),
                 }
+                Tags.set_chat_tags(db, id, chat.user_id, tags)
                 db.commit()
                 return True
         except Exception:
@@ -1041,6 +1343,7 @@ class ChatTable:
                     **chat.meta,
                     "tags": [],
                 }
+                Tags.set_chat_tags(db, id, chat.user_id, [])
                 db.commit()
 
                 return True
@@ -1051,6 +1354,8 @@ class ChatTable:
         try:
             with get_db() as db:
                 db.query(Chat).filter_by(id=id).delete()
+                ChatSearch.delete_by_chat_ids(db, [id])
+                Tags.delete_chat_tags_by_chat_ids(db, [id])
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -1061,6 +1366,8 @@ class ChatTable:
         try:
             with get_db() as db:
                 db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                ChatSearch.delete_by_chat_ids(db, [id])
+                Tags.delete_chat_tags_by_chat_ids(db, [id])
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -1073,6 +1380,8 @@ class ChatTable:
                 self.delete_shared_chats_by_user_id(user_id)
 
                 db.query(Chat).filter_by(user_id=user_id).delete()
+                ChatSearch.delete_by_user_id(db, user_id)
+                db.query(ChatTag).filter_by(user_id=user_id).delete()
                 db.commit()
 
                 return True
@@ -1084,6 +1393,11 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                chat_ids = select(Chat.id).where(
+                    Chat.user_id == user_id, Chat.folder_id == folder_id
+                )
+                ChatSearch.delete_by_chat_ids(db, chat_ids)
+                Tags.delete_chat_tags_by_chat_ids(db, chat_ids)
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
@@ -1091,6 +1405,154 @@ class ChatTable:
         except Exception:
             return False
 
+    def delete_chats_by_user_id_and_folder_ids(
+        self, user_id: str, folder_ids: list[str]
+    ) -> bool:
+        try:
+            with get_db() as db:
+                chat_ids = select(Chat.id).where(
+                    Chat.user_id == user_id, Chat.folder_id.in_(folder_ids)
+                )
+                ChatSearch.delete_by_chat_ids(db, chat_ids)
+                Tags.delete_chat_tags_by_chat_ids(db, chat_ids)
+                db.query(Chat).filter(
+                    Chat.user_id == user_id, Chat.folder_id.in_(folder_ids)
+                ).delete(synchronize_session=False)
+                db.commit()
+
+                return True
+        except Exception:
+            return False
+
+    def bulk_update_chats_by_user_id(
+        self, user_id: str, form_data: ChatBulkForm
+    ) -> Optional[list[str]]:
+        """
+        Apply the operations of `form_data` to the chats of the user, in
+        transactions of BULK_BATCH_SIZE chats with one statement per operation.
+        Only the chat ids and metadata are loaded. Returns the ids of the chats
+        found, tags left without unarchived chats are deleted at the end.
+        """
+        add_tags = {
+            tag_name.replace(" ", "_").lower(): tag_name
+            for tag_name in form_data.add_tags
+        }
+        add_tags.pop("none", None)
+        remove_tag_ids = {
+            tag_name.replace(" ", "_").lower() for tag_name in form_data.remove_tags
+        } - add_tags.keys()
+
+        values = {}
+        if form_data.archived is not None:
+            values["archived"] = form_data.archived
+        if "folder_id" in form_data.model_fields_set:
+            values["folder_id"] = form_data.folder_id
+            values["pinned"] = False
+
+        chat_ids = list(dict.fromkeys(form_data.chat_ids))
+        updated_ids = []
+        orphan_tag_ids = set(remove_tag_ids)
+        try:
+            for i in range(0, len(chat_ids), BULK_BATCH_SIZE):
+                with get_db() as db:
+                    metas = dict(
+                        db.query(Chat.id, Chat.meta).filter(
+                            Chat.user_id == user_id,
+                            Chat.id.in_(chat_ids[i : i + BULK_BATCH_SIZE]),
+                        )
+                    )
+                    if not metas:
+                        continue
+
+                    ids = list(metas)
+                    tag_ids = {
+                        tag_id
+                        for meta in metas.values()
+                        for tag_id in (meta or {}).get("tags", [])
+                    }
+                    if form_data.delete or form_data.archived:
+                        orphan_tag_ids |= tag_ids | add_tags.keys()
+
+                    if form_data.delete:
+                        ChatSearch.delete_by_chat_ids(db, ids)
+                        Tags.delete_chat_tags_by_chat_ids(db, ids)
+                        db.query(Chat).filter(
+                            Chat.user_id.in_([f"shared-{id}" for id in ids])
+                        ).delete(synchronize_session=False)
+                        db.query(Chat).filter(Chat.id.in_(ids)).delete(
+                            synchronize_session=False
+                        )
+                        db.commit()
+                        updated_ids.extend(ids)
+                        continue
+
+                    if values:
+                        db.query(Chat).filter(Chat.id.in_(ids)).update(
+                            {**values, "updated_at": int(time.time())},
+                            synchronize_session=False,
+                        )
+
+                    # Unarchived chats bring back the tags deleted with them
+                    tags = {
+                        **(
+                            {tag_id: tag_id for tag_id in tag_ids}
+                            if form_data.archived is False
+                            else {}
+                        ),
+                        **add_tags,
+                    }
+                    if tags:
+                        existing_tag_ids = {
+                            tag_id
+                            for (tag_id,) in db.query(Tag.id).filter(
+                                Tag.user_id == user_id, Tag.id.in_(tags)
+                            )
+                        }
+                        db.add_all(
+                            Tag(id=tag_id, name=name, user_id=user_id)
+                            for tag_id, name in tags.items()
+                            if tag_id not in existing_tag_ids
+                        )
+
+                    if add_tags or remove_tag_ids:
+                        changed_metas = []
+                        for id, meta in metas.items():
+                            meta = meta or {}
+                            chat_tags = meta.get("tags", [])
+                            new_chat_tags = [
+                                tag_id
+                                for tag_id in chat_tags
+                                if tag_id not in remove_tag_ids
+                                and tag_id not in add_tags
+                            ] + list(add_tags)
+                            if new_chat_tags != chat_tags:
+                                changed_metas.append(
+                                    {"id": id, "meta": {**meta, "tags": new_chat_tags}}
+                                )
+                        if changed_metas:
+                            # Bulk UPDATE by primary key, one executemany
+                            db.execute(update(Chat), changed_metas)
+
+                        db.query(ChatTag).filter(
+                            ChatTag.chat_id.in_(ids),
+                            ChatTag.tag_id.in_(remove_tag_ids | add_tags.keys()),
+                        ).delete(synchronize_session=False)
+                        db.add_all(
+                            ChatTag(chat_id=id, tag_id=tag_id, user_id=user_id)
+                            for id in ids
+                            for tag_id in add_tags
+                        )
+
+                    db.commit()
+                    updated_ids.extend(ids)
+        except Exception as e:
+            log.exception(f"Error updating chats in bulk: {e}")
+            return None
+        finally:
+            self.delete_orphaned_tags_by_user_id(user_id, list(orphan_tag_ids))
+
+        return updated_ids
+
     def delete_shared_chats_by_user_id(self, user_id: str) -> bool:
         try:
             with get_db() as db:
@@ -1106,3 +1568,4 @@ class ChatTable:
 
 
 Chats = ChatTable()
+AsyncChats = AsyncTable(Chats)
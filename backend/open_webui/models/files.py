@@ -2,10 +2,11 @@ import logging
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import AsyncTable, Base, JSONField, get_db
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.pagination import apply_cursor
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, Index
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -32,6 +33,13 @@ class File(Base):
     created_at = Column(BigInteger)
     updated_at = Column(BigInteger)
 
+    __table_args__ = (
+        # ORDER BY updated_at DESC, id DESC
+        Index("file_updated_at_id_idx", "updated_at", "id"),
+        # WHERE user_id = ... ORDER BY updated_at DESC, id DESC
+        Index("file_user_id_updated_at_id_idx", "user_id", "updated_at", "id"),
+    )
+
 
 class FileModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -154,9 +162,17 @@ class FilesTable:
             except Exception:
                 return None
 
-    def get_files(self) -> list[FileModel]:
+    def get_files(
+        self, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> list[FileModel]:
         with get_db() as db:
-            return [FileModel.model_validate(file) for file in db.query(File).all()]
+            query = db.query(File)
+            if limit or cursor:
+                query = apply_cursor(query, File.updated_at, File.id, cursor)
+            if limit:
+                query = query.limit(limit)
+
+            return [FileModel.model_validate(file) for file in query.all()]
 
     def check_access_by_user_id(self, id, user_id, permission="write") -> bool:
         file = self.get_file_by_id(id)
@@ -192,12 +208,17 @@ class FilesTable:
                 .all()
             ]
 
-    def get_files_by_user_id(self, user_id: str) -> list[FileModel]:
+    def get_files_by_user_id(
+        self, user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> list[FileModel]:
         with get_db() as db:
-            return [
-                FileModel.model_validate(file)
-                for file in db.query(File).filter_by(user_id=user_id).all()
-            ]
+            query = db.query(File).filter_by(user_id=user_id)
+            if limit or cursor:
+                query = apply_cursor(query, File.updated_at, File.id, cursor)
+            if limit:
+                query = query.limit(limit)
+
+            return [FileModel.model_validate(file) for file in query.all()]
 
     def update_file_hash_by_id(self, id: str, hash: str) -> Optional[FileModel]:
         with get_db() as db:
@@ -253,3 +274,4 @@ class FilesTable:
 
 
 Files = FilesTable()
+AsyncFiles = AsyncTable(Files)
@@ -6,7 +6,8 @@ import re
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, Text, JSON, Boolean, func
+from sqlalchemy import BigInteger, Column, Text, JSON, Boolean, Index, func, literal
+from sqlalchemy import select
 
 from open_webui.internal.db import Base, get_db
 from open_webui.env import SRC_LOG_LEVELS
@@ -34,10 +35,28 @@ class Folder(Base):
     created_at = Column(BigInteger)
     updated_at = Column(BigInteger)
 
+    # Materialized path of the folder ids from the root, e.g. "/<root id>/<id>/"
+    path = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # WHERE user_id = ... AND path LIKE '<path>%'
+        Index(
+            "folder_user_id_path_idx",
+            "user_id",
+            "path",
+            postgresql_ops={"path": "text_pattern_ops"},
+        ),
+    )
+
+
+def get_folder_path(parent_path: Optional[str], id: str) -> str:
+    return f"{parent_path or '/'}{id}/"
+
 
 class FolderModel(BaseModel):
     id: str
     parent_id: Optional[str] = None
+    path: Optional[str] = None
     user_id: str
     name: str
     items: Optional[dict] = None
@@ -89,12 +108,20 @@ class FolderTable:
     ) -> Optional[FolderModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
+
+            parent_path = None
+            if parent_id:
+                parent_path = db.scalar(
+                    select(Folder.path).filter_by(id=parent_id, user_id=user_id)
+                )
+
             folder = FolderModel(
                 **{
                     "id": id,
                     "user_id": user_id,
                     **(form_data.model_dump(exclude_unset=True) or {}),
                     "parent_id": parent_id,
+                    "path": get_folder_path(parent_path, id),
                     "created_at": int(time.time()),
                     "updated_at": int(time.time()),
                 }
@@ -126,27 +153,32 @@ class FolderTable:
         except Exception:
             return None
 
+    def get_subtree_folder_ids_query(self, path: str, user_id: str):
+        """Select the ids of the folder with this path and of all its descendants."""
+        return select(Folder.id).where(
+            Folder.user_id == user_id, Folder.path.startswith(path, autoescape=True)
+        )
+
     def get_children_folders_by_id_and_user_id(
         self, id: str, user_id: str
     ) -> Optional[list[FolderModel]]:
         try:
             with get_db() as db:
-                folders = []
-
-                def get_children(folder):
-                    children = self.get_folders_by_parent_id_and_user_id(
-                        folder.id, user_id
-                    )
-                    for child in children:
-                        get_children(child)
-                        folders.append(child)
-
                 folder = db.query(Folder).filter_by(id=id, user_id=user_id).first()
                 if not folder:
                     return None
 
-                get_children(folder)
-                return folders
+                return [
+                    FolderModel.model_validate(child)
+                    for child in db.query(Folder)
+                    .filter(
+                        Folder.user_id == user_id,
+                        Folder.path.startswith(folder.path, autoescape=True),
+                        Folder.id != id,
+                    )
+                    .order_by(Folder.path)
+                    .all()
+                ]
         except Exception:
             return None
 
@@ -202,7 +234,32 @@ class FolderTable:
                 if not folder:
                     return None
 
+                parent_path = None
+                if parent_id:
+                    parent_path = db.scalar(
+                        select(Folder.path).filter_by(id=parent_id, user_id=user_id)
+                    )
+                    # A folder can't be moved into itself or its descendants
+                    if parent_path and parent_path.startswith(folder.path):
+                        return None
+
+                old_path = folder.path
+                new_path = get_folder_path(parent_path, id)
+
+                # Re-root the paths of the whole subtree in a single update
+                db.query(Folder).filter(
+                    Folder.user_id == user_id,
+                    Folder.path.startswith(old_path, autoescape=True),
+                ).update(
+                    {
+                        Folder.path: literal(new_path, Text)
+                        + func.substr(Folder.path, len(old_path) + 1)
+                    },
+                    synchronize_session=False,
+                )
+
                 folder.parent_id = parent_id
+                folder.path = new_path
                 folder.updated_at = int(time.time())
 
                 db.commit()
@@ -286,24 +343,20 @@ class FolderTable:
                 if not folder:
                     return folder_ids
 
-                folder_ids.append(folder.id)
-
-                # Delete all children folders
-                def delete_children(folder):
-                    folder_children = self.get_folders_by_parent_id_and_user_id(
-                        folder.id, user_id
-                    )
-                    for folder_child in folder_children:
-
-                        delete_children(folder_child)
-                        folder_ids.append(folder_child.id)
+                # The folder and all its descendants
+                subtree = db.query(Folder).filter(
+                    Folder.user_id == user_id,
+                    Folder.path.startswith(folder.path, autoescape=True),
+                )
 
-                        folder = db.query(Folder).filter_by(id=folder_child.id).first()
-                        db.delete(folder)
-                        db.commit()
+                folder_ids.append(folder.id)
+                folder_ids.extend(
+                    folder_id
+                    for (folder_id,) in subtree.with_entities(Folder.id)
+                    if folder_id != folder.id
+                )
 
-                delete_children(folder)
-                db.delete(folder)
+                subtree.delete(synchronize_session=False)
                 db.commit()
                 return folder_ids
         except Exception as e:
@@ -4,7 +4,7 @@ import time
 from typing import Optional
 import uuid
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import AsyncTable, Base, get_db
 from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
@@ -13,9 +13,10 @@ from open_webui.models.users import Users, UserResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, Index
 
 from open_webui.utils.access_control import has_access
+from open_webui.utils.pagination import apply_cursor, encode_cursor
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -57,6 +58,11 @@ class Knowledge(Base):
     created_at = Column(BigInteger)
     updated_at = Column(BigInteger)
 
+    __table_args__ = (
+        # ORDER BY updated_at DESC, id DESC
+        Index("knowledge_updated_at_id_idx", "updated_at", "id"),
+    )
+
 
 class KnowledgeModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -127,11 +133,16 @@ class KnowledgeTable:
             except Exception:
                 return None
 
-    def get_knowledge_bases(self) -> list[KnowledgeUserModel]:
+    def get_knowledge_bases(
+        self, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> list[KnowledgeUserModel]:
         with get_db() as db:
-            all_knowledge = (
-                db.query(Knowledge).order_by(Knowledge.updated_at.desc()).all()
+            query = apply_cursor(
+                db.query(Knowledge), Knowledge.updated_at, Knowledge.id, cursor
             )
+            if limit:
+                query = query.limit(limit)
+            all_knowledge = query.all()
 
             user_ids = list(set(knowledge.user_id for knowledge in all_knowledge))
 
@@ -161,18 +172,33 @@ class KnowledgeTable:
         return has_access(user_id, permission, knowledge.access_control, user_group_ids)
 
     def get_knowledge_bases_by_user_id(
-        self, user_id: str, permission: str = "write"
+        self,
+        user_id: str,
+        permission: str = "write",
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> list[KnowledgeUserModel]:
-        knowledge_bases = self.get_knowledge_bases()
         user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user_id)}
-        return [
-            knowledge_base
-            for knowledge_base in knowledge_bases
-            if knowledge_base.user_id == user_id
-            or has_access(
-                user_id, permission, knowledge_base.access_control, user_group_ids
+
+        # Access is checked in Python, so fetch pages until enough are accessible
+        results = []
+        while True:
+            knowledge_bases = self.get_knowledge_bases(limit=limit, cursor=cursor)
+            results.extend(
+                knowledge_base
+                for knowledge_base in knowledge_bases
+                if knowledge_base.user_id == user_id
+                or has_access(
+                    user_id, permission, knowledge_base.access_control, user_group_ids
+                )
+            )
+
+            if not limit or len(knowledge_bases) < limit or len(results) >= limit:
+                return results[:limit] if limit else results
+
+            cursor = encode_cursor(
+                knowledge_bases[-1].updated_at, knowledge_bases[-1].id
             )
-        ]
 
     def get_knowledge_by_id(self, id: str) -> Optional[KnowledgeModel]:
         try:
@@ -239,3 +265,4 @@ class KnowledgeTable:
 
 
 Knowledges = KnowledgeTable()
+AsyncKnowledges = AsyncTable(Knowledges)
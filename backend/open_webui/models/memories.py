@@ -2,7 +2,7 @@ import time
 import uuid
 from typing import Optional
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import AsyncTable, Base, get_db
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text
 
@@ -145,3 +145,4 @@ class MemoriesTable:
 
 
 Memories = MemoriesTable()
+AsyncMemories = AsyncTable(Memories)
@@ -2,7 +2,7 @@ import logging
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import AsyncTable, Base, JSONField, get_db
 from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.groups import Groups
@@ -324,3 +324,4 @@ class ModelsTable:
 
 
 Models = ModelsTable()
+AsyncModels = AsyncTable(Models)
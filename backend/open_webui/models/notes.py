@@ -4,14 +4,15 @@ import uuid
 from typing import Optional
 from functools import lru_cache
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import AsyncTable, Base, get_db
 from open_webui.models.groups import Groups
 from open_webui.utils.access_control import has_access
 from open_webui.models.users import Users, UserResponse
+from open_webui.utils.pagination import apply_cursor
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON, Index
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 
@@ -35,6 +36,13 @@ class Note(Base):
     created_at = Column(BigInteger)
     updated_at = Column(BigInteger)
 
+    __table_args__ = (
+        # ORDER BY updated_at DESC, id DESC
+        Index("note_updated_at_id_idx", "updated_at", "id"),
+        # WHERE user_id = ... ORDER BY updated_at DESC, id DESC
+        Index("note_user_id_updated_at_id_idx", "user_id", "updated_at", "id"),
+    )
+
 
 class NoteModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -99,10 +107,13 @@ class NoteTable:
             return note
 
     def get_notes(
-        self, skip: Optional[int] = None, limit: Optional[int] = None
+        self,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> list[NoteModel]:
         with get_db() as db:
-            query = db.query(Note).order_by(Note.updated_at.desc())
+            query = apply_cursor(db.query(Note), Note.updated_at, Note.id, cursor)
             if skip is not None:
                 query = query.offset(skip)
             if limit is not None:
@@ -115,10 +126,11 @@ class NoteTable:
         user_id: str,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> list[NoteModel]:
         with get_db() as db:
             query = db.query(Note).filter(Note.user_id == user_id)
-            query = query.order_by(Note.updated_at.desc())
+            query = apply_cursor(query, Note.updated_at, Note.id, cursor)
 
             if skip is not None:
                 query = query.offset(skip)
@@ -134,15 +146,16 @@ class NoteTable:
         permission: str = "write",
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> list[NoteModel]:
         with get_db() as db:
             user_groups = Groups.get_groups_by_member_id(user_id)
             user_group_ids = {group.id for group in user_groups}
 
-            # Order newest-first. We stream to keep memory usage low.
+            # Order newest-first, after the cursor if any.
+            # We stream to keep memory usage low.
             query = (
-                db.query(Note)
-                .order_by(Note.updated_at.desc())
+                apply_cursor(db.query(Note), Note.updated_at, Note.id, cursor)
                 .execution_options(stream_results=True)
                 .yield_per(256)
             )
@@ -216,3 +229,4 @@ class NoteTable:
 
 
 Notes = NoteTable()
+AsyncNotes = AsyncTable(Notes)
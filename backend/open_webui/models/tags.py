@@ -33,6 +33,20 @@ class Tag(Base):
     __table_args__ = (PrimaryKeyConstraint("id", "user_id", name="pk_id_user_id"),)
 
 
+class ChatTag(Base):
+    """Tags of each chat (mirrors `chat.meta["tags"]`) for indexed tag lookups."""
+
+    __tablename__ = "chat_tag"
+    chat_id = Column(String, primary_key=True)
+    tag_id = Column(String, primary_key=True)
+    user_id = Column(String)
+
+    __table_args__ = (
+        # WHERE user_id = ... AND tag_id = ...
+        Index("chat_tag_user_id_tag_id_idx", "user_id", "tag_id"),
+    )
+
+
 class TagModel(BaseModel):
     id: str
     name: str
@@ -98,6 +112,20 @@ class TagTable:
                 )
             ]
 
+    def set_chat_tags(self, db, chat_id: str, user_id: str, tag_ids: list[str]):
+        """Replace the tags of a chat within the caller's transaction."""
+        db.query(ChatTag).filter_by(chat_id=chat_id).delete(synchronize_session=False)
+        db.add_all(
+            ChatTag(chat_id=chat_id, tag_id=tag_id, user_id=user_id)
+            for tag_id in set(tag_ids)
+        )
+
+    def delete_chat_tags_by_chat_ids(self, db, chat_ids):
+        """`chat_ids` may be a list or a select of chat ids."""
+        db.query(ChatTag).filter(ChatTag.chat_id.in_(chat_ids)).delete(
+            synchronize_session=False
+        )
+
     def delete_tag_by_name_and_user_id(self, name: str, user_id: str) -> bool:
         try:
             with get_db() as db:
@@ -1,11 +1,18 @@
 import os
 import time
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import AsyncTable, Base, JSONField, get_db
 
 
-from open_webui.env import DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL
+from open_webui.env import (
+    DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
+)
 from open_webui.models.chats import Chats
 from open_webui.models.groups import Groups
 from open_webui.utils.misc import throttle
@@ -151,6 +158,122 @@ class UserUpdateForm(BaseModel):
     password: Optional[str] = None
 
 
+####################
+# User Cache
+####################
+
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class UserCache:
+    """
+    Short-lived, size-bounded cache of authenticated users, keyed by user id
+    and by API key hash. Entries are dropped after any user write in this
+    worker commits and expire after `ttl` seconds everywhere else. Users read
+    before an invalidation (`generation` older than the current one) are not
+    cached, so a read racing a write can't cache the stale row.
+    """
+
+    def __init__(self, ttl: float = USER_CACHE_TTL, maxsize: int = USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+        self._users: OrderedDict[str, tuple[float, "UserModel"]] = OrderedDict()
+        self._user_ids_by_api_key: dict[str, str] = {}
+        self._api_keys_by_user_id: dict[str, str] = {}
+        self._last_active_updates: dict[str, float] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, id: str) -> Optional["UserModel"]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._users.get(id)
+            if entry is None:
+                return None
+
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                self._remove(id)
+                return None
+
+            self._users.move_to_end(id)
+            return user.model_copy()
+
+    def get_by_api_key(self, api_key: str) -> Optional["UserModel"]:
+        user_id = self._user_ids_by_api_key.get(hash_api_key(api_key))
+        return self.get(user_id) if user_id else None
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def set(
+        self,
+        user: "UserModel",
+        api_key: Optional[str] = None,
+        generation: Optional[int] = None,
+    ):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+
+            self._remove(user.id)
+            self._users[user.id] = (time.monotonic() + self.ttl, user.model_copy())
+            if api_key:
+                key_hash = hash_api_key(api_key)
+                self._user_ids_by_api_key[key_hash] = user.id
+                self._api_keys_by_user_id[user.id] = key_hash
+
+            while len(self._users) > self.maxsize:
+                self._remove(next(iter(self._users)))
+
+    def invalidate(self, id: str):
+        with self._lock:
+            self._generation += 1
+            self._remove(id)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+            self._user_ids_by_api_key.clear()
+            self._api_keys_by_user_id.clear()
+
+    def should_update_last_active(self, id: str) -> bool:
+        # Only write last_active_at once per TTL window for cached users
+        if not self.enabled:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_active_updates.get(id, float("-inf")) < self.ttl:
+                return False
+            self._last_active_updates[id] = now
+            if len(self._last_active_updates) > self.maxsize:
+                self._last_active_updates.pop(next(iter(self._last_active_updates)))
+            return True
+
+    def _remove(self, id: str):
+        self._users.pop(id, None)
+        key_hash = self._api_keys_by_user_id.pop(id, None)
+        if key_hash:
+            self._user_ids_by_api_key.pop(key_hash, None)
+
+
+USER_CACHE = UserCache()
+
+
 class UsersTable:
     DEFAULT_USER_EMAIL = os.environ.get("DEFAULT_USER_EMAIL", "admin@localhost")
     DEFAULT_USER_NAME = os.environ.get("DEFAULT_USER_NAME", "Local Admin")
@@ -228,6 +351,24 @@ class UsersTable:
         except Exception:
             return None
 
+    def get_cached_user_by_id(self, id: str) -> Optional[UserModel]:
+        user = USER_CACHE.get(id)
+        if user is None:
+            generation = USER_CACHE.generation
+            user = self.get_user_by_id(id)
+            if user:
+                USER_CACHE.set(user, generation=generation)
+        return user
+
+    def get_cached_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        user = USER_CACHE.get_by_api_key(api_key)
+        if user is None:
+            generation = USER_CACHE.generation
+            user = self.get_user_by_api_key(api_key)
+            if user:
+                USER_CACHE.set(user, api_key=api_key, generation=generation)
+        return user
+
     def get_user_by_email(self, email: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -300,6 +441,8 @@ class UsersTable:
                 return UserModel.model_validate(user)
         except Exception:
             return None
+        finally:
+            USER_CACHE.invalidate(id)
 
     def update_user_profile_image_url_by_id(
         self, id: str, profile_image_url: str
@@ -315,6 +458,8 @@ class UsersTable:
                 return UserModel.model_validate(user)
         except Exception:
             return None
+        finally:
+            USER_CACHE.invalidate(id)
 
     @throttle(DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL)
     def update_user_last_active_by_id(self, id: str) -> Optional[UserModel]:
@@ -342,6 +487,8 @@ class UsersTable:
                 return UserModel.model_validate(user)
         except Exception:
             return None
+        finally:
+            USER_CACHE.invalidate(id)
 
     def update_user_by_id(self, id: str, updated: dict) -> Optional[UserModel]:
         try:
@@ -355,6 +502,8 @@ class UsersTable:
         except Exception as e:
             print(e)
             return None
+        finally:
+            USER_CACHE.invalidate(id)
 
     def update_user_settings_by_id(self, id: str, updated: dict) -> Optional[UserModel]:
         try:
@@ -373,6 +522,8 @@ class UsersTable:
                 return UserModel.model_validate(user)
         except Exception:
             return None
+        finally:
+            USER_CACHE.invalidate(id)
 
     def delete_user_by_id(self, id: str) -> bool:
         default_user = self.get_or_create_default_user()
@@ -396,6 +547,8 @@ class UsersTable:
                 return False
         except Exception:
             return False
+        finally:
+            USER_CACHE.invalidate(id)
 
     def update_user_api_key_by_id(self, id: str, api_key: str) -> bool:
         try:
@@ -405,6 +558,8 @@ class UsersTable:
                 return True if result == 1 else False
         except Exception:
             return False
+        finally:
+            USER_CACHE.invalidate(id)
 
     def get_user_api_key_by_id(self, id: str) -> Optional[str]:
         try:
@@ -423,3 +578,4 @@ class UsersTable:
 
 
 Users = UsersTable()
+AsyncUsers = AsyncTable(Users)
@@ -0,0 +1,398 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import Optional
+
+from open_webui.env import (
+    RAG_EMBEDDING_WORKER_BATCH_SIZE,
+    RAG_EMBEDDING_WORKER_BATCH_WAIT,
+    RAG_RERANKING_BATCH_SIZE,
+    RAG_RERANKING_BATCH_WAIT,
+    RAG_RERANKING_CACHE_SIZE,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Seconds without requests after which a worker thread exits, it's started
+# again by the next request
+WORKER_IDLE_TIMEOUT = 60
+
+# Priority lanes of the embedding worker, the first non empty lane is served
+# first: query embeddings of interactive requests before bulk ingestion
+EMBEDDING_LANES = ["query", "bulk"]
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ScoreCache:
+    """LRU cache of reranking scores keyed by (model, query hash, document hash)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[float]:
+        with self._lock:
+            score = self._scores.get(key)
+            if score is not None:
+                self._scores.move_to_end(key)
+            return score
+
+    def set(self, key: tuple, score: float):
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.maxsize:
+                self._scores.popitem(last=False)
+
+
+class RerankerService:
+    """
+    Scores the (query, document) pairs of concurrent reranking requests
+    together on a worker thread. The worker waits up to `batch_wait` seconds
+    for more requests, then scores the pairs in batches of up to `batch_size`
+    pairs of similar length, so little padding is computed, and fans the
+    scores back out to the requests.
+
+    `model` is a CrossEncoder or a reranker with a `predict(pairs)` method.
+    Models whose scores depend on the other documents of a request (ColBERT)
+    provide `score_pairs(pairs)` for unnormalized scores and
+    `normalize_scores(scores)`, applied to the scores of each request.
+    """
+
+    def __init__(
+        self,
+        model,
+        name: str,
+        batch_size: int = RAG_RERANKING_BATCH_SIZE,
+        batch_wait: float = RAG_RERANKING_BATCH_WAIT,
+        cache_size: int = RAG_RERANKING_CACHE_SIZE,
+    ):
+        self.model = model
+        self.name = name
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.cache = ScoreCache(cache_size) if cache_size else None
+
+        self._queue = Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def predict(self, sentences, user=None) -> list[float]:
+        return self.submit(sentences).result()
+
+    async def apredict(self, sentences, user=None) -> list[float]:
+        return await asyncio.wrap_future(self.submit(sentences))
+
+    def submit(self, sentences) -> Future:
+        future = Future()
+        pairs = [(query, doc) for query, doc in sentences]
+        keys = [(self.name, hash_text(query), hash_text(doc)) for query, doc in pairs]
+        scores = [self.cache.get(key) if self.cache else None for key in keys]
+
+        if all(score is not None for score in scores):
+            future.set_result(self._normalize(scores))
+            return future
+
+        self._queue.put((pairs, keys, scores, future))
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name=f"reranker-{self.name}", daemon=True
+                )
+                self._worker.start()
+        return future
+
+    def _run(self):
+        while True:
+            try:
+                requests = [self._queue.get(timeout=WORKER_IDLE_TIMEOUT)]
+            except Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._worker = None
+                        return
+                continue
+
+            # Let concurrent requests join the batch
+            size = len(requests[0][0])
+            deadline = time.monotonic() + self.batch_wait
+            while size < self.batch_size:
+                try:
+                    request = self._queue.get(
+                        timeout=max(deadline - time.monotonic(), 0)
+                    )
+                except Empty:
+                    break
+                requests.append(request)
+                size += len(request[0])
+
+            self._process(requests)
+
+    def _process(self, requests: list):
+        pairs_by_key = {}
+        for pairs, keys, scores, _ in requests:
+            for pair, key, score in zip(pairs, keys, scores):
+                if score is None:
+                    pairs_by_key.setdefault(key, pair)
+
+        try:
+            computed = self._score(pairs_by_key)
+        except Exception as e:
+            log.exception(f"Reranking with {self.name} failed: {e}")
+            for *_, future in requests:
+                future.set_exception(e)
+            return
+
+        for _, keys, scores, future in requests:
+            try:
+                future.set_result(
+                    self._normalize(
+                        [
+                            computed[key] if score is None else score
+                            for key, score in zip(keys, scores)
+                        ]
+                    )
+                )
+            except Exception as e:
+                future.set_exception(e)
+
+    def _score(self, pairs_by_key: dict) -> dict:
+        # Sort the pairs by length so each batch is padded to similar lengths
+        items = sorted(
+            pairs_by_key.items(), key=lambda item: len(item[1][0]) + len(item[1][1])
+        )
+
+        computed = {}
+        for i in range(0, len(items), self.batch_size):
+            batch = items[i : i + self.batch_size]
+            pairs = [pair for _, pair in batch]
+
+            if hasattr(self.model, "score_pairs"):
+                scores = self.model.score_pairs(pairs, bsize=self.batch_size)
+            else:
+                scores = self.model.predict(pairs)
+
+            for (key, _), score in zip(batch, scores):
+                computed[key] = float(score)
+                if self.cache:
+                    self.cache.set(key, float(score))
+        return computed
+
+    def _normalize(self, scores: list[float]) -> list[float]:
+        if hasattr(self.model, "normalize_scores"):
+            return [float(score) for score in self.model.normalize_scores(scores)]
+        return scores
+
+
+####################
+# Embeddings
+####################
+
+
+class EmbeddingRequest:
+    def __init__(self, texts: list[str], prefix: Optional[str], lane: str):
+        self.texts = texts
+        self.prefix = prefix
+        self.lane = lane
+        self.future = Future()
+        self.embeddings = [None] * len(texts)
+        self.remaining = len(texts)
+
+
+class EmbeddingService:
+    """
+    Encodes the texts of concurrent embedding requests together on a single
+    worker thread, so they share forward passes and torch threads. The worker
+    waits up to `batch_wait` seconds for more texts, then encodes batches of
+    up to `batch_size` texts with the same prefix, taken from the first non
+    empty lane of EMBEDDING_LANES. Requests are split into batches of texts
+    of similar length, so a query waits for at most one batch of a bulk
+    ingestion.
+    """
+
+    def __init__(
+        self,
+        model,
+        batch_size: int = RAG_EMBEDDING_WORKER_BATCH_SIZE,
+        batch_wait: float = RAG_EMBEDDING_WORKER_BATCH_WAIT,
+    ):
+        self.model = model
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+
+        # Jobs of (request, indices of the texts to encode)
+        self._lanes = {lane: deque() for lane in EMBEDDING_LANES}
+        self._queued = {lane: 0 for lane in EMBEDDING_LANES}
+        self._requests = {lane: 0 for lane in EMBEDDING_LANES}
+        self._batches = 0
+        self._encoded = 0
+
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def encode(
+        self, texts: list[str], prefix: Optional[str] = None, lane: str = "query"
+    ) -> list[list[float]]:
+        return self.submit(texts, prefix, lane).result()
+
+    async def aencode(
+        self, texts: list[str], prefix: Optional[str] = None, lane: str = "query"
+    ) -> list[list[float]]:
+        return await asyncio.wrap_future(self.submit(texts, prefix, lane))
+
+    def submit(
+        self, texts: list[str], prefix: Optional[str] = None, lane: str = "query"
+    ) -> Future:
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown embedding lane: {lane}")
+
+        request = EmbeddingRequest(list(texts), prefix, lane)
+        if not request.texts:
+            request.future.set_result([])
+            return request.future
+
+        indices = sorted(range(len(request.texts)), key=lambda i: len(request.texts[i]))
+        with self._condition:
+            for i in range(0, len(indices), self.batch_size):
+                self._lanes[lane].append((request, indices[i : i + self.batch_size]))
+            self._queued[lane] += len(indices)
+            self._requests[lane] += 1
+
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-worker", daemon=True
+                )
+                self._worker.start()
+            self._condition.notify()
+        return request.future
+
+    def get_metrics(self) -> dict:
+        with self._condition:
+            return {
+                "lanes": {
+                    lane: {
+                        "requests": self._requests[lane],
+                        "queued": self._queued[lane],
+                    }
+                    for lane in EMBEDDING_LANES
+                },
+                "batches": self._batches,
+                "encoded": self._encoded,
+            }
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._condition.wait_for(
+                    lambda: any(self._queued.values()), timeout=WORKER_IDLE_TIMEOUT
+                ):
+                    self._worker = None
+                    return
+
+                # Let concurrent requests join the batch
+                deadline = time.monotonic() + self.batch_wait
+                while (
+                    sum(self._queued.values()) < self.batch_size
+                    and time.monotonic() < deadline
+                ):
+                    self._condition.wait(deadline - time.monotonic())
+
+                lane, jobs = self._take_batch()
+
+            self._encode(lane, jobs)
+
+    def _take_batch(self) -> tuple[str, list]:
+        lane = next(lane for lane in EMBEDDING_LANES if self._lanes[lane])
+        prefix = self._lanes[lane][0][0].prefix
+
+        jobs, remaining, size = [], deque(), 0
+        for request, indices in self._lanes[lane]:
+            if request.prefix == prefix and size + len(indices) <= self.batch_size:
+                jobs.append((request, indices))
+                size += len(indices)
+            else:
+                remaining.append((request, indices))
+        self._lanes[lane] = remaining
+        self._queued[lane] -= size
+        return lane, jobs
+
+    def _encode(self, lane: str, jobs: list):
+        texts = [request.texts[i] for request, indices in jobs for i in indices]
+        prefix = jobs[0][0].prefix
+        try:
+            embeddings = self.model.encode(
+                texts,
+                batch_size=self.batch_size,
+                **({"prompt": prefix} if prefix else {}),
+            )
+        except Exception as e:
+            log.exception(f"Embedding {len(texts)} texts failed: {e}")
+            self._fail({request for request, _ in jobs}, e)
+            return
+
+        done = []
+        position = 0
+        for request, indices in jobs:
+            for i in indices:
+                request.embeddings[i] = embeddings[position].tolist()
+                position += 1
+            request.remaining -= len(indices)
+            if request.remaining == 0:
+                done.append(request)
+
+        with self._condition:
+            self._batches += 1
+            self._encoded += len(texts)
+            for request in done:
+                self._requests[request.lane] -= 1
+        for request in done:
+            request.future.set_result(request.embeddings)
+
+        log.debug(
+            f"Embedded a batch of {len(texts)} {lane} texts, "
+            f"queued: {self.get_metrics()['lanes']}"
+        )
+
+    def _fail(self, requests: set, e: Exception):
+        with self._condition:
+            # Drop the texts of the failed requests left in the lanes
+            for lane, jobs in self._lanes.items():
+                remaining = deque()
+                for request, indices in jobs:
+                    if request in requests:
+                        self._queued[lane] -= len(indices)
+                    else:
+                        remaining.append((request, indices))
+                self._lanes[lane] = remaining
+            for request in requests:
+                self._requests[request.lane] -= 1
+
+        for request in requests:
+            request.future.set_exception(e)
+
+
+_embedding_service = None
+_embedding_service_lock = threading.Lock()
+
+
+def get_embedding_service(model) -> EmbeddingService:
+    """
+    Embedding service of `model`, shared by every embedding function of the
+    model so their requests are batched together.
+    """
+    global _embedding_service
+    with _embedding_service_lock:
+        if _embedding_service is None or _embedding_service.model is not model:
+            _embedding_service = EmbeddingService(model)
+        return _embedding_service
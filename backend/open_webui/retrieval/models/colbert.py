@@ -38,6 +38,12 @@ class ColBERT(BaseReranker):
         pass
 
     def calculate_similarity_scores(self, query_embeddings, document_embeddings):
+        final_scores = self.calculate_maxsim_scores(
+            query_embeddings, document_embeddings
+        )
+        return self.normalize_scores(final_scores)
+
+    def calculate_maxsim_scores(self, query_embeddings, document_embeddings):
 
         query_embeddings = query_embeddings.to(self.device)
         document_embeddings = document_embeddings.to(self.device)
@@ -64,26 +70,49 @@ class ColBERT(BaseReranker):
         maximum_scores = torch.max(computed_scores, dim=1).values
 
         # Sum up the maximum scores across features to get the overall document relevance scores
-        final_scores = maximum_scores.sum(dim=1)
+        return maximum_scores.sum(dim=1)
 
-        normalized_scores = torch.softmax(final_scores, dim=0)
+    def normalize_scores(self, scores):
+        scores = torch.as_tensor(scores, dtype=torch.float32)
+        normalized_scores = torch.softmax(scores, dim=0)
 
         return normalized_scores.detach().cpu().numpy().astype(np.float32)
 
-    def predict(self, sentences):
-
-        query = sentences[0][0]
-        docs = [i[1] for i in sentences]
+    def score_pairs(self, sentences, bsize: int = 32):
+        """
+        Unnormalized scores of (query, document) pairs, which may be for
+        different queries. Each distinct query and document is embedded once,
+        the documents in batches of `bsize` sorted by length.
+        """
+        queries = list(dict.fromkeys(query for query, _ in sentences))
+        docs = list(dict.fromkeys(doc for _, doc in sentences))
 
         # Embedding the documents
-        embedded_docs = self.ckpt.docFromText(docs, bsize=32)[0]
+        embedded_docs = self.ckpt.docFromText(docs, bsize=bsize)[0]
         # Embedding the queries
-        embedded_queries = self.ckpt.queryFromText([query], bsize=32)
-        embedded_query = embedded_queries[0]
-
-        # Calculate retrieval scores for the query against all documents
-        scores = self.calculate_similarity_scores(
-            embedded_query.unsqueeze(0), embedded_docs
-        )
+        embedded_queries = self.ckpt.queryFromText(queries, bsize=bsize)
+
+        query_indexes = {query: idx for idx, query in enumerate(queries)}
+        doc_indexes = {doc: idx for idx, doc in enumerate(docs)}
+
+        scores = np.zeros(len(sentences), dtype=np.float32)
+        for query, query_idx in query_indexes.items():
+            positions = [
+                position
+                for position, (pair_query, _) in enumerate(sentences)
+                if pair_query == query
+            ]
+            query_docs = embedded_docs[
+                [doc_indexes[sentences[position][1]] for position in positions]
+            ]
+            # Calculate retrieval scores for the query against its documents
+            query_scores = self.calculate_maxsim_scores(
+                embedded_queries[query_idx].unsqueeze(0), query_docs
+            )
+            scores[positions] = query_scores.detach().cpu().numpy()
 
         return scores
+
+    def predict(self, sentences):
+        # Scores are normalized over the documents of the (single) query
+        return self.normalize_scores(self.score_pairs(sentences))
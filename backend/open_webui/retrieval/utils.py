@@ -23,15 +23,18 @@ from open_webui.models.knowledge import Knowledges
 from open_webui.models.chats import Chats
 from open_webui.models.notes import Notes
 
+from open_webui.retrieval.batching import RerankerService, get_embedding_service
 from open_webui.retrieval.vector.main import GetResult
 from open_webui.utils.access_control import has_access
-from open_webui.utils.misc import get_message_list
+from open_webui.utils.misc import MESSAGE_LIST_CACHE
 
 
 from open_webui.env import (
     SRC_LOG_LEVELS,
     OFFLINE_MODE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
+    ENABLE_RAG_EMBEDDING_BATCHING,
+    ENABLE_RAG_RERANKING_BATCHING,
 )
 from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
@@ -421,10 +424,24 @@ def get_embedding_function(
     embedding_batch_size,
     azure_api_version=None,
 ):
-    if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
-            query, **({"prompt": prefix} if prefix else {})
-        ).tolist()
+    if embedding_engine == "" and ENABLE_RAG_EMBEDDING_BATCHING:
+        service = get_embedding_service(embedding_function)
+
+        def encode(query, prefix, lane):
+            if isinstance(query, str):
+                return service.encode([query], prefix, lane)[0]
+            return service.encode(query, prefix, lane)
+
+        # Interactive queries are embedded before bulk ingestion (lane="bulk")
+        return lambda query, prefix=None, user=None, lane="query": encode(
+            query, prefix, lane
+        )
+    elif embedding_engine == "":
+        return lambda query, prefix=None, user=None, lane="query": (
+            embedding_function.encode(
+                query, **({"prompt": prefix} if prefix else {})
+            ).tolist()
+        )
     elif embedding_engine in ["ollama", "openai", "azure_openai"]:
         func = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
@@ -453,7 +470,7 @@ def get_embedding_function(
             else:
                 return func(query, prefix, user)
 
-        return lambda query, prefix=None, user=None: generate_multiple(
+        return lambda query, prefix=None, user=None, lane="query": generate_multiple(
             query, prefix, user, func
         )
     else:
@@ -467,6 +484,9 @@ def get_reranking_function(reranking_engine, reranking_model, reranking_function
         return lambda sentences, user=None: reranking_function.predict(
             sentences, user=user
         )
+    elif ENABLE_RAG_RERANKING_BATCHING:
+        service = RerankerService(reranking_function, reranking_model)
+        return lambda sentences, user=None: service.predict(sentences)
     else:
         return lambda sentences, user=None: reranking_function.predict(sentences)
 
@@ -557,7 +577,9 @@ def get_sources_from_items(
 
                 if messages_map and message_id:
                     # Reconstruct the message list in order
-                    message_list = get_message_list(messages_map, message_id)
+                    message_list = MESSAGE_LIST_CACHE.get_message_list(
+                        chat.id, messages_map, message_id
+                    )
                     message_history = "\n".join(
                         [
                             f"#### {m.get('role', 'user').capitalize()}\n{m.get('content')}\n"
@@ -5,6 +5,9 @@ from typing import Optional
 
 from open_webui.socket.main import get_event_emitter
 from open_webui.models.chats import (
+    IMPORT_BATCH_SIZE,
+    AsyncChats,
+    ChatBulkForm,
     ChatForm,
     ChatImportForm,
     ChatResponse,
@@ -17,12 +20,14 @@ from open_webui.models.folders import Folders
 from open_webui.config import ENABLE_ADMIN_CHAT_ACCESS, ENABLE_ADMIN_EXPORT
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
 
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_permission
+from open_webui.utils.jsonl import aiter_jsonl, check_compression, get_jsonl_response
+from open_webui.utils.pagination import set_next_cursor
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -37,18 +42,26 @@ router = APIRouter()
 @router.get("/", response_model=list[ChatTitleIdResponse])
 @router.get("/list", response_model=list[ChatTitleIdResponse])
 def get_session_user_chat_list(
+    response: Response,
     user=Depends(get_verified_user),
     page: Optional[int] = None,
+    cursor: Optional[str] = None,
     include_folders: Optional[bool] = False,
 ):
     try:
-        if page is not None:
+        if page is not None or cursor:
             limit = 60
-            skip = (page - 1) * limit
-
-            return Chats.get_chat_title_id_list_by_user_id(
-                user.id, include_folders=include_folders, skip=skip, limit=limit
+            skip = (page - 1) * limit if page is not None and not cursor else None
+
+            chats = Chats.get_chat_title_id_list_by_user_id(
+                user.id,
+                include_folders=include_folders,
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
             )
+            set_next_cursor(response, chats, limit)
+            return chats
         else:
             return Chats.get_chat_title_id_list_by_user_id(
                 user.id, include_folders=include_folders
@@ -88,7 +101,9 @@ async def delete_all_user_chats(request: Request, user=Depends(get_verified_user
 @router.get("/list/user/{user_id}", response_model=list[ChatTitleIdResponse])
 async def get_user_chat_list_by_user_id(
     user_id: str,
+    response: Response,
     page: Optional[int] = None,
+    cursor: Optional[str] = None,
     query: Optional[str] = None,
     order_by: Optional[str] = None,
     direction: Optional[str] = None,
@@ -114,9 +129,20 @@ async def get_user_chat_list_by_user_id(
     if direction:
         filter["direction"] = direction
 
-    return Chats.get_chat_list_by_user_id(
-        user_id, include_archived=True, filter=filter, skip=skip, limit=limit
-    )
+    try:
+        chats = Chats.get_chat_list_by_user_id(
+            user_id,
+            include_archived=True,
+            filter=filter,
+            skip=0 if cursor else skip,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not order_by:
+        set_next_cursor(response, chats, limit)
+    return chats
 
 
 ############################
@@ -164,6 +190,52 @@ async def import_chat(form_data: ChatImportForm, user=Depends(get_verified_user)
         )
 
 
+############################
+# ImportChats
+############################
+
+
+@router.post("/import/jsonl", response_model=int)
+async def import_chats(
+    request: Request,
+    compression: Optional[str] = None,
+    user=Depends(get_verified_user),
+):
+    check_compression(compression)
+
+    # Chats (as exported by /export) are read and inserted in batches, the
+    # response is the number of chats imported
+    count = 0
+    forms = []
+    try:
+        async for item in aiter_jsonl(request.stream(), compression):
+            forms.append(ChatImportForm.model_validate(item))
+            if len(forms) >= IMPORT_BATCH_SIZE:
+                count += await AsyncChats.import_chats(user.id, forms)
+                forms = []
+
+        if forms:
+            count += await AsyncChats.import_chats(user.id, forms)
+    except HTTPException as e:
+        # Oversized lines and truncated streams keep their status code
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=ERROR_MESSAGES.DEFAULT(
+                f"Imported {count} chats before failing: {e.detail}"
+            ),
+        )
+    except Exception as e:
+        log.exception(e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(
+                f"Imported {count} chats before failing: {e}"
+            ),
+        )
+
+    return count
+
+
 ############################
 # GetChats
 ############################
@@ -205,32 +277,32 @@ def search_user_chats(
 
 @router.get("/folder/{folder_id}", response_model=list[ChatResponse])
 async def get_chats_by_folder_id(folder_id: str, user=Depends(get_verified_user)):
-    folder_ids = [folder_id]
-    children_folders = Folders.get_children_folders_by_id_and_user_id(
-        folder_id, user.id
-    )
-    if children_folders:
-        folder_ids.extend([folder.id for folder in children_folders])
-
     return [
         ChatResponse(**chat.model_dump())
-        for chat in Chats.get_chats_by_folder_ids_and_user_id(folder_ids, user.id)
+        for chat in Chats.get_chats_by_folder_subtree_and_user_id(folder_id, user.id)
     ]
 
 
 @router.get("/folder/{folder_id}/list")
 async def get_chat_list_by_folder_id(
-    folder_id: str, page: Optional[int] = 1, user=Depends(get_verified_user)
+    folder_id: str,
+    response: Response,
+    page: Optional[int] = 1,
+    cursor: Optional[str] = None,
+    user=Depends(get_verified_user),
 ):
     try:
         limit = 60
-        skip = (page - 1) * limit
+        skip = (page - 1) * limit if not cursor else 0
+
+        chats = Chats.get_chats_by_folder_id_and_user_id(
+            folder_id, user.id, skip=skip, limit=limit, cursor=cursor
+        )
+        set_next_cursor(response, chats, limit)
 
         return [
             {"title": chat.title, "id": chat.id, "updated_at": chat.updated_at}
-            for chat in Chats.get_chats_by_folder_id_and_user_id(
-                folder_id, user.id, skip=skip, limit=limit
-            )
+            for chat in chats
         ]
 
     except Exception as e:
@@ -311,6 +383,41 @@ async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
     return [ChatResponse(**chat.model_dump()) for chat in Chats.get_chats()]
 
 
+@router.get("/all/db/export")
+async def export_all_chats_in_db(
+    compression: Optional[str] = None, user=Depends(get_admin_user)
+):
+    if not ENABLE_ADMIN_EXPORT:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
+        )
+    return get_jsonl_response(Chats.iter_chats(), "chat-export", compression)
+
+
+############################
+# ExportChats
+############################
+
+
+@router.get("/export")
+async def export_user_chats(
+    request: Request,
+    compression: Optional[str] = None,
+    user=Depends(get_verified_user),
+):
+    if user.role == "user" and not has_permission(
+        user.id, "chat.export", request.app.state.config.USER_PERMISSIONS
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
+        )
+    return get_jsonl_response(
+        Chats.iter_chats(user.id), f"chat-export-{user.id}", compression
+    )
+
+
 ############################
 # GetArchivedChats
 ############################
@@ -318,7 +425,9 @@ async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
 
 @router.get("/archived", response_model=list[ChatTitleIdResponse])
 async def get_archived_session_user_chat_list(
+    response: Response,
     page: Optional[int] = None,
+    cursor: Optional[str] = None,
     query: Optional[str] = None,
     order_by: Optional[str] = None,
     direction: Optional[str] = None,
@@ -338,15 +447,21 @@ async def get_archived_session_user_chat_list(
     if direction:
         filter["direction"] = direction
 
-    chat_list = [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_archived_chat_list_by_user_id(
-            user.id,
-            filter=filter,
-            skip=skip,
-            limit=limit,
-        )
-    ]
+    try:
+        chat_list = [
+            ChatTitleIdResponse(**chat.model_dump())
+            for chat in Chats.get_archived_chat_list_by_user_id(
+                user.id,
+                filter=filter,
+                skip=0 if cursor else skip,
+                limit=limit,
+                cursor=cursor,
+            )
+        ]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not order_by:
+        set_next_cursor(response, chat_list, limit)
 
     return chat_list
 
@@ -371,6 +486,48 @@ async def unarchive_all_chats(user=Depends(get_verified_user)):
     return Chats.unarchive_all_chats_by_user_id(user.id)
 
 
+############################
+# BulkUpdateChats
+############################
+
+
+@router.post("/bulk", response_model=list[str])
+async def bulk_update_chats(
+    request: Request, form_data: ChatBulkForm, user=Depends(get_verified_user)
+):
+    if (
+        form_data.delete
+        and user.role == "user"
+        and not has_permission(
+            user.id, "chat.delete", request.app.state.config.USER_PERMISSIONS
+        )
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
+        )
+
+    if form_data.folder_id and not Folders.get_folder_by_id_and_user_id(
+        form_data.folder_id, user.id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=ERROR_MESSAGES.NOT_FOUND
+        )
+
+    if any(tag.replace(" ", "_").lower() == "none" for tag in form_data.add_tags):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Tag name cannot be 'None'"),
+        )
+
+    chat_ids = Chats.bulk_update_chats_by_user_id(user.id, form_data)
+    if chat_ids is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=ERROR_MESSAGES.DEFAULT()
+        )
+    return chat_ids
+
+
 ############################
 # GetSharedChatById
 ############################
@@ -559,11 +716,11 @@ async def send_chat_message_event_by_id(
 async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified_user)):
     if user.role == "admin":
         chat = Chats.get_chat_by_id(id)
-        for tag in chat.meta.get("tags", []):
-            if Chats.count_chats_by_tag_name_and_user_id(tag, user.id) == 1:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
-
         result = Chats.delete_chat_by_id(id)
+        if chat:
+            Chats.delete_orphaned_tags_by_user_id(
+                chat.user_id, chat.meta.get("tags", [])
+            )
 
         return result
     else:
@@ -575,12 +732,11 @@ async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified
                 detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
             )
 
-        chat = Chats.get_chat_by_id(id)
-        for tag in chat.meta.get("tags", []):
-            if Chats.count_chats_by_tag_name_and_user_id(tag, user.id) == 1:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
-
+        chat = Chats.get_chat_by_id_and_user_id(id, user.id)
         result = Chats.delete_chat_by_id_and_user_id(id, user.id)
+        if chat:
+            Chats.delete_orphaned_tags_by_user_id(user.id, chat.meta.get("tags", []))
+
         return result
 
 
@@ -684,10 +840,7 @@ async def archive_chat_by_id(id: str, user=Depends(get_verified_user)):
 
         # Delete tags if chat is archived
         if chat.archived:
-            for tag_id in chat.meta.get("tags", []):
-                if Chats.count_chats_by_tag_name_and_user_id(tag_id, user.id) == 0:
-                    log.debug(f"deleting tag: {tag_id}")
-                    Tags.delete_tag_by_name_and_user_id(tag_id, user.id)
+            Chats.delete_orphaned_tags_by_user_id(user.id, chat.meta.get("tags", []))
         else:
             for tag_id in chat.meta.get("tags", []):
                 tag = Tags.get_tag_by_name_and_user_id(tag_id, user.id)
@@ -817,8 +970,7 @@ async def delete_tag_by_id_and_tag_name(
     if chat:
         Chats.delete_tag_by_id_and_user_id_and_tag_name(id, user.id, form_data.name)
 
-        if Chats.count_chats_by_tag_name_and_user_id(form_data.name, user.id) == 0:
-            Tags.delete_tag_by_name_and_user_id(form_data.name, user.id)
+        Chats.delete_orphaned_tags_by_user_id(user.id, [form_data.name])
 
         chat = Chats.get_chat_by_id_and_user_id(id, user.id)
         tags = chat.meta.get("tags", [])
@@ -839,10 +991,7 @@ async def delete_all_tags_by_id(id: str, user=Depends(get_verified_user)):
     chat = Chats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         Chats.delete_all_tags_by_id_and_user_id(id, user.id)
-
-        for tag in chat.meta.get("tags", []):
-            if Chats.count_chats_by_tag_name_and_user_id(tag, user.id) == 0:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
+        Chats.delete_orphaned_tags_by_user_id(user.id, chat.meta.get("tags", []))
 
         return True
     else:
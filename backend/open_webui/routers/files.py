@@ -16,6 +16,7 @@ from fastapi import (
     Form,
     HTTPException,
     Request,
+    Response,
     UploadFile,
     status,
     Query,
@@ -26,8 +27,10 @@ from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 
+from open_webui.internal.db import run_db
 from open_webui.models.users import Users
 from open_webui.models.files import (
+    AsyncFiles,
     FileForm,
     FileModel,
     FileModelResponse,
@@ -36,10 +39,16 @@ from open_webui.models.files import (
 from open_webui.models.knowledge import Knowledges
 
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
-from open_webui.routers.retrieval import ProcessFileForm, process_file
+from open_webui.routers.retrieval import (
+    ProcessFileForm,
+    process_file,
+    update_file_status,
+)
 from open_webui.routers.audio import transcribe
 from open_webui.storage.provider import Storage
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.pagination import set_next_cursor
+from open_webui.utils.pubsub import FILE_STATUS_PUBSUB
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -122,12 +131,10 @@ def process_uploaded_file(request, file, file_path, file_item, file_metadata, us
             process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
     except Exception as e:
         log.error(f"Error processing file: {file_item.id}")
-        Files.update_file_data_by_id(
+        update_file_status(
             file_item.id,
-            {
-                "status": "failed",
-                "error": str(e.detail) if hasattr(e, "detail") else str(e),
-            },
+            "failed",
+            error=str(e.detail) if hasattr(e, "detail") else str(e),
         )
 
 
@@ -274,11 +281,21 @@ def upload_file_handler(
 
 
 @router.get("/", response_model=list[FileModelResponse])
-async def list_files(user=Depends(get_verified_user), content: bool = Query(True)):
-    if user.role == "admin":
-        files = Files.get_files()
-    else:
-        files = Files.get_files_by_user_id(user.id)
+async def list_files(
+    response: Response,
+    user=Depends(get_verified_user),
+    content: bool = Query(True),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+):
+    try:
+        if user.role == "admin":
+            files = Files.get_files(limit=limit, cursor=cursor)
+        else:
+            files = Files.get_files_by_user_id(user.id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    set_next_cursor(response, files, limit)
 
     if not content:
         for file in files:
@@ -389,7 +406,7 @@ async def get_file_by_id(id: str, user=Depends(get_verified_user)):
 async def get_file_process_status(
     id: str, stream: bool = Query(False), user=Depends(get_verified_user)
 ):
-    file = Files.get_file_by_id(id)
+    file = await AsyncFiles.get_file_by_id(id)
 
     if not file:
         raise HTTPException(
@@ -400,37 +417,50 @@ async def get_file_process_status(
     if (
         file.user_id == user.id
         or user.role == "admin"
-        or has_access_to_file(id, "read", user)
+        or await run_db(has_access_to_file, id, "read", user)
     ):
         if stream:
             MAX_FILE_PROCESSING_DURATION = 3600 * 2
+            # Re-check the database now and then, in case a status update was missed
+            STATUS_RECHECK_INTERVAL = 30
+
+            async def event_stream(file_id):
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + MAX_FILE_PROCESSING_DURATION
+
+                # Subscribe before reading the current status so no update is lost in between
+                async with FILE_STATUS_PUBSUB.subscribe(file_id) as queue:
+                    event = None
+                    while loop.time() < deadline:
+                        if event is None:
+                            file_item = await AsyncFiles.get_file_by_id(file_id)
+                            if not file_item:
+                                yield f"data: {json.dumps({'status': 'not_found'})}\n\n"
+                                break
 
-            async def event_stream(file_item):
-                if file_item:
-                    for _ in range(MAX_FILE_PROCESSING_DURATION):
-                        file_item = Files.get_file_by_id(file_item.id)
-                        if file_item:
-                            data = file_item.model_dump().get("data", {})
-                            status = data.get("status")
-
-                            if status:
-                                event = {"status": status}
-                                if status == "failed":
-                                    event["error"] = data.get("error")
-
-                                yield f"data: {json.dumps(event)}\n\n"
-                                if status in ("completed", "failed"):
-                                    break
-                            else:
+                            data = file_item.data or {}
+                            if not data.get("status"):
                                 # Legacy
                                 break
 
-                        await asyncio.sleep(0.5)
-                else:
-                    yield f"data: {json.dumps({'status': 'not_found'})}\n\n"
+                            event = {"status": data["status"]}
+                            if data["status"] == "failed":
+                                event["error"] = data.get("error")
+
+                        yield f"data: {json.dumps(event)}\n\n"
+                        if event["status"] in ("completed", "failed"):
+                            break
+
+                        try:
+                            event = await asyncio.wait_for(
+                                queue.get(),
+                                min(STATUS_RECHECK_INTERVAL, deadline - loop.time()),
+                            )
+                        except asyncio.TimeoutError:
+                            event = None
 
             return StreamingResponse(
-                event_stream(file),
+                event_stream(file.id),
                 media_type="text/event-stream",
             )
         else:
@@ -269,8 +269,7 @@ async def delete_folder_by_id(
     if folder:
         try:
             folder_ids = Folders.delete_folder_by_id_and_user_id(id, user.id)
-            for folder_id in folder_ids:
-                Chats.delete_chats_by_user_id_and_folder_id(user.id, folder_id)
+            Chats.delete_chats_by_user_id_and_folder_ids(user.id, folder_ids)
 
             return True
         except Exception as e:
@@ -18,6 +18,7 @@ from open_webui.utils.plugin import (
     replace_imports,
     get_function_module_from_cache,
 )
+from open_webui.utils.model_registry import update_model_registry
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
 from fastapi import APIRouter, Depends, HTTPException, Request, status
@@ -160,7 +161,9 @@ async def sync_functions(
                     )
                     raise e
 
-        return Functions.sync_functions(user.id, form_data.functions)
+        functions = Functions.sync_functions(user.id, form_data.functions)
+        await update_model_registry(request, reload=True)
+        return functions
     except Exception as e:
         log.exception(f"Failed to load a function: {e}")
         raise HTTPException(
@@ -208,6 +211,7 @@ async def create_new_function(
                 Functions.update_function_metadata_by_id(id, {"toggle": True})
 
             if function:
+                await update_model_registry(request, function_ids=[function.id])
                 return function
             else:
                 raise HTTPException(
@@ -251,7 +255,9 @@ async def get_function_by_id(id: str, user=Depends(get_admin_user)):
 
 
 @router.post("/id/{id}/toggle", response_model=Optional[FunctionModel])
-async def toggle_function_by_id(id: str, user=Depends(get_admin_user)):
+async def toggle_function_by_id(
+    request: Request, id: str, user=Depends(get_admin_user)
+):
     function = Functions.get_function_by_id(id)
     if function:
         function = Functions.update_function_by_id(
@@ -259,6 +265,7 @@ async def toggle_function_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            await update_model_registry(request, function_ids=[id])
             return function
         else:
             raise HTTPException(
@@ -278,7 +285,7 @@ async def toggle_function_by_id(id: str, user=Depends(get_admin_user)):
 
 
 @router.post("/id/{id}/toggle/global", response_model=Optional[FunctionModel])
-async def toggle_global_by_id(id: str, user=Depends(get_admin_user)):
+async def toggle_global_by_id(request: Request, id: str, user=Depends(get_admin_user)):
     function = Functions.get_function_by_id(id)
     if function:
         function = Functions.update_function_by_id(
@@ -286,6 +293,7 @@ async def toggle_global_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            await update_model_registry(request, function_ids=[id])
             return function
         else:
             raise HTTPException(
@@ -327,6 +335,7 @@ async def update_function_by_id(
             Functions.update_function_metadata_by_id(id, {"toggle": True})
 
         if function:
+            await update_model_registry(request, function_ids=[id])
             return function
         else:
             raise HTTPException(
@@ -335,6 +344,8 @@ async def update_function_by_id(
             )
 
     except Exception as e:
+        # A function that fails to load gets deactivated
+        await update_model_registry(request, function_ids=[id])
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=ERROR_MESSAGES.DEFAULT(e),
@@ -357,6 +368,8 @@ async def delete_function_by_id(
         if id in FUNCTIONS:
             del FUNCTIONS[id]
 
+        await update_model_registry(request, function_ids=[id])
+
     return result
 
 
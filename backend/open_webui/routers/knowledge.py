@@ -1,7 +1,7 @@
 from typing import List, Optional
 from copy import deepcopy
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
 import logging
 
 from open_webui.models.knowledge import (
@@ -23,6 +23,8 @@ from open_webui.storage.provider import Storage
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.model_registry import update_model_registry
+from open_webui.utils.pagination import set_next_cursor
 
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -47,13 +49,24 @@ PRIVATE_ACCESS_CONTROL = {
 
 
 @router.get("/", response_model=list[KnowledgeUserResponse])
-async def get_knowledge(user=Depends(get_verified_user)):
+async def get_knowledge(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    user=Depends(get_verified_user),
+):
     knowledge_bases = []
 
-    if user.role == "admin" and BYPASS_ADMIN_ACCESS_CONTROL:
-        knowledge_bases = Knowledges.get_knowledge_bases()
-    else:
-        knowledge_bases = Knowledges.get_knowledge_bases_by_user_id(user.id, "read")
+    try:
+        if user.role == "admin" and BYPASS_ADMIN_ACCESS_CONTROL:
+            knowledge_bases = Knowledges.get_knowledge_bases(limit=limit, cursor=cursor)
+        else:
+            knowledge_bases = Knowledges.get_knowledge_bases_by_user_id(
+                user.id, "read", limit=limit, cursor=cursor
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    set_next_cursor(response, knowledge_bases, limit)
 
     # Get files for each knowledge base
     knowledge_with_files = []
@@ -95,13 +108,24 @@ async def get_knowledge(user=Depends(get_verified_user)):
 
 
 @router.get("/list", response_model=list[KnowledgeUserResponse])
-async def get_knowledge_list(user=Depends(get_verified_user)):
+async def get_knowledge_list(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    user=Depends(get_verified_user),
+):
     knowledge_bases = []
 
-    if user.role == "admin" and BYPASS_ADMIN_ACCESS_CONTROL:
-        knowledge_bases = Knowledges.get_knowledge_bases()
-    else:
-        knowledge_bases = Knowledges.get_knowledge_bases_by_user_id(user.id, "write")
+    try:
+        if user.role == "admin" and BYPASS_ADMIN_ACCESS_CONTROL:
+            knowledge_bases = Knowledges.get_knowledge_bases(limit=limit, cursor=cursor)
+        else:
+            knowledge_bases = Knowledges.get_knowledge_bases_by_user_id(
+                user.id, "write", limit=limit, cursor=cursor
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    set_next_cursor(response, knowledge_bases, limit)
 
     # Get files for each knowledge base
     knowledge_with_files = []
@@ -597,7 +621,9 @@ def remove_file_from_knowledge_by_id(
 
 
 @router.delete("/{id}/delete", response_model=bool)
-async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
+async def delete_knowledge_by_id(
+    request: Request, id: str, user=Depends(get_verified_user)
+):
     knowledge = Knowledges.get_knowledge_by_id(id=id)
     if not knowledge:
         raise HTTPException(
@@ -622,6 +648,7 @@ async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
     log.info(f"Found {len(models)} models to check for knowledge base {id}")
 
     # Update models that reference this knowledge base
+    updated_model_ids = []
     for model in models:
         if model.meta and hasattr(model.meta, "knowledge"):
             knowledge_list = model.meta.knowledge or []
@@ -643,6 +670,10 @@ async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
                     is_active=model.is_active,
                 )
                 Models.update_model_by_id(model.id, model_form)
+                updated_model_ids.append(model.id)
+
+    if updated_model_ids:
+        await update_model_registry(request, model_ids=updated_model_ids)
 
     # Clean up vector DB
     try:
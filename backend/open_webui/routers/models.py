@@ -28,6 +28,7 @@ from fastapi.responses import FileResponse, StreamingResponse
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.model_registry import update_model_registry
 from open_webui.config import BYPASS_ADMIN_ACCESS_CONTROL, STATIC_DIR
 
 log = logging.getLogger(__name__)
@@ -87,6 +88,7 @@ async def create_new_model(
     else:
         model = Models.insert_new_model(form_data, user.id)
         if model:
+            await update_model_registry(request, model_ids=[model.id])
             return model
         else:
             raise HTTPException(
@@ -116,7 +118,9 @@ class ModelsImportForm(BaseModel):
 
 @router.post("/import", response_model=bool)
 async def import_models(
-    user: str = Depends(get_admin_user), form_data: ModelsImportForm = (...)
+    request: Request,
+    user: str = Depends(get_admin_user),
+    form_data: ModelsImportForm = (...),
 ):
     try:
         data = form_data.models
@@ -141,6 +145,13 @@ async def import_models(
                         model_data["params"] = model_data.get("params", {})
                         new_model = ModelForm(**model_data)
                         Models.insert_new_model(user_id=user.id, form_data=new_model)
+
+            await update_model_registry(
+                request,
+                model_ids=[
+                    model_data.get("id") for model_data in data if model_data.get("id")
+                ],
+            )
             return True
         else:
             raise HTTPException(status_code=400, detail="Invalid JSON format")
@@ -162,7 +173,9 @@ class SyncModelsForm(BaseModel):
 async def sync_models(
     request: Request, form_data: SyncModelsForm, user=Depends(get_admin_user)
 ):
-    return Models.sync_models(user.id, form_data.models)
+    models = Models.sync_models(user.id, form_data.models)
+    await update_model_registry(request, reload=True)
+    return models
 
 
 ###########################
@@ -227,7 +240,9 @@ async def get_model_profile_image(id: str, user=Depends(get_verified_user)):
 
 
 @router.post("/model/toggle", response_model=Optional[ModelResponse])
-async def toggle_model_by_id(id: str, user=Depends(get_verified_user)):
+async def toggle_model_by_id(
+    request: Request, id: str, user=Depends(get_verified_user)
+):
     model = Models.get_model_by_id(id)
     if model:
         if (
@@ -238,6 +253,7 @@ async def toggle_model_by_id(id: str, user=Depends(get_verified_user)):
             model = Models.toggle_model_by_id(id)
 
             if model:
+                await update_model_registry(request, model_ids=[id])
                 return model
             else:
                 raise HTTPException(
@@ -263,6 +279,7 @@ async def toggle_model_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.post("/model/update", response_model=Optional[ModelModel])
 async def update_model_by_id(
+    request: Request,
     id: str,
     form_data: ModelForm,
     user=Depends(get_verified_user),
@@ -286,6 +303,7 @@ async def update_model_by_id(
         )
 
     model = Models.update_model_by_id(id, form_data)
+    await update_model_registry(request, model_ids=[id])
     return model
 
 
@@ -295,7 +313,9 @@ async def update_model_by_id(
 
 
 @router.delete("/model/delete", response_model=bool)
-async def delete_model_by_id(id: str, user=Depends(get_verified_user)):
+async def delete_model_by_id(
+    request: Request, id: str, user=Depends(get_verified_user)
+):
     model = Models.get_model_by_id(id)
     if not model:
         raise HTTPException(
@@ -314,10 +334,12 @@ async def delete_model_by_id(id: str, user=Depends(get_verified_user)):
         )
 
     result = Models.delete_model_by_id(id)
+    await update_model_registry(request, model_ids=[id])
     return result
 
 
 @router.delete("/delete/all", response_model=bool)
-async def delete_all_models(user=Depends(get_admin_user)):
+async def delete_all_models(request: Request, user=Depends(get_admin_user)):
     result = Models.delete_all_models()
+    await update_model_registry(request, reload=True)
     return result
@@ -4,7 +4,15 @@ from typing import Optional
 from copy import deepcopy
 
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status, BackgroundTasks
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+    BackgroundTasks,
+)
 from pydantic import BaseModel
 
 from open_webui.socket.main import sio
@@ -20,6 +28,7 @@ from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.pagination import set_next_cursor
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -70,7 +79,11 @@ class NoteTitleIdResponse(BaseModel):
 
 @router.get("/list", response_model=list[NoteTitleIdResponse])
 async def get_note_list(
-    request: Request, page: Optional[int] = None, user=Depends(get_verified_user)
+    request: Request,
+    response: Response,
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
+    user=Depends(get_verified_user),
 ):
     if user.role != "admin" and not has_permission(
         user.id, "features.notes", request.app.state.config.USER_PERMISSIONS
@@ -82,16 +95,20 @@ async def get_note_list(
 
     limit = None
     skip = None
-    if page is not None:
+    if page is not None or cursor:
         limit = 60
-        skip = (page - 1) * limit
+        skip = (page - 1) * limit if page is not None and not cursor else None
 
-    notes = [
-        NoteTitleIdResponse(**note.model_dump())
-        for note in Notes.get_notes_by_permission(
-            user.id, "write", skip=skip, limit=limit
-        )
-    ]
+    try:
+        notes = [
+            NoteTitleIdResponse(**note.model_dump())
+            for note in Notes.get_notes_by_permission(
+                user.id, "write", skip=skip, limit=limit, cursor=cursor
+            )
+        ]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    set_next_cursor(response, notes, limit)
 
     return notes
 
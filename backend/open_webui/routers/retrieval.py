@@ -69,6 +69,7 @@ from open_webui.retrieval.web.sougou import search_sougou
 from open_webui.retrieval.web.firecrawl import search_firecrawl
 from open_webui.retrieval.web.external import search_external
 
+from open_webui.retrieval.batching import get_embedding_service
 from open_webui.retrieval.utils import (
     get_embedding_function,
     get_reranking_function,
@@ -83,6 +84,7 @@ from open_webui.utils.misc import (
     calculate_sha256_string,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.pubsub import FILE_STATUS_PUBSUB
 
 from open_webui.config import (
     ENV,
@@ -103,6 +105,7 @@ from open_webui.env import (
     SENTENCE_TRANSFORMERS_MODEL_KWARGS,
     SENTENCE_TRANSFORMERS_CROSS_ENCODER_BACKEND,
     SENTENCE_TRANSFORMERS_CROSS_ENCODER_MODEL_KWARGS,
+    ENABLE_RAG_EMBEDDING_BATCHING,
 )
 
 from open_webui.constants import ERROR_MESSAGES
@@ -251,6 +254,22 @@ async def get_embedding_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/embedding/queue")
+async def get_embedding_queue(request: Request, user=Depends(get_admin_user)):
+    # Queue depths of the local embedding worker
+    if (
+        request.app.state.config.RAG_EMBEDDING_ENGINE != ""
+        or request.app.state.ef is None
+        or not ENABLE_RAG_EMBEDDING_BATCHING
+    ):
+        return {"status": False}
+
+    return {
+        "status": True,
+        **get_embedding_service(request.app.state.ef).get_metrics(),
+    }
+
+
 class OpenAIConfigForm(BaseModel):
     url: str
     key: str
@@ -1362,6 +1381,7 @@ def save_docs_to_vector_db(
             list(map(lambda x: x.replace("\n", " "), texts)),
             prefix=RAG_EMBEDDING_CONTENT_PREFIX,
             user=user,
+            lane="bulk",
         )
         log.info(f"embeddings generated {len(embeddings)} for {len(texts)} items")
 
@@ -1394,6 +1414,16 @@ class ProcessFileForm(BaseModel):
     collection_name: Optional[str] = None
 
 
+def update_file_status(file_id: str, status: str, persist: bool = True, **data):
+    """
+    Notify watchers of /files/{id}/process/status of a processing stage.
+    Intermediate stages are only published, final ones are also saved.
+    """
+    if persist:
+        Files.update_file_data_by_id(file_id, {"status": status, **data})
+    FILE_STATUS_PUBSUB.publish(file_id, {"status": status, **data})
+
+
 @router.post("/process/file")
 def process_file(
     request: Request,
@@ -1476,6 +1506,8 @@ def process_file(
                 # Usage: /files/
                 file_path = file.path
                 if file_path:
+                    update_file_status(file.id, "extracting", persist=False)
+
                     file_path = Storage.get_file(file_path)
                     loader = Loader(
                         engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
@@ -1553,7 +1585,7 @@ def process_file(
             Files.update_file_hash_by_id(file.id, hash)
 
             if request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
-                Files.update_file_data_by_id(file.id, {"status": "completed"})
+                update_file_status(file.id, "completed")
                 return {
                     "status": True,
                     "collection_name": None,
@@ -1562,6 +1594,8 @@ def process_file(
                 }
             else:
                 try:
+                    update_file_status(file.id, "embedding", persist=False)
+
                     result = save_docs_to_vector_db(
                         request,
                         docs=docs,
@@ -1584,10 +1618,7 @@ def process_file(
                             },
                         )
 
-                        Files.update_file_data_by_id(
-                            file.id,
-                            {"status": "completed"},
-                        )
+                        update_file_status(file.id, "completed")
 
                         return {
                             "status": True,
@@ -1602,10 +1633,7 @@ def process_file(
 
         except Exception as e:
             log.exception(e)
-            Files.update_file_data_by_id(
-                file.id,
-                {"status": "failed"},
-            )
+            update_file_status(file.id, "failed", error=str(e))
 
             if "No pandoc was found" in str(e):
                 raise HTTPException(
@@ -2178,7 +2206,7 @@ def query_doc_handler(
                 collection_result=collection_results[form_data.collection_name],
                 query=form_data.query,
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
-                    query, prefix=prefix, user=user
+                    query, prefix=prefix, user=user, lane="query"
                 ),
                 k=form_data.k if form_data.k else request.app.state.config.TOP_K,
                 reranking_function=(
@@ -2208,7 +2236,10 @@ def query_doc_handler(
             return query_doc(
                 collection_name=form_data.collection_name,
                 query_embedding=request.app.state.EMBEDDING_FUNCTION(
-                    form_data.query, prefix=RAG_EMBEDDING_QUERY_PREFIX, user=user
+                    form_data.query,
+                    prefix=RAG_EMBEDDING_QUERY_PREFIX,
+                    user=user,
+                    lane="query",
                 ),
                 k=form_data.k if form_data.k else request.app.state.config.TOP_K,
                 user=user,
@@ -2245,7 +2276,7 @@ def query_collection_handler(
                 collection_names=form_data.collection_names,
                 queries=[form_data.query],
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
-                    query, prefix=prefix, user=user
+                    query, prefix=prefix, user=user, lane="query"
                 ),
                 k=form_data.k if form_data.k else request.app.state.config.TOP_K,
                 reranking_function=(
@@ -2275,7 +2306,7 @@ def query_collection_handler(
                 collection_names=form_data.collection_names,
                 queries=[form_data.query],
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
-                    query, prefix=prefix, user=user
+                    query, prefix=prefix, user=user, lane="query"
                 ),
                 k=form_data.k if form_data.k else request.app.state.config.TOP_K,
             )
@@ -1,17 +1,15 @@
 import asyncio
-import random
 
 import socketio
 import logging
 import sys
-import time
+import weakref
 from typing import Dict, Set
 from redis import asyncio as aioredis
-import pycrdt as Y
 
-from open_webui.models.users import Users, UserNameResponse
-from open_webui.models.chats import Chats
-from open_webui.models.notes import Notes, NoteUpdateForm
+from open_webui.models.users import AsyncUsers, UserNameResponse
+from open_webui.models.chats import AsyncChats
+from open_webui.models.notes import AsyncNotes, NoteUpdateForm
 from open_webui.utils.redis import (
     get_sentinels_from_env,
     get_sentinel_url_from_env,
@@ -22,14 +20,21 @@ from open_webui.env import (
     WEBSOCKET_MANAGER,
     WEBSOCKET_REDIS_URL,
     WEBSOCKET_REDIS_CLUSTER,
-    WEBSOCKET_REDIS_LOCK_TIMEOUT,
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
     REDIS_KEY_PREFIX,
+    ENABLE_YDOC_LEGACY_PAYLOADS,
+    UVICORN_WORKERS,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock, YdocManager
-from open_webui.tasks import create_task, stop_item_tasks
+from open_webui.socket.utils import (
+    ChatEventBatcher,
+    ChatEventBuffer,
+    DocumentSaveScheduler,
+    SessionPool,
+    UsagePool,
+    YdocManager,
+)
 from open_webui.utils.redis import get_redis_connection
 from open_webui.utils.access_control import has_access, get_users_with_access
 
@@ -46,6 +51,7 @@ log.setLevel(SRC_LOG_LEVELS["SOCKET"])
 
 
 REDIS = None
+YDOC_REDIS = None
 
 if WEBSOCKET_MANAGER == "redis":
     if WEBSOCKET_SENTINEL_HOSTS:
@@ -77,8 +83,6 @@ else:
 # Timeout duration in seconds
 TIMEOUT_DURATION = 3
 
-# Dictionary to maintain the user pool
-
 if WEBSOCKET_MANAGER == "redis":
     log.debug("Using Redis to manage websockets.")
     REDIS = get_redis_connection(
@@ -89,103 +93,40 @@ if WEBSOCKET_MANAGER == "redis":
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
         async_mode=True,
     )
-
-    redis_sentinels = get_sentinels_from_env(
-        WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
-    )
-    SESSION_POOL = RedisDict(
-        f"{REDIS_KEY_PREFIX}:session_pool",
+    # Yjs updates are stored as raw bytes
+    YDOC_REDIS = get_redis_connection(
         redis_url=WEBSOCKET_REDIS_URL,
-        redis_sentinels=redis_sentinels,
-        redis_cluster=WEBSOCKET_REDIS_CLUSTER,
-    )
-    USER_POOL = RedisDict(
-        f"{REDIS_KEY_PREFIX}:user_pool",
-        redis_url=WEBSOCKET_REDIS_URL,
-        redis_sentinels=redis_sentinels,
-        redis_cluster=WEBSOCKET_REDIS_CLUSTER,
-    )
-    USAGE_POOL = RedisDict(
-        f"{REDIS_KEY_PREFIX}:usage_pool",
-        redis_url=WEBSOCKET_REDIS_URL,
-        redis_sentinels=redis_sentinels,
+        redis_sentinels=get_sentinels_from_env(
+            WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
+        ),
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
+        async_mode=True,
+        decode_responses=False,
     )
 
-    clean_up_lock = RedisLock(
-        redis_url=WEBSOCKET_REDIS_URL,
-        lock_name=f"{REDIS_KEY_PREFIX}:usage_cleanup_lock",
-        timeout_secs=WEBSOCKET_REDIS_LOCK_TIMEOUT,
-        redis_sentinels=redis_sentinels,
-        redis_cluster=WEBSOCKET_REDIS_CLUSTER,
-    )
-    aquire_func = clean_up_lock.aquire_lock
-    renew_func = clean_up_lock.renew_lock
-    release_func = clean_up_lock.release_lock
-else:
-    SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
+# Connected sessions by user, and models in use (shared across instances with Redis)
+SESSION_POOL = SessionPool(redis=REDIS, redis_key_prefix=REDIS_KEY_PREFIX)
+USAGE_POOL = UsagePool(
+    redis=REDIS, redis_key_prefix=REDIS_KEY_PREFIX, timeout=TIMEOUT_DURATION
+)
 
-    aquire_func = release_func = renew_func = lambda: True
 
+# Collaborative document access decisions by session id
+DOCUMENT_ACCESS = {}
 
 YDOC_MANAGER = YdocManager(
-    redis=REDIS,
+    redis=YDOC_REDIS,
     redis_key_prefix=f"{REDIS_KEY_PREFIX}:ydoc:documents",
 )
 
 
-async def periodic_usage_pool_cleanup():
-    max_retries = 2
-    retry_delay = random.uniform(
-        WEBSOCKET_REDIS_LOCK_TIMEOUT / 2, WEBSOCKET_REDIS_LOCK_TIMEOUT
-    )
-    for attempt in range(max_retries + 1):
-        if aquire_func():
-            break
-        else:
-            if attempt < max_retries:
-                log.debug(
-                    f"Cleanup lock already exists. Retry {attempt + 1} after {retry_delay}s..."
-                )
-                await asyncio.sleep(retry_delay)
-            else:
-                log.warning(
-                    "Failed to acquire cleanup lock after retries. Skipping cleanup."
-                )
-                return
-
-    log.debug("Running periodic_cleanup")
-    try:
-        while True:
-            if not renew_func():
-                log.error(f"Unable to renew cleanup lock. Exiting usage pool cleanup.")
-                raise Exception("Unable to renew usage pool cleanup lock.")
-
-            now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
-                # Creating a list of sids to remove if they have timed out
-                expired_sids = [
-                    sid
-                    for sid, details in connections.items()
-                    if now - details["updated_at"] > TIMEOUT_DURATION
-                ]
-
-                for sid in expired_sids:
-                    del connections[sid]
-
-                if not connections:
-                    log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
-
-                send_usage = True
-            await asyncio.sleep(TIMEOUT_DURATION)
-    finally:
-        release_func()
+async def periodic_ydoc_compaction():
+    while True:
+        await asyncio.sleep(YDOC_MANAGER.idle_timeout)
+        try:
+            await YDOC_MANAGER.compact_idle_documents()
+        except Exception as e:
+            log.error(f"Error compacting collaborative documents: {e}")
 
 
 app = socketio.ASGIApp(
@@ -194,29 +135,33 @@ app = socketio.ASGIApp(
 )
 
 
-def get_models_in_use():
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
-    return models_in_use
+    return await USAGE_POOL.get_models_in_use()
 
 
-def get_active_user_ids():
+async def get_active_user_ids():
     """Get the list of active user IDs."""
-    return list(USER_POOL.keys())
+    return await SESSION_POOL.get_active_user_ids()
 
 
-def get_user_active_status(user_id):
+async def get_user_active_status(user_id):
     """Check if a user is currently active."""
-    return user_id in USER_POOL
+    return await SESSION_POOL.is_active(user_id)
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await SESSION_POOL.get(sid)
     if user:
         return user["id"]
     return None
 
 
+def get_user_room(user_id):
+    # Every session of a user joins this room on connect
+    return f"user:{user_id}"
+
+
 def get_session_ids_from_room(room):
     """Get all session IDs from a specific room."""
     active_session_ids = sio.manager.get_participants(
@@ -226,33 +171,30 @@ def get_session_ids_from_room(room):
     return [session_id[0] for session_id in active_session_ids]
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = get_session_ids_from_room(room)
 
     active_user_ids = list(
-        set([SESSION_POOL.get(session_id)["id"] for session_id in active_session_ids])
+        set(
+            [
+                user["id"]
+                for user in await SESSION_POOL.get_many(active_session_ids)
+                if user
+            ]
+        )
     )
     return active_user_ids
 
 
-def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
-        return True
-    return False
+async def get_active_status_by_user_id(user_id):
+    return await SESSION_POOL.is_active(user_id)
 
 
 @sio.on("usage")
 async def usage(sid, data):
-    if sid in SESSION_POOL:
-        model_id = data["model"]
-        # Record the timestamp for the last update
-        current_time = int(time.time())
-
-        # Store the new usage data and task
-        USAGE_POOL[model_id] = {
-            **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-            sid: {"updated_at": current_time},
-        }
+    if await SESSION_POOL.contains(sid):
+        # Marks the model as in use for the next TIMEOUT_DURATION seconds
+        await USAGE_POOL.touch(data["model"])
 
 
 @sio.event
@@ -262,16 +204,13 @@ async def connect(sid, environ, auth):
         data = decode_token(auth["token"])
 
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            user = await AsyncUsers.get_user_by_id(data["id"])
 
         if user:
-            SESSION_POOL[sid] = user.model_dump(
-                exclude=["date_of_birth", "bio", "gender"]
+            await SESSION_POOL.add(
+                sid, user.model_dump(exclude=["date_of_birth", "bio", "gender"])
             )
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            await sio.enter_room(sid, get_user_room(user.id))
 
 
 @sio.on("user-join")
@@ -285,15 +224,14 @@ async def user_join(sid, data):
     if data is None or "id" not in data:
         return
 
-    user = Users.get_user_by_id(data["id"])
+    user = await AsyncUsers.get_user_by_id(data["id"])
     if not user:
         return
 
-    SESSION_POOL[sid] = user.model_dump(exclude=["date_of_birth", "bio", "gender"])
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    await SESSION_POOL.add(
+        sid, user.model_dump(exclude=["date_of_birth", "bio", "gender"])
+    )
+    await sio.enter_room(sid, get_user_room(user.id))
 
     return {"id": user.id, "name": user.name}
 
@@ -307,11 +245,11 @@ async def join_note(sid, data):
     if token_data is None or "id" not in token_data:
         return
 
-    user = Users.get_user_by_id(token_data["id"])
+    user = await AsyncUsers.get_user_by_id(token_data["id"])
     if not user:
         return
 
-    note = Notes.get_note_by_id(data["note_id"])
+    note = await AsyncNotes.get_note_by_id(data["note_id"])
     if not note:
         log.error(f"Note {data['note_id']} not found for user {user.id}")
         return
@@ -326,32 +264,106 @@ async def join_note(sid, data):
 
     log.debug(f"Joining note {note.id} for user {user.id}")
     await sio.enter_room(sid, f"note:{note.id}")
+
+
+def encode_ydoc_payload(data: bytes, binary: bool):
+    # Older clients expect Yjs data as a JSON list of ints
+    return data if binary else list(data)
+
+
+def get_document_room(document_id, binary=None):
+    """
+    Every session in a document joins `doc_<id>`, plus a sub-room depending on
+    whether it receives Yjs data as binary attachments or as JSON arrays.
+    """
+    room = f"doc_{document_id}"
+    if binary is None:
+        return room
+    return f"{room}:binary" if binary else f"{room}:json"
+
+
+async def emit_to_document(event, payload, key, document_id, skip_sid=None):
+    """Emit Yjs data in `payload[key]` to a document, in each client's encoding"""
+    emits = [
+        sio.emit(
+            event,
+            payload,
+            room=get_document_room(document_id, binary=True),
+            skip_sid=skip_sid,
+        )
+    ]
+
+    if ENABLE_YDOC_LEGACY_PAYLOADS:
+        emits.append(
+            sio.emit(
+                event,
+                {**payload, key: encode_ydoc_payload(payload[key], binary=False)},
+                room=get_document_room(document_id, binary=False),
+                skip_sid=skip_sid,
+            )
+        )
+
+    await asyncio.gather(*emits)
+
+
+def get_document_state_payload(
+    document_id, state_update, active_session_ids, state_vector=None, binary=False
+):
+    payload = {
+        "document_id": document_id,
+        "state": encode_ydoc_payload(state_update, binary),
+        "sessions": active_session_ids,
+    }
+
+    if state_vector:
+        # Sent for incremental syncs so the client can send back what the server is missing
+        payload["state_vector"] = encode_ydoc_payload(state_vector, binary)
+
+    return payload
+
+
+async def has_document_access(sid, document_id) -> bool:
+    """
+    Check whether a session may access a collaborative document. The decision is
+    cached for the lifetime of the session (until it leaves the document).
+    """
+    session_access = DOCUMENT_ACCESS.setdefault(sid, {})
+    if document_id in session_access:
+        return session_access[document_id]
+
+    allowed = True
+    if document_id.startswith("note:"):
+        user = await SESSION_POOL.get(sid)
+        note_id = document_id.split(":")[1]
+        note = await AsyncNotes.get_note_by_id(note_id)
+
+        if not note:
+            log.error(f"Note {note_id} not found")
+            allowed = False
+        elif not user or (
+            user.get("role") != "admin"
+            and user.get("id") != note.user_id
+            and not has_access(
+                user.get("id"), type="read", access_control=note.access_control
+            )
+        ):
+            log.error(
+                f"User {user.get('id') if user else sid} does not have access to note {note_id}"
+            )
+            allowed = False
+
+    session_access[document_id] = allowed
+    return allowed
+
+
 @sio.on("ydoc:document:join")
 async def ydoc_document_join(sid, data):
     """Handle user joining a document"""
-    user = SESSION_POOL.get(sid)
-
     try:
         document_id = data["document_id"]
 
-        if document_id.startswith("note:"):
-            note_id = document_id.split(":")[1]
-            note = Notes.get_note_by_id(note_id)
-            if not note:
-                log.error(f"Note {note_id} not found")
-                return
-
-            if (
-                user.get("role") != "admin"
-                and user.get("id") != note.user_id
-                and not has_access(
-                    user.get("id"), type="read", access_control=note.access_control
-                )
-            ):
-                log.error(
-                    f"User {user.get('id')} does not have access to note {note_id}"
-                )
-                return
+        if not await has_document_access(sid, document_id):
+            return
 
         user_id = data.get("user_id", sid)
         user_name = data.get("user_name", "Anonymous")
@@ -360,26 +372,29 @@ async def ydoc_document_join(sid, data):
         log.info(f"User {user_id} joining document {document_id}")
         await YDOC_MANAGER.add_user(document_id=document_id, user_id=sid)
 
-        # Join Socket.IO room
-        await sio.enter_room(sid, f"doc_{document_id}")
+        binary = bool(data.get("binary", False))
 
-        active_session_ids = get_session_ids_from_room(f"doc_{document_id}")
+        # Join Socket.IO room
+        await sio.enter_room(sid, get_document_room(document_id))
+        await sio.enter_room(sid, get_document_room(document_id, binary=binary))
 
-        # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
+        active_session_ids = get_session_ids_from_room(get_document_room(document_id))
 
-        # Encode the entire document state as an update
-        state_update = ydoc.get_update()
+        # Encode the document state as an update, only including what the
+        # client is missing if it sent its state vector
+        state_vector = data.get("state_vector")
+        state_update, server_state_vector = await YDOC_MANAGER.get_state(
+            document_id, bytes(state_vector) if state_vector else None
+        )
         await sio.emit(
             "ydoc:document:state",
-            {
-                "document_id": document_id,
-                "state": list(state_update),  # Convert bytes to list for JSON
-                "sessions": active_session_ids,
-            },
+            get_document_state_payload(
+                document_id,
+                state_update,
+                active_session_ids,
+                server_state_vector if state_vector else None,
+                binary=binary,
+            ),
             room=sid,
         )
 
@@ -392,7 +407,7 @@ async def ydoc_document_join(sid, data):
                 "user_name": user_name,
                 "user_color": user_color,
             },
-            room=f"doc_{document_id}",
+            room=get_document_room(document_id),
             skip_sid=sid,
         )
 
@@ -403,25 +418,14 @@ async def ydoc_document_join(sid, data):
         await sio.emit("error", {"message": "Failed to join document"}, room=sid)
 
 
-async def document_save_handler(document_id, data, user):
+async def document_save_handler(document_id, data):
+    # Access is checked when the save is scheduled
     if document_id.startswith("note:"):
         note_id = document_id.split(":")[1]
-        note = Notes.get_note_by_id(note_id)
-        if not note:
-            log.error(f"Note {note_id} not found")
-            return
+        await AsyncNotes.update_note_by_id(note_id, NoteUpdateForm(data=data))
 
-        if (
-            user.get("role") != "admin"
-            and user.get("id") != note.user_id
-            and not has_access(
-                user.get("id"), type="read", access_control=note.access_control
-            )
-        ):
-            log.error(f"User {user.get('id')} does not have access to note {note_id}")
-            return
 
-        Notes.update_note_by_id(note_id, NoteUpdateForm(data=data))
+DOCUMENT_SAVE_SCHEDULER = DocumentSaveScheduler(document_save_handler)
 
 
 @sio.on("ydoc:document:state")
@@ -429,7 +433,7 @@ async def yjs_document_state(sid, data):
     """Send the current state of the Yjs document to the user"""
     try:
         document_id = data["document_id"]
-        room = f"doc_{document_id}"
+        room = get_document_room(document_id)
 
         active_session_ids = get_session_ids_from_room(room)
 
@@ -441,22 +445,20 @@ async def yjs_document_state(sid, data):
             log.warning(f"Document {document_id} not found")
             return
 
-        # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
-
-        # Encode the entire document state as an update
-        state_update = ydoc.get_update()
+        state_vector = data.get("state_vector")
+        state_update, server_state_vector = await YDOC_MANAGER.get_state(
+            document_id, bytes(state_vector) if state_vector else None
+        )
 
         await sio.emit(
             "ydoc:document:state",
-            {
-                "document_id": document_id,
-                "state": list(state_update),  # Convert bytes to list for JSON
-                "sessions": active_session_ids,
-            },
+            get_document_state_payload(
+                document_id,
+                state_update,
+                active_session_ids,
+                server_state_vector if state_vector else None,
+                binary=bool(data.get("binary", False)),
+            ),
             room=sid,
         )
     except Exception as e:
@@ -468,23 +470,18 @@ async def yjs_document_update(sid, data):
     """Handle Yjs document updates"""
     try:
         document_id = data["document_id"]
-
-        try:
-            await stop_item_tasks(REDIS, document_id)
-        except:
-            pass
-
         user_id = data.get("user_id", sid)
 
-        update = data["update"]  # List of bytes from frontend
+        # Binary attachment, or a list of ints from older clients
+        update = bytes(data["update"])
 
         await YDOC_MANAGER.append_to_updates(
             document_id=document_id,
-            update=update,  # Convert list of bytes to bytes
+            update=update,
         )
 
         # Broadcast update to all other users in the document
-        await sio.emit(
+        await emit_to_document(
             "ydoc:document:update",
             {
                 "document_id": document_id,
@@ -492,18 +489,14 @@ async def yjs_document_update(sid, data):
                 "update": update,
                 "socket_id": sid,  # Add socket_id to match frontend filtering
             },
-            room=f"doc_{document_id}",
+            "update",
+            document_id,
             skip_sid=sid,
         )
 
-        async def debounced_save():
-            await asyncio.sleep(0.5)
-            await document_save_handler(
-                document_id, data.get("data", {}), SESSION_POOL.get(sid)
-            )
-
-        if data.get("data"):
-            await create_task(REDIS, debounced_save(), document_id)
+        if data.get("data") and await has_document_access(sid, document_id):
+            # Coalesced with other pending changes into a single write
+            DOCUMENT_SAVE_SCHEDULER.schedule(document_id, data["data"])
 
     except Exception as e:
         log.error(f"Error in yjs_document_update: {e}")
@@ -520,15 +513,18 @@ async def yjs_document_leave(sid, data):
 
         # Remove user from the document
         await YDOC_MANAGER.remove_user(document_id=document_id, user_id=sid)
+        DOCUMENT_ACCESS.get(sid, {}).pop(document_id, None)
 
         # Leave Socket.IO room
-        await sio.leave_room(sid, f"doc_{document_id}")
+        await sio.leave_room(sid, get_document_room(document_id))
+        await sio.leave_room(sid, get_document_room(document_id, binary=True))
+        await sio.leave_room(sid, get_document_room(document_id, binary=False))
 
         # Notify other users
         await sio.emit(
             "ydoc:user:left",
             {"document_id": document_id, "user_id": user_id},
-            room=f"doc_{document_id}",
+            room=get_document_room(document_id),
         )
 
         if (
@@ -548,13 +544,14 @@ async def yjs_awareness_update(sid, data):
     try:
         document_id = data["document_id"]
         user_id = data.get("user_id", sid)
-        update = data["update"]
+        update = bytes(data["update"])
 
         # Broadcast awareness update to all other users in the document
-        await sio.emit(
+        await emit_to_document(
             "ydoc:awareness:update",
             {"document_id": document_id, "user_id": user_id, "update": update},
-            room=f"doc_{document_id}",
+            "update",
+            document_id,
             skip_sid=sid,
         )
 
@@ -564,71 +561,114 @@ async def yjs_awareness_update(sid, data):
 
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
-
-        user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
-
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
+    DOCUMENT_ACCESS.pop(sid, None)
 
+    user = await SESSION_POOL.remove(sid)
+    if user:
         await YDOC_MANAGER.remove_user_from_all_documents(sid)
     else:
         pass
         # print(f"Unknown session ID {sid} disconnected")
 
 
+# Recent chat events per task, for clients streaming them over SSE instead of Socket.IO
+CHAT_EVENT_BUFFER = ChatEventBuffer(redis=REDIS, redis_key_prefix=REDIS_KEY_PREFIX)
+
+# Tasks of this worker whose events are buffered, only the ones requested with
+# "event_stream", other clients get their events over Socket.IO
+STREAMED_TASK_IDS = set()
+
+
+def is_chat_event_stream_available() -> bool:
+    # Without Redis the buffer lives in this worker's memory, the SSE request
+    # could be served by another worker
+    return CHAT_EVENT_BUFFER.maxlen > 0 and (REDIS is not None or UVICORN_WORKERS == 1)
+
+
+async def emit_chat_event(to, payload):
+    await sio.emit("chat-events", payload, to=to)
+
+    if payload.get("task_id") in STREAMED_TASK_IDS:
+        try:
+            await CHAT_EVENT_BUFFER.append(payload["task_id"], payload)
+        except Exception as e:
+            log.error(f"Error buffering chat event: {e}")
+
+
+CHAT_EVENT_BATCHER = ChatEventBatcher(emit_chat_event)
+
+
+def get_chat_event_target(request_info):
+    # A single emit reaches every session of the user, plus the requesting one
+    to = [get_user_room(request_info["user_id"])]
+    if request_info.get("session_id"):
+        to.append(request_info["session_id"])
+    return to
+
+
+# Locks of the messages being updated by event emitters, dropped once unused
+MESSAGE_LOCKS = weakref.WeakValueDictionary()
+
+
+def get_message_lock(chat_id, message_id) -> asyncio.Lock:
+    lock = MESSAGE_LOCKS.get((chat_id, message_id))
+    if lock is None:
+        lock = asyncio.Lock()
+        MESSAGE_LOCKS[(chat_id, message_id)] = lock
+    return lock
+
+
 def get_event_emitter(request_info, update_db=True):
     async def __event_emitter__(event_data):
-        user_id = request_info["user_id"]
-
-        session_ids = list(
-            set(
-                USER_POOL.get(user_id, [])
-                + (
-                    [request_info.get("session_id")]
-                    if request_info.get("session_id")
-                    else []
-                )
-            )
-        )
-
-        emit_tasks = [
-            sio.emit(
-                "chat-events",
-                {
-                    "chat_id": request_info.get("chat_id", None),
-                    "message_id": request_info.get("message_id", None),
-                    "data": event_data,
-                },
-                to=session_id,
-            )
-            for session_id in session_ids
-        ]
+        to = get_chat_event_target(request_info)
+        payload = {
+            "chat_id": request_info.get("chat_id", None),
+            "message_id": request_info.get("message_id", None),
+            "data": event_data,
+        }
+        if request_info.get("task_id"):
+            payload["task_id"] = request_info["task_id"]
 
-        await asyncio.gather(*emit_tasks)
+        if CHAT_EVENT_BATCHER.window > 0:
+            CHAT_EVENT_BATCHER.add(to, payload)
+        else:
+            await emit_chat_event(to, payload)
 
         if update_db:
-            if "type" in event_data and event_data["type"] == "status":
-                Chats.add_message_status_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    event_data.get("data", {}),
-                )
-
-            if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
-
-                if message:
-                    content = message.get("content", "")
-                    content += event_data.get("data", {}).get("content", "")
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+            # Merge the events of a message into the stored message one at a
+            # time, concurrent read-modify-writes would overwrite each other
+            async with get_message_lock(
+                request_info["chat_id"], request_info["message_id"]
+            ):
+                if "type" in event_data and event_data["type"] == "status":
+                    await AsyncChats.add_message_status_to_chat_by_id_and_message_id(
+                        request_info["chat_id"],
+                        request_info["message_id"],
+                        event_data.get("data", {}),
+                    )
+
+                if "type" in event_data and event_data["type"] == "message":
+                    message = await AsyncChats.get_message_by_id_and_message_id(
+                        request_info["chat_id"],
+                        request_info["message_id"],
+                    )
+
+                    if message:
+                        content = message.get("content", "")
+                        content += event_data.get("data", {}).get("content", "")
+
+                        await AsyncChats.upsert_message_to_chat_by_id_and_message_id(
+                            request_info["chat_id"],
+                            request_info["message_id"],
+                            {
+                                "content": content,
+                            },
+                        )
+
+                if "type" in event_data and event_data["type"] == "replace":
+                    content = event_data.get("data", {}).get("content", "")
+
+                    await AsyncChats.upsert_message_to_chat_by_id_and_message_id(
                         request_info["chat_id"],
                         request_info["message_id"],
                         {
@@ -636,82 +676,101 @@ def get_event_emitter(request_info, update_db=True):
                         },
                     )
 
-            if "type" in event_data and event_data["type"] == "replace":
-                content = event_data.get("data", {}).get("content", "")
-
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "content": content,
-                    },
-                )
-
-            if "type" in event_data and event_data["type"] == "embeds":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
-
-                embeds = event_data.get("data", {}).get("embeds", [])
-                embeds.extend(message.get("embeds", []))
-
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "embeds": embeds,
-                    },
-                )
-
-            if "type" in event_data and event_data["type"] == "files":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
-
-                files = event_data.get("data", {}).get("files", [])
-                files.extend(message.get("files", []))
-
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "files": files,
-                    },
-                )
-
-            if event_data.get("type") in ["source", "citation"]:
-                data = event_data.get("data", {})
-                if data.get("type") == None:
-                    message = Chats.get_message_by_id_and_message_id(
+                if "type" in event_data and event_data["type"] == "embeds":
+                    message = await AsyncChats.get_message_by_id_and_message_id(
+                        request_info["chat_id"],
+                        request_info["message_id"],
+                    )
+
+                    embeds = event_data.get("data", {}).get("embeds", [])
+                    embeds.extend(message.get("embeds", []))
+
+                    await AsyncChats.upsert_message_to_chat_by_id_and_message_id(
+                        request_info["chat_id"],
+                        request_info["message_id"],
+                        {
+                            "embeds": embeds,
+                        },
+                    )
+
+                if "type" in event_data and event_data["type"] == "files":
+                    message = await AsyncChats.get_message_by_id_and_message_id(
                         request_info["chat_id"],
                         request_info["message_id"],
                     )
 
-                    sources = message.get("sources", [])
-                    sources.append(data)
+                    files = event_data.get("data", {}).get("files", [])
+                    files.extend(message.get("files", []))
 
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await AsyncChats.upsert_message_to_chat_by_id_and_message_id(
                         request_info["chat_id"],
                         request_info["message_id"],
                         {
-                            "sources": sources,
+                            "files": files,
                         },
                     )
 
+                if event_data.get("type") in ["source", "citation"]:
+                    data = event_data.get("data", {})
+                    if data.get("type") == None:
+                        message = await AsyncChats.get_message_by_id_and_message_id(
+                            request_info["chat_id"],
+                            request_info["message_id"],
+                        )
+
+                        sources = message.get("sources", [])
+                        sources.append(data)
+
+                        await AsyncChats.upsert_message_to_chat_by_id_and_message_id(
+                            request_info["chat_id"],
+                            request_info["message_id"],
+                            {
+                                "sources": sources,
+                            },
+                        )
+
     return __event_emitter__
 
 
-def get_event_call(request_info):
-    async def __event_caller__(event_data):
-        response = await sio.call(
-            "chat-events",
+async def open_chat_event_stream(task_id, user_id):
+    if CHAT_EVENT_BUFFER.maxlen > 0:
+        await CHAT_EVENT_BUFFER.open(task_id, user_id)
+        STREAMED_TASK_IDS.add(task_id)
+
+
+async def close_chat_event_stream(request_info):
+    if request_info.get("task_id") in STREAMED_TASK_IDS:
+        # Pending batched events are part of the stream too
+        await CHAT_EVENT_BATCHER.flush(
+            get_chat_event_target(request_info),
             {
                 "chat_id": request_info.get("chat_id", None),
                 "message_id": request_info.get("message_id", None),
-                "data": event_data,
             },
+        )
+        await CHAT_EVENT_BUFFER.close(request_info["task_id"])
+        STREAMED_TASK_IDS.discard(request_info["task_id"])
+
+
+def get_event_call(request_info):
+    async def __event_caller__(event_data):
+        payload = {
+            "chat_id": request_info.get("chat_id", None),
+            "message_id": request_info.get("message_id", None),
+            "data": event_data,
+        }
+
+        # Deliver batched events first so the client sees them in order
+        if request_info.get("user_id"):
+            await CHAT_EVENT_BATCHER.flush(get_chat_event_target(request_info), payload)
+
+        if not request_info.get("session_id"):
+            # Clients reading the events over SSE can't answer
+            return None
+
+        response = await sio.call(
+            "chat-events",
+            payload,
             to=request_info["session_id"],
         )
         return response
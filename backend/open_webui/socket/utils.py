@@ -1,198 +1,417 @@
+import asyncio
 import json
-import uuid
-from open_webui.utils.redis import get_redis_connection
-from open_webui.env import REDIS_KEY_PREFIX
-from typing import Optional, List, Tuple
+import logging
+import time
+from collections import deque
+from open_webui.env import (
+    CHAT_EVENT_BATCH_MAX_WINDOW,
+    CHAT_EVENT_BATCH_WINDOW,
+    CHAT_EVENT_BUFFER_SIZE,
+    CHAT_EVENT_BUFFER_TTL,
+    REDIS_KEY_PREFIX,
+    SRC_LOG_LEVELS,
+    YDOC_COMPACTION_IDLE_TIMEOUT,
+    YDOC_COMPACTION_THRESHOLD,
+    YDOC_SAVE_DEBOUNCE,
+    YDOC_SAVE_MAX_DELAY,
+)
+from typing import Any, Awaitable, Callable, Optional, List, Tuple
 import pycrdt as Y
 
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
 
-class RedisLock:
-    def __init__(
-        self,
-        redis_url,
-        lock_name,
-        timeout_secs,
-        redis_sentinels=[],
-        redis_cluster=False,
-    ):
 
-        self.lock_name = lock_name
-        self.lock_id = str(uuid.uuid4())
-        self.timeout_secs = timeout_secs
-        self.lock_obtained = False
-        self.redis = get_redis_connection(
-            redis_url,
-            redis_sentinels,
-            redis_cluster=redis_cluster,
-            decode_responses=True,
-        )
+# Atomically drop a session and, if it was the user's last one, the user's active status
+REMOVE_SESSION_SCRIPT = """
+redis.call('HDEL', KEYS[1], ARGV[1])
+redis.call('SREM', KEYS[2], ARGV[1])
+if redis.call('SCARD', KEYS[2]) == 0 then
+    redis.call('SREM', KEYS[3], ARGV[2])
+end
+"""
 
-    def aquire_lock(self):
-        # nx=True will only set this key if it _hasn't_ already been set
-        self.lock_obtained = self.redis.set(
-            self.lock_name, self.lock_id, nx=True, ex=self.timeout_secs
-        )
-        return self.lock_obtained
 
-    def renew_lock(self):
-        # xx=True will only set this key if it _has_ already been set
-        return self.redis.set(
-            self.lock_name, self.lock_id, xx=True, ex=self.timeout_secs
-        )
+class SessionPool:
+    """
+    Connected Socket.IO sessions and the users they belong to.
 
-    def release_lock(self):
-        lock_value = self.redis.get(self.lock_name)
-        if lock_value and lock_value == self.lock_id:
-            self.redis.delete(self.lock_name)
+    With Redis, sessions are kept in a hash (sid -> user), each user's session
+    ids in a set, and the ids of users with at least one session in another set,
+    so membership changes are atomic across instances. The keys share a hash
+    tag, so they're in the same Redis Cluster slot.
+    """
 
+    def __init__(self, redis=None, redis_key_prefix: str = REDIS_KEY_PREFIX):
+        self._redis = redis
+        self._sessions_key = f"{{{redis_key_prefix}}}:session_pool"
+        self._user_sessions_key = f"{{{redis_key_prefix}}}:user_sessions"
+        self._active_users_key = f"{{{redis_key_prefix}}}:active_users"
 
-class RedisDict:
-    def __init__(self, name, redis_url, redis_sentinels=[], redis_cluster=False):
-        self.name = name
-        self.redis = get_redis_connection(
-            redis_url,
-            redis_sentinels,
-            redis_cluster=redis_cluster,
-            decode_responses=True,
-        )
+        self._sessions = {}
+        self._user_sessions = {}
 
-    def __setitem__(self, key, value):
-        serialized_value = json.dumps(value)
-        self.redis.hset(self.name, key, serialized_value)
+    def _get_user_sessions_key(self, user_id: str) -> str:
+        return f"{self._user_sessions_key}:{user_id}"
 
-    def __getitem__(self, key):
-        value = self.redis.hget(self.name, key)
-        if value is None:
-            raise KeyError(key)
-        return json.loads(value)
+    async def add(self, sid: str, user: dict):
+        user_id = user["id"]
 
-    def __delitem__(self, key):
-        result = self.redis.hdel(self.name, key)
-        if result == 0:
-            raise KeyError(key)
+        if self._redis:
+            pipe = self._redis.pipeline()
+            pipe.hset(self._sessions_key, sid, json.dumps(user))
+            pipe.sadd(self._get_user_sessions_key(user_id), sid)
+            pipe.sadd(self._active_users_key, user_id)
+            await pipe.execute()
+        else:
+            self._sessions[sid] = user
+            self._user_sessions.setdefault(user_id, set()).add(sid)
 
-    def __contains__(self, key):
-        return self.redis.hexists(self.name, key)
+    async def remove(self, sid: str) -> Optional[dict]:
+        user = await self.get(sid)
+        if user is None:
+            return None
 
-    def __len__(self):
-        return self.redis.hlen(self.name)
+        user_id = user["id"]
+        if self._redis:
+            await self._redis.eval(
+                REMOVE_SESSION_SCRIPT,
+                3,
+                self._sessions_key,
+                self._get_user_sessions_key(user_id),
+                self._active_users_key,
+                sid,
+                user_id,
+            )
+        else:
+            self._sessions.pop(sid, None)
+            sessions = self._user_sessions.get(user_id, set())
+            sessions.discard(sid)
+            if not sessions:
+                self._user_sessions.pop(user_id, None)
 
-    def keys(self):
-        return self.redis.hkeys(self.name)
+        return user
 
-    def values(self):
-        return [json.loads(v) for v in self.redis.hvals(self.name)]
+    async def get(self, sid: str) -> Optional[dict]:
+        if self._redis:
+            value = await self._redis.hget(self._sessions_key, sid)
+            return json.loads(value) if value else None
+        return self._sessions.get(sid)
 
-    def items(self):
-        return [(k, json.loads(v)) for k, v in self.redis.hgetall(self.name).items()]
+    async def get_many(self, sids: List[str]) -> List[Optional[dict]]:
+        if not sids:
+            return []
 
-    def get(self, key, default=None):
-        try:
-            return self[key]
-        except KeyError:
-            return default
+        if self._redis:
+            values = await self._redis.hmget(self._sessions_key, sids)
+            return [json.loads(value) if value else None for value in values]
+        return [self._sessions.get(sid) for sid in sids]
+
+    async def contains(self, sid: str) -> bool:
+        if self._redis:
+            return bool(await self._redis.hexists(self._sessions_key, sid))
+        return sid in self._sessions
+
+    async def get_session_ids(self, user_id: str) -> List[str]:
+        if self._redis:
+            return list(
+                await self._redis.smembers(self._get_user_sessions_key(user_id))
+            )
+        return list(self._user_sessions.get(user_id, []))
+
+    async def get_active_user_ids(self) -> List[str]:
+        if self._redis:
+            return list(await self._redis.smembers(self._active_users_key))
+        return list(self._user_sessions.keys())
 
-    def clear(self):
-        self.redis.delete(self.name)
+    async def is_active(self, user_id: str) -> bool:
+        if self._redis:
+            return bool(await self._redis.exists(self._get_user_sessions_key(user_id)))
+        return user_id in self._user_sessions
 
-    def update(self, other=None, **kwargs):
-        if other is not None:
-            for k, v in other.items() if hasattr(other, "items") else other:
-                self[k] = v
-        for k, v in kwargs.items():
-            self[k] = v
 
-    def setdefault(self, key, default=None):
-        if key not in self:
-            self[key] = default
-        return self[key]
+class UsagePool:
+    """
+    Models currently in use. Clients report usage periodically; a model counts
+    as in use until `timeout` seconds after its last report, so stale entries
+    expire on their own without a cleanup task.
+    """
+
+    def __init__(
+        self, redis=None, redis_key_prefix: str = REDIS_KEY_PREFIX, timeout: int = 3
+    ):
+        self._redis = redis
+        self._key = f"{redis_key_prefix}:models_in_use"
+        self.timeout = timeout
+
+        self._models = {}
+
+    async def touch(self, model_id: str):
+        now = time.time()
+
+        if self._redis:
+            pipe = self._redis.pipeline()
+            pipe.zadd(self._key, {model_id: now})
+            pipe.expire(self._key, int(self.timeout * 2) + 1)
+            await pipe.execute()
+        else:
+            self._models[model_id] = now
+
+    async def get_models_in_use(self) -> List[str]:
+        expires_before = time.time() - self.timeout
+
+        if self._redis:
+            pipe = self._redis.pipeline()
+            pipe.zremrangebyscore(self._key, "-inf", expires_before)
+            pipe.zrange(self._key, 0, -1)
+            _, model_ids = await pipe.execute()
+            return list(model_ids)
+
+        for model_id, updated_at in list(self._models.items()):
+            if updated_at < expires_before:
+                del self._models[model_id]
+        return list(self._models.keys())
+
+
+def decode_ydoc_update(value: bytes) -> bytes:
+    # Updates used to be stored as JSON lists of ints
+    if value[:1] == b"[" and value[-1:] == b"]":
+        try:
+            return bytes(json.loads(value))
+        except ValueError:
+            pass
+    return value
+
+
+def merge_ydoc_updates(updates: List[bytes]) -> bytes:
+    ydoc = Y.Doc()
+    for update in updates:
+        ydoc.apply_update(update)
+    return ydoc.get_update()
 
 
 class YdocManager:
+    """
+    Stores collaborative document updates (raw Yjs update bytes) and periodically
+    compacts them into a single snapshot, so loading a document only replays
+    the snapshot plus the updates received since the last compaction.
+
+    The Redis client must be binary safe (`decode_responses=False`). The keys
+    of a document share a hash tag, so they're in the same Redis Cluster slot,
+    and pipelines across documents are not transactions.
+    """
+
     def __init__(
         self,
         redis=None,
         redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:ydoc:documents",
+        compaction_threshold: int = YDOC_COMPACTION_THRESHOLD,
+        idle_timeout: float = YDOC_COMPACTION_IDLE_TIMEOUT,
     ):
         self._updates = {}
+        self._snapshots = {}
         self._users = {}
+        self._sessions = {}
         self._redis = redis
         self._redis_key_prefix = redis_key_prefix
 
+        self.compaction_threshold = compaction_threshold
+        self.idle_timeout = idle_timeout
+
+        # Documents updated through this instance that have not been compacted yet
+        self._last_updated = {}
+
+    def _get_key(self, document_id: str, name: str) -> str:
+        return f"{self._redis_key_prefix}:{{{document_id}}}:{name}"
+
     async def append_to_updates(self, document_id: str, update: bytes):
         document_id = document_id.replace(":", "_")
+        update = bytes(update)
+
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.rpush(redis_key, json.dumps(list(update)))
+            count = await self._redis.rpush(
+                self._get_key(document_id, "updates"), update
+            )
         else:
             if document_id not in self._updates:
                 self._updates[document_id] = []
             self._updates[document_id].append(update)
+            count = len(self._updates[document_id])
 
-    async def get_updates(self, document_id: str) -> List[bytes]:
-        document_id = document_id.replace(":", "_")
+        self._last_updated[document_id] = time.monotonic()
+        if count >= self.compaction_threshold:
+            await self._compact(document_id)
 
+    async def _load(self, document_id: str) -> Tuple[Optional[bytes], List[bytes]]:
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            updates = await self._redis.lrange(redis_key, 0, -1)
-            return [bytes(json.loads(update)) for update in updates]
+            # The tail is read before the snapshot: a compaction in between only
+            # means some updates are applied twice, which Yjs ignores.
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.lrange(self._get_key(document_id, "updates"), 0, -1)
+            pipe.get(self._get_key(document_id, "snapshot"))
+            updates, snapshot = await pipe.execute()
+            return snapshot, [decode_ydoc_update(update) for update in updates]
         else:
-            return self._updates.get(document_id, [])
+            return self._snapshots.get(document_id), list(
+                self._updates.get(document_id, [])
+            )
+
+    async def get_updates(self, document_id: str) -> List[bytes]:
+        document_id = document_id.replace(":", "_")
+
+        snapshot, updates = await self._load(document_id)
+        return ([snapshot] if snapshot else []) + updates
+
+    async def get_state(
+        self, document_id: str, state_vector: Optional[bytes] = None
+    ) -> Tuple[bytes, bytes]:
+        """
+        Encode the document as a single update, along with the document's state
+        vector. If the client's state vector is given, only the changes the
+        client is missing are encoded.
+        """
+        ydoc = Y.Doc()
+        for update in await self.get_updates(document_id):
+            ydoc.apply_update(update)
+
+        if state_vector:
+            return ydoc.get_update(state_vector), ydoc.get_state()
+        return ydoc.get_update(), ydoc.get_state()
+
+    async def compact_document(self, document_id: str):
+        await self._compact(document_id.replace(":", "_"))
+
+    async def _compact(self, document_id: str):
+        self._last_updated.pop(document_id, None)
+
+        if not self._redis:
+            updates = self._updates.get(document_id, [])
+            snapshot = self._snapshots.get(document_id)
+            if len(updates) > (0 if snapshot else 1):
+                self._snapshots[document_id] = merge_ydoc_updates(
+                    ([snapshot] if snapshot else []) + updates
+                )
+                self._updates[document_id] = []
+            return
+
+        lock_key = self._get_key(document_id, "compaction_lock")
+        if not await self._redis.set(lock_key, b"1", nx=True, ex=30):
+            # Another instance is already compacting this document
+            return
+
+        try:
+            snapshot, updates = await self._load(document_id)
+            if len(updates) <= (0 if snapshot else 1):
+                return
+
+            snapshot = merge_ydoc_updates(([snapshot] if snapshot else []) + updates)
+
+            # Write the snapshot before trimming so readers never miss updates;
+            # anything appended since the read is kept.
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.set(self._get_key(document_id, "snapshot"), snapshot)
+            pipe.ltrim(self._get_key(document_id, "updates"), len(updates), -1)
+            await pipe.execute()
+        finally:
+            await self._redis.delete(lock_key)
+
+    async def compact_idle_documents(self):
+        now = time.monotonic()
+        for document_id, last_updated in list(self._last_updated.items()):
+            if now - last_updated >= self.idle_timeout:
+                await self._compact(document_id)
 
     async def document_exists(self, document_id: str) -> bool:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            return await self._redis.exists(redis_key) > 0
+            return (
+                await self._redis.exists(
+                    self._get_key(document_id, "updates"),
+                    self._get_key(document_id, "snapshot"),
+                )
+                > 0
+            )
         else:
-            return document_id in self._updates
+            return document_id in self._updates or document_id in self._snapshots
 
     async def get_users(self, document_id: str) -> List[str]:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            users = await self._redis.smembers(redis_key)
-            return list(users)
+            users = await self._redis.smembers(self._get_key(document_id, "users"))
+            return [user.decode() for user in users]
         else:
             return self._users.get(document_id, [])
 
+    def _get_session_key(self, user_id: str) -> str:
+        # Documents joined by a session, so disconnects only touch those
+        return f"{self._redis_key_prefix}:session:{user_id}:documents"
+
     async def add_user(self, document_id: str, user_id: str):
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.sadd(redis_key, user_id)
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.sadd(self._get_key(document_id, "users"), user_id)
+            pipe.sadd(self._get_session_key(user_id), document_id)
+            await pipe.execute()
         else:
             if document_id not in self._users:
                 self._users[document_id] = set()
             self._users[document_id].add(user_id)
+            self._sessions.setdefault(user_id, set()).add(document_id)
 
     async def remove_user(self, document_id: str, user_id: str):
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.srem(redis_key, user_id)
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.srem(self._get_key(document_id, "users"), user_id)
+            pipe.srem(self._get_session_key(user_id), document_id)
+            await pipe.execute()
         else:
             if document_id in self._users and user_id in self._users[document_id]:
                 self._users[document_id].remove(user_id)
+            self._sessions.get(user_id, set()).discard(document_id)
 
     async def remove_user_from_all_documents(self, user_id: str):
         if self._redis:
-            keys = await self._redis.keys(f"{self._redis_key_prefix}:*")
-            for key in keys:
-                if key.endswith(":users"):
-                    await self._redis.srem(key, user_id)
-
-                    document_id = key.split(":")[-2]
-                    if len(await self.get_users(document_id)) == 0:
-                        await self.clear_document(document_id)
+            session_key = self._get_session_key(user_id)
+            document_ids = [
+                document_id.decode()
+                for document_id in await self._redis.smembers(session_key)
+            ]
+            if not document_ids:
+                return
+
+            pipe = self._redis.pipeline(transaction=False)
+            for document_id in document_ids:
+                pipe.srem(self._get_key(document_id, "users"), user_id)
+                pipe.scard(self._get_key(document_id, "users"))
+            pipe.delete(session_key)
+            results = await pipe.execute()
+
+            # Every document contributes an (srem, scard) pair of results
+            empty_document_ids = [
+                document_id
+                for document_id, remaining in zip(document_ids, results[1:-1:2])
+                if remaining == 0
+            ]
+            if empty_document_ids:
+                pipe = self._redis.pipeline(transaction=False)
+                for document_id in empty_document_ids:
+                    self._last_updated.pop(document_id, None)
+                    pipe.delete(
+                        self._get_key(document_id, "updates"),
+                        self._get_key(document_id, "snapshot"),
+                        self._get_key(document_id, "users"),
+                    )
+                await pipe.execute()
 
         else:
-            for document_id in list(self._users.keys()):
-                if user_id in self._users[document_id]:
+            for document_id in self._sessions.pop(user_id, set()):
+                if user_id in self._users.get(document_id, set()):
                     self._users[document_id].remove(user_id)
                     if not self._users[document_id]:
                         del self._users[document_id]
@@ -201,14 +420,329 @@ class YdocManager:
 
     async def clear_document(self, document_id: str):
         document_id = document_id.replace(":", "_")
+        self._last_updated.pop(document_id, None)
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.delete(redis_key)
-            redis_users_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.delete(redis_users_key)
+            await self._redis.delete(
+                self._get_key(document_id, "updates"),
+                self._get_key(document_id, "snapshot"),
+                self._get_key(document_id, "users"),
+            )
         else:
             if document_id in self._updates:
                 del self._updates[document_id]
+            if document_id in self._snapshots:
+                del self._snapshots[document_id]
             if document_id in self._users:
                 del self._users[document_id]
+
+
+class DocumentSaveScheduler:
+    """
+    Coalesces saves of collaborative documents. Each document with pending
+    changes has a single worker task that writes the latest data once the
+    document has been quiet for `debounce` seconds, and at most `max_delay`
+    seconds after the first unsaved change.
+    """
+
+    def __init__(
+        self,
+        save_handler: Callable[[str, Any], Awaitable[None]],
+        debounce: float = YDOC_SAVE_DEBOUNCE,
+        max_delay: float = YDOC_SAVE_MAX_DELAY,
+    ):
+        self._save_handler = save_handler
+        self.debounce = debounce
+        self.max_delay = max_delay
+
+        self._pending = {}
+        self._workers = {}
+
+    def schedule(self, document_id: str, data: Any):
+        now = time.monotonic()
+
+        pending = self._pending.get(document_id)
+        if pending:
+            pending.update({"data": data, "updated_at": now})
+        else:
+            self._pending[document_id] = {
+                "data": data,
+                "created_at": now,
+                "updated_at": now,
+            }
+
+        if document_id not in self._workers:
+            self._workers[document_id] = asyncio.create_task(
+                self._run(document_id), name=f"document-save:{document_id}"
+            )
+
+    def has_pending(self, document_id: str) -> bool:
+        return document_id in self._pending
+
+    async def _run(self, document_id: str):
+        try:
+            while document_id in self._pending:
+                pending = self._pending[document_id]
+                due_at = min(
+                    pending["updated_at"] + self.debounce,
+                    pending["created_at"] + self.max_delay,
+                )
+
+                delay = due_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                del self._pending[document_id]
+                try:
+                    await self._save_handler(document_id, pending["data"])
+                except Exception as e:
+                    log.error(f"Error saving document {document_id}: {e}")
+        finally:
+            self._workers.pop(document_id, None)
+
+
+def merge_chat_events(previous: dict, event: dict) -> Optional[dict]:
+    """
+    Merge two consecutive events for the same message into one, or return None
+    if both have to be delivered.
+    """
+    previous_data = previous.get("data")
+    data = event.get("data")
+    if previous.get("type") != event.get("type"):
+        return None
+    if not isinstance(previous_data, dict) or not isinstance(data, dict):
+        return None
+
+    event_type = event.get("type")
+    if event_type == "chat:completion":
+        # Completions carry the full content so far, raw deltas (choices) are kept as is
+        if "choices" in previous_data or "choices" in data:
+            return None
+        return {**event, "data": {**previous_data, **data}}
+
+    if event_type in ("message", "chat:message:delta"):
+        content = (previous_data.get("content") or "") + (data.get("content") or "")
+        return {**event, "data": {**data, "content": content}}
+
+    if event_type in ("replace", "chat:message"):
+        return event
+
+    return None
+
+
+class ChatEventBatcher:
+    """
+    Batches chat events per room and (chat_id, message_id). Events are held for
+    `window` seconds and consecutive events that extend or supersede each other
+    (e.g. streamed content) are merged, so a burst of deltas becomes one emit.
+
+    Each batch has a single worker task that emits in order. When emitting is
+    slow (a busy Redis or slow clients) the window grows up to `max_window`, so
+    more events are coalesced into each frame, and shrinks back as emits speed up.
+    """
+
+    def __init__(
+        self,
+        emit_handler: Callable[[Any, dict], Awaitable[None]],
+        window: float = CHAT_EVENT_BATCH_WINDOW,
+        max_window: float = CHAT_EVENT_BATCH_MAX_WINDOW,
+    ):
+        self._emit_handler = emit_handler
+        self.window = window
+        self.max_window = max_window
+
+        self._pending = {}
+        self._windows = {}
+        self._wakeups = {}
+        self._workers = {}
+
+    def _get_key(self, to: Any, payload: dict) -> tuple:
+        to = tuple(to) if isinstance(to, list) else to
+        return (to, payload.get("chat_id"), payload.get("message_id"))
+
+    def add(self, to: Any, payload: dict):
+        key = self._get_key(to, payload)
+
+        pending = self._pending.setdefault(key, [])
+        merged = (
+            merge_chat_events(pending[-1]["data"], payload["data"]) if pending else None
+        )
+        if merged is not None:
+            pending[-1] = {**payload, "data": merged}
+        else:
+            pending.append(payload)
+
+        if key not in self._workers:
+            self._wakeups[key] = asyncio.Event()
+            self._workers[key] = asyncio.create_task(
+                self._run(key, to), name=f"chat-events:{key[1]}:{key[2]}"
+            )
+
+    def has_pending(self, to: Any, payload: dict) -> bool:
+        return self._get_key(to, payload) in self._pending
+
+    async def flush(self, to: Any, payload: dict):
+        """Emit pending events for the same batch now and wait until they are sent."""
+        key = self._get_key(to, payload)
+
+        worker = self._workers.get(key)
+        if worker:
+            self._wakeups[key].set()
+            await asyncio.shield(worker)
+
+    async def _run(self, key: tuple, to: Any):
+        try:
+            while self._pending.get(key):
+                window = self._windows.get(key, self.window)
+                try:
+                    await asyncio.wait_for(self._wakeups[key].wait(), window)
+                except asyncio.TimeoutError:
+                    pass
+
+                payloads = self._pending.pop(key)
+                started_at = time.monotonic()
+                for payload in payloads:
+                    try:
+                        await self._emit_handler(to, payload)
+                    except Exception as e:
+                        log.error(f"Error emitting chat event: {e}")
+
+                elapsed = time.monotonic() - started_at
+                self._windows[key] = min(
+                    self.max_window, max(self.window, (window + elapsed * 2) / 2)
+                )
+        finally:
+            self._pending.pop(key, None)
+            self._windows.pop(key, None)
+            self._wakeups.pop(key, None)
+            self._workers.pop(key, None)
+
+
+class ChatEventBuffer:
+    """
+    Bounded ring buffer of the chat events emitted for each task, so they can be
+    streamed over SSE and resumed from the last received event id.
+
+    With Redis, each task is a capped stream (XADD MAXLEN) that readers block on
+    with XREAD, otherwise events are kept in memory. Buffers expire `ttl` seconds
+    after their last event. A closed buffer ends with a `None` event.
+    """
+
+    def __init__(
+        self,
+        redis=None,
+        redis_key_prefix: str = REDIS_KEY_PREFIX,
+        maxlen: int = CHAT_EVENT_BUFFER_SIZE,
+        ttl: int = CHAT_EVENT_BUFFER_TTL,
+    ):
+        self._redis = redis
+        self._redis_key_prefix = redis_key_prefix
+        self.maxlen = maxlen
+        self.ttl = ttl
+
+        self._streams = {}
+
+    def _get_key(self, task_id: str, suffix: str) -> str:
+        return f"{self._redis_key_prefix}:chat_events:{task_id}:{suffix}"
+
+    def _expire_streams(self):
+        now = time.monotonic()
+        for task_id, stream in list(self._streams.items()):
+            if now - stream["updated_at"] > self.ttl:
+                del self._streams[task_id]
+
+    async def open(self, task_id: str, user_id: str):
+        if self._redis:
+            await self._redis.set(self._get_key(task_id, "owner"), user_id, ex=self.ttl)
+        else:
+            self._expire_streams()
+            self._streams[task_id] = {
+                "user_id": user_id,
+                "events": deque(maxlen=self.maxlen),
+                "next_id": 1,
+                "closed": False,
+                "updated_at": time.monotonic(),
+                "notify": asyncio.Event(),
+            }
+
+    async def get_owner(self, task_id: str) -> Optional[str]:
+        if self._redis:
+            return await self._redis.get(self._get_key(task_id, "owner"))
+
+        stream = self._streams.get(task_id)
+        return stream["user_id"] if stream else None
+
+    async def _append(self, task_id: str, fields: dict, payload: Optional[dict]):
+        if self._redis:
+            pipe = self._redis.pipeline()
+            pipe.xadd(
+                self._get_key(task_id, "events"),
+                fields,
+                maxlen=self.maxlen,
+                approximate=True,
+            )
+            pipe.expire(self._get_key(task_id, "events"), self.ttl)
+            pipe.expire(self._get_key(task_id, "owner"), self.ttl)
+            await pipe.execute()
+            return
+
+        stream = self._streams.get(task_id)
+        if stream is None or stream["closed"]:
+            return
+
+        stream["events"].append((str(stream["next_id"]), payload))
+        stream["next_id"] += 1
+        stream["closed"] = payload is None
+        stream["updated_at"] = time.monotonic()
+
+        # Wake up readers waiting for new events
+        stream["notify"].set()
+        stream["notify"] = asyncio.Event()
+
+    async def append(self, task_id: str, payload: dict):
+        await self._append(task_id, {"data": json.dumps(payload)}, payload)
+
+    async def close(self, task_id: str):
+        await self._append(task_id, {"end": "1"}, None)
+
+    async def read(
+        self, task_id: str, last_event_id: Optional[str] = None, timeout: float = 15
+    ) -> List[Tuple[str, Optional[dict]]]:
+        """
+        Return the events after `last_event_id` (all buffered events if not set),
+        waiting up to `timeout` seconds for new ones.
+        """
+        if self._redis:
+            response = await self._redis.xread(
+                {self._get_key(task_id, "events"): last_event_id or "0"},
+                count=self.maxlen,
+                block=int(timeout * 1000),
+            )
+            return [
+                (
+                    event_id,
+                    json.loads(fields["data"]) if "data" in fields else None,
+                )
+                for _, entries in response or []
+                for event_id, fields in entries
+            ]
+
+        stream = self._streams.get(task_id)
+        if stream is None:
+            return []
+
+        try:
+            after = int(last_event_id or 0)
+        except ValueError:
+            after = 0
+
+        events = [event for event in stream["events"] if int(event[0]) > after]
+        if not events and not stream["closed"]:
+            try:
+                await asyncio.wait_for(stream["notify"].wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            events = [event for event in stream["events"] if int(event[0]) > after]
+
+        return events
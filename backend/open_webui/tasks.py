@@ -1,5 +1,6 @@
 # tasks.py
 import asyncio
+import os
 from typing import Dict
 from uuid import uuid4
 import json
@@ -8,7 +9,13 @@ from redis.asyncio import Redis
 from fastapi import Request
 from typing import Dict, List, Optional
 
-from open_webui.env import SRC_LOG_LEVELS, REDIS_KEY_PREFIX
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    INSTANCE_ID,
+    REDIS_KEY_PREFIX,
+    TASK_HEARTBEAT_INTERVAL,
+    TASK_STOP_TIMEOUT,
+)
 
 
 log = logging.getLogger(__name__)
@@ -18,12 +25,39 @@ log.setLevel(SRC_LOG_LEVELS["MAIN"])
 tasks: Dict[str, asyncio.Task] = {}
 item_tasks = {}
 
+# Owner of the tasks created here, unique per worker process even with a fixed INSTANCE_ID
+OWNER_ID = f"{INSTANCE_ID}:{os.getpid()}"
 
-REDIS_TASKS_KEY = f"{REDIS_KEY_PREFIX}:tasks"
-REDIS_ITEM_TASKS_KEY = f"{REDIS_KEY_PREFIX}:tasks:item"
+
+# The task keys share a hash tag, so pipelines over them stay in one Redis
+# Cluster slot
+REDIS_TASKS_KEY = f"{{{REDIS_KEY_PREFIX}:tasks}}"
+REDIS_TASK_OWNERS_KEY = f"{REDIS_TASKS_KEY}:owners"
+REDIS_ITEM_TASKS_KEY = f"{REDIS_TASKS_KEY}:item"
+REDIS_HEARTBEAT_KEY = f"{REDIS_TASKS_KEY}:heartbeat"
+REDIS_ACK_KEY = f"{REDIS_TASKS_KEY}:ack"
 REDIS_PUBSUB_CHANNEL = f"{REDIS_KEY_PREFIX}:tasks:commands"
 
 
+async def stop_local_task(task_id: str) -> dict:
+    task = tasks.pop(task_id, None)
+    if not task:
+        return {"status": False, "message": f"Task with ID {task_id} not found."}
+
+    task.cancel()  # Request task cancellation
+    try:
+        await task  # Wait for the task to handle the cancellation
+    except asyncio.CancelledError:
+        # Task successfully canceled
+        pass
+    except Exception as e:
+        log.debug(f"Task {task_id} failed while stopping: {e}")
+
+    if not task.done():
+        return {"status": False, "message": f"Failed to stop task {task_id}."}
+    return {"status": True, "message": f"Task {task_id} successfully stopped."}
+
+
 async def redis_task_command_listener(app):
     redis: Redis = app.state.redis
     pubsub = redis.pubsub()
@@ -36,13 +70,26 @@ async def redis_task_command_listener(app):
             command = json.loads(message["data"])
             if command.get("action") == "stop":
                 task_id = command.get("task_id")
-                local_task = tasks.get(task_id)
-                if local_task:
-                    local_task.cancel()
+                if task_id not in tasks and command.get("owner_id") != OWNER_ID:
+                    continue
+
+                asyncio.create_task(redis_handle_stop_command(redis, command))
         except Exception as e:
             log.exception(f"Error handling distributed task command: {e}")
 
 
+async def redis_handle_stop_command(redis: Redis, command: dict):
+    result = await stop_local_task(command["task_id"])
+
+    # Acknowledge to the instance waiting in stop_task
+    if command.get("ack_id"):
+        ack_key = f"{REDIS_ACK_KEY}:{command['ack_id']}"
+        pipe = redis.pipeline()
+        pipe.rpush(ack_key, json.dumps(result))
+        pipe.expire(ack_key, TASK_STOP_TIMEOUT * 2)
+        await pipe.execute()
+
+
 ### ------------------------------
 ### REDIS-ENABLED HANDLERS
 ### ------------------------------
@@ -51,33 +98,113 @@ async def redis_task_command_listener(app):
 async def redis_save_task(redis: Redis, task_id: str, item_id: Optional[str]):
     pipe = redis.pipeline()
     pipe.hset(REDIS_TASKS_KEY, task_id, item_id or "")
+    pipe.hset(REDIS_TASK_OWNERS_KEY, task_id, OWNER_ID)
     if item_id:
         pipe.sadd(f"{REDIS_ITEM_TASKS_KEY}:{item_id}", task_id)
     await pipe.execute()
 
 
-async def redis_cleanup_task(redis: Redis, task_id: str, item_id: Optional[str]):
+async def redis_cleanup_tasks(redis: Redis, task_items: Dict[str, Optional[str]]):
     pipe = redis.pipeline()
-    pipe.hdel(REDIS_TASKS_KEY, task_id)
-    if item_id:
-        pipe.srem(f"{REDIS_ITEM_TASKS_KEY}:{item_id}", task_id)
-        if (await pipe.scard(f"{REDIS_ITEM_TASKS_KEY}:{item_id}").execute())[-1] == 0:
-            pipe.delete(f"{REDIS_ITEM_TASKS_KEY}:{item_id}")  # Remove if empty set
+    for task_id, item_id in task_items.items():
+        pipe.hdel(REDIS_TASKS_KEY, task_id)
+        pipe.hdel(REDIS_TASK_OWNERS_KEY, task_id)
+        if item_id:
+            # Redis deletes the set along with its last member
+            pipe.srem(f"{REDIS_ITEM_TASKS_KEY}:{item_id}", task_id)
     await pipe.execute()
 
 
+async def redis_cleanup_task(redis: Redis, task_id: str, item_id: Optional[str]):
+    await redis_cleanup_tasks(redis, {task_id: item_id})
+
+
+async def redis_get_live_owners(redis: Redis, owner_ids: List[str]) -> set:
+    owner_ids = list(set(owner_ids))
+
+    pipe = redis.pipeline()
+    for owner_id in owner_ids:
+        pipe.exists(f"{REDIS_HEARTBEAT_KEY}:{owner_id}")
+    results = await pipe.execute()
+
+    return {owner_id for owner_id, exists in zip(owner_ids, results) if exists}
+
+
+async def redis_filter_live_tasks(redis: Redis, task_ids: List[str]) -> List[str]:
+    if not task_ids:
+        return []
+
+    owners = dict(zip(task_ids, await redis.hmget(REDIS_TASK_OWNERS_KEY, task_ids)))
+    live_owners = await redis_get_live_owners(
+        redis, [owner_id for owner_id in owners.values() if owner_id]
+    )
+
+    # Tasks without an owner were registered before owners were tracked
+    return [
+        task_id
+        for task_id in task_ids
+        if not owners[task_id] or owners[task_id] in live_owners
+    ]
+
+
 async def redis_list_tasks(redis: Redis) -> List[str]:
-    return list(await redis.hkeys(REDIS_TASKS_KEY))
+    return await redis_filter_live_tasks(
+        redis, list(await redis.hkeys(REDIS_TASKS_KEY))
+    )
 
 
 async def redis_list_item_tasks(redis: Redis, item_id: str) -> List[str]:
-    return list(await redis.smembers(f"{REDIS_ITEM_TASKS_KEY}:{item_id}"))
+    return await redis_filter_live_tasks(
+        redis, list(await redis.smembers(f"{REDIS_ITEM_TASKS_KEY}:{item_id}"))
+    )
 
 
 async def redis_send_command(redis: Redis, command: dict):
     await redis.publish(REDIS_PUBSUB_CHANNEL, json.dumps(command))
 
 
+async def redis_reap_orphaned_tasks(redis: Redis) -> int:
+    """
+    Remove the tasks of processes whose heartbeat expired, e.g. after a crash.
+    """
+    owners = await redis.hgetall(REDIS_TASK_OWNERS_KEY)
+    if not owners:
+        return 0
+
+    live_owners = await redis_get_live_owners(redis, list(owners.values()))
+    orphaned_task_ids = [
+        task_id for task_id, owner_id in owners.items() if owner_id not in live_owners
+    ]
+    if not orphaned_task_ids:
+        return 0
+
+    item_ids = await redis.hmget(REDIS_TASKS_KEY, orphaned_task_ids)
+    await redis_cleanup_tasks(redis, dict(zip(orphaned_task_ids, item_ids)))
+
+    log.info(f"Removed {len(orphaned_task_ids)} orphaned tasks")
+    return len(orphaned_task_ids)
+
+
+async def redis_task_heartbeat(app):
+    """
+    Keep this process's heartbeat alive and reap the tasks of dead processes.
+    """
+    redis: Redis = app.state.redis
+
+    while True:
+        try:
+            await redis.set(
+                f"{REDIS_HEARTBEAT_KEY}:{OWNER_ID}",
+                INSTANCE_ID,
+                ex=TASK_HEARTBEAT_INTERVAL * 3,
+            )
+            await redis_reap_orphaned_tasks(redis)
+        except Exception as e:
+            log.error(f"Error updating task heartbeat: {e}")
+
+        await asyncio.sleep(TASK_HEARTBEAT_INTERVAL)
+
+
 async def cleanup_task(redis, task_id: str, id=None):
     """
     Remove a completed or canceled task from the global `tasks` dictionary.
@@ -94,12 +221,12 @@ async def cleanup_task(redis, task_id: str, id=None):
             item_tasks.pop(id, None)
 
 
-async def create_task(redis, coroutine, id=None):
+async def create_task(redis, coroutine, id=None, task_id=None):
     """
     Create a new asyncio task and add it to the global task dictionary.
     """
-    task_id = str(uuid4())  # Generate a unique ID for the task
-    task = asyncio.create_task(coroutine)  # Create the task
+    task_id = task_id or str(uuid4())  # Generate a unique ID for the task
+    task = asyncio.create_task(coroutine, name=f"task:{task_id}")  # Create the task
 
     # Add a done callback for cleanup
     task.add_done_callback(
@@ -141,30 +268,41 @@ async def stop_task(redis, task_id: str):
     """
     Cancel a running task and remove it from the global task list.
     """
-    if redis:
-        # PUBSUB: All instances check if they have this task, and stop if so.
-        await redis_send_command(
-            redis,
-            {
-                "action": "stop",
-                "task_id": task_id,
-            },
+    if task_id in tasks or not redis:
+        return await stop_local_task(task_id)
+
+    owner_id = await redis.hget(REDIS_TASK_OWNERS_KEY, task_id)
+    if owner_id and not await redis_get_live_owners(redis, [owner_id]):
+        await redis_cleanup_task(
+            redis, task_id, await redis.hget(REDIS_TASKS_KEY, task_id)
         )
-        # Optionally check if task_id still in Redis a few moments later for feedback?
-        return {"status": True, "message": f"Stop signal sent for {task_id}"}
+        owner_id = None
 
-    task = tasks.pop(task_id, None)
-    if not task:
+    if not owner_id and not await redis.hexists(REDIS_TASKS_KEY, task_id):
         return {"status": False, "message": f"Task with ID {task_id} not found."}
 
-    task.cancel()  # Request task cancellation
-    try:
-        await task  # Wait for the task to handle the cancellation
-    except asyncio.CancelledError:
-        # Task successfully canceled
-        return {"status": True, "message": f"Task {task_id} successfully stopped."}
+    # PUBSUB: The instance running the task stops it and acknowledges
+    ack_id = str(uuid4())
+    await redis_send_command(
+        redis,
+        {
+            "action": "stop",
+            "task_id": task_id,
+            "owner_id": owner_id,
+            "ack_id": ack_id,
+        },
+    )
+
+    response = await redis.blpop(
+        [f"{REDIS_ACK_KEY}:{ack_id}"], timeout=TASK_STOP_TIMEOUT
+    )
+    if response is None:
+        return {
+            "status": False,
+            "message": f"Stop signal sent for {task_id}, but it was not acknowledged.",
+        }
 
-    return {"status": False, "message": f"Failed to stop task {task_id}."}
+    return json.loads(response[1])
 
 
 async def stop_item_tasks(redis: Redis, item_id: str):
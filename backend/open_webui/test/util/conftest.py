@@ -0,0 +1,103 @@
+import importlib.util
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from open_webui.models import chats, folders, tags
+from open_webui.models.chats import Chat, ChatForm, Chats
+from open_webui.models.folders import Folder
+from open_webui.models.tags import ChatTag, Tag, Tags
+
+MIGRATIONS_DIR = Path(chats.__file__).parent.parent / "migrations" / "versions"
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: timing benchmark, only run with RUN_BENCHMARKS=1"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # Wall clock assertions are flaky on shared machines
+    if os.environ.get("RUN_BENCHMARKS"):
+        return
+
+    skip = pytest.mark.skip(reason="timing benchmark, set RUN_BENCHMARKS=1 to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def engine():
+    """
+    In-memory database with the chat, tag and folder tables, used by `Chats`,
+    `Tags` and `Folders`. Chat search is unavailable.
+    """
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    for table in [Chat, Tag, ChatTag, Folder]:
+        table.__table__.create(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    @contextmanager
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    with (
+        patch.object(chats, "get_db", get_db),
+        patch.object(tags, "get_db", get_db),
+        patch.object(folders, "get_db", get_db),
+        patch.object(chats.ChatSearch, "is_available", return_value=False),
+    ):
+        yield engine
+
+
+@pytest.fixture
+def new_chat(engine):
+    """Inserts a chat titled `title` with the given tags."""
+
+    def insert(title, *tag_names, user_id="user-1"):
+        chat = Chats.insert_new_chat(user_id, ChatForm(chat={"title": title}))
+        for tag_name in tag_names:
+            Chats.add_chat_tag_by_id_and_user_id_and_tag_name(
+                chat.id, user_id, tag_name
+            )
+        return chat
+
+    return insert
+
+
+@pytest.fixture
+def get_tag_ids(engine):
+    """Sorted ids of the tags of a user."""
+
+    def get(user_id="user-1"):
+        return sorted(tag.id for tag in Tags.get_tags_by_user_id(user_id))
+
+    return get
+
+
+@pytest.fixture
+def load_migration():
+    """Loads the migration module whose file name ends with `_{name}.py`."""
+
+    def load(name: str):
+        path = next(MIGRATIONS_DIR.glob(f"*_{name}.py"))
+        spec = importlib.util.spec_from_file_location(path.stem, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    return load
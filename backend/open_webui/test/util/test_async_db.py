@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from open_webui.internal.db import AsyncTable
+from open_webui.utils.loop_monitor import EventLoopMonitor
+
+
+class FakeTable:
+    name = "fake"
+
+    def get_thread_name(self, suffix=""):
+        return threading.current_thread().name + suffix
+
+
+class TestAsyncTable:
+    @pytest.mark.asyncio
+    async def test_methods_run_on_db_executor(self):
+        table = AsyncTable(FakeTable())
+
+        assert table.name == "fake"
+        assert (
+            await table.get_thread_name(suffix="!")
+            != threading.current_thread().name + "!"
+        )
+        assert (await table.get_thread_name()).startswith("db")
+
+
+class TestEventLoopMonitor:
+    @pytest.mark.asyncio
+    async def test_blocking_call_is_recorded(self):
+        monitor = EventLoopMonitor(interval=0.01, threshold=0.05)
+        monitor.start()
+
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)
+        await asyncio.sleep(0.02)
+        monitor.stop()
+
+        assert monitor.blocked_count >= 1
+        assert monitor.max_lag >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_is_attributed_to_task(self):
+        monitor = EventLoopMonitor(interval=0.01, threshold=0.05)
+        monitor.start()
+
+        async def blocking_handler():
+            time.sleep(0.2)
+
+        await asyncio.sleep(0.02)
+        await asyncio.create_task(blocking_handler(), name="task:123")
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+        event = monitor.get_stats()["events"][0]
+        assert event["label"] == "task:123"
+        assert "blocking_handler" in "".join(event["stack"])
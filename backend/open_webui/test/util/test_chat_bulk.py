@@ -0,0 +1,101 @@
+import time
+
+from sqlalchemy import event
+
+from open_webui.models.chats import Chat, ChatBulkForm, Chats
+
+
+class TestBulkChatOperations:
+    def test_tag_move_and_archive(self, new_chat, get_tag_ids):
+        a = new_chat("a", "work")
+        b = new_chat("b", "work", "old")
+        other = new_chat("other", user_id="user-2")
+
+        ids = Chats.bulk_update_chats_by_user_id(
+            "user-1",
+            ChatBulkForm(
+                chat_ids=[a.id, b.id, other.id, "missing"],
+                folder_id="folder-1",
+                add_tags=["Urgent"],
+                remove_tags=["old"],
+            ),
+        )
+
+        assert sorted(ids) == sorted([a.id, b.id])
+        for id in ids:
+            chat = Chats.get_chat_by_id(id)
+            assert chat.folder_id == "folder-1"
+            assert chat.meta["tags"] == ["work", "urgent"]
+        assert Chats.get_chat_by_id(other.id).folder_id is None
+        assert get_tag_ids() == ["urgent", "work"]
+        assert Chats.count_chats_by_tag_name_and_user_id("urgent", "user-1") == 2
+
+        # Tags added while archiving are left without unarchived chats too
+        Chats.bulk_update_chats_by_user_id(
+            "user-1",
+            ChatBulkForm(chat_ids=[a.id, b.id], archived=True, add_tags=["later"]),
+        )
+        assert get_tag_ids() == []
+
+        Chats.bulk_update_chats_by_user_id(
+            "user-1", ChatBulkForm(chat_ids=[a.id], archived=False, folder_id=None)
+        )
+        chat = Chats.get_chat_by_id(a.id)
+        assert not chat.archived and chat.folder_id is None
+        assert get_tag_ids() == ["later", "urgent", "work"]
+
+    def test_delete(self, new_chat, get_tag_ids):
+        a = new_chat("a", "work")
+        b = new_chat("b", "work", "old")
+        Chats.insert_shared_chat_by_chat_id(b.id)
+
+        ids = Chats.bulk_update_chats_by_user_id(
+            "user-1", ChatBulkForm(chat_ids=[b.id], delete=True)
+        )
+
+        assert ids == [b.id]
+        assert [chat.id for chat in Chats.get_chats()] == [a.id]
+        assert get_tag_ids() == ["work"]
+
+
+class TestBulkChatOperationsAtScale:
+    def test_10000_chats(self, engine, get_tag_ids):
+        now = int(time.time())
+        with engine.begin() as conn:
+            conn.execute(
+                Chat.__table__.insert(),
+                [
+                    {
+                        "id": f"chat-{i:05d}",
+                        "user_id": "user-1",
+                        "title": str(i),
+                        "chat": {"title": str(i)},
+                        "meta": {},
+                        "archived": False,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for i in range(10000)
+                ],
+            )
+        ids = [f"chat-{i:05d}" for i in range(10000)]
+
+        statements = []
+        event.listen(
+            engine, "before_cursor_execute", lambda *args: statements.append(1)
+        )
+
+        Chats.bulk_update_chats_by_user_id(
+            "user-1", ChatBulkForm(chat_ids=ids, archived=True, add_tags=["old"])
+        )
+        update_queries = len(statements)
+
+        statements.clear()
+        Chats.bulk_update_chats_by_user_id(
+            "user-1", ChatBulkForm(chat_ids=ids, delete=True)
+        )
+        delete_queries = len(statements)
+
+        assert Chats.get_chats() == []
+        assert get_tag_ids() == []
+        assert update_queries < 100 and delete_queries < 100
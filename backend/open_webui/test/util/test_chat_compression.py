@@ -0,0 +1,207 @@
+import base64
+import json
+import random
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+
+from open_webui.models import chats
+from open_webui.models.chats import Chat, ChatForm, Chats, ChatTable
+from open_webui.utils.compression import (
+    ZSTD_AVAILABLE,
+    compress_json,
+    decompress_json,
+    get_available_compressions,
+    is_compressed_json,
+    load_zstd_dictionary,
+    train_zstd_dictionary,
+)
+
+WORDS = "the a model answer source document search result image python code".split()
+
+
+def make_chat(seed, messages=40):
+    """A chat like the ones stored: repeated sources, status histories, an image."""
+    rng = random.Random(seed)
+    sources = [
+        {
+            "source": {"id": f"doc-{i}", "name": f"Document {i}"},
+            "document": [" ".join(rng.choices(WORDS, k=200))],
+            "metadata": [{"source": f"doc-{i}.pdf", "page": i}],
+        }
+        for i in range(3)
+    ]
+    history = {}
+    for i in range(messages):
+        history[f"m{i}"] = {
+            "id": f"m{i}",
+            "parentId": f"m{i - 1}" if i else None,
+            "role": "assistant" if i % 2 else "user",
+            "content": " ".join(rng.choices(WORDS, k=80)),
+            "timestamp": 1700000000 + i,
+            "sources": sources if i % 2 else [],
+            "statusHistory": [
+                {"action": "web_search", "description": "Searching", "done": False},
+                {"action": "web_search", "description": "Searched", "done": True},
+            ],
+        }
+    history["m0"]["files"] = [
+        {
+            "type": "image",
+            "url": "data:image/png;base64,"
+            + base64.b64encode(rng.randbytes(20_000)).decode(),
+        }
+    ]
+    return {
+        "title": f"chat {seed}",
+        "history": {"messages": history, "currentId": f"m{messages - 1}"},
+    }
+
+
+@pytest.fixture
+def dictionary_path(tmp_path):
+    samples = [json.dumps(make_chat(i, messages=6)).encode() for i in range(200)]
+    path = tmp_path / "chat.dict"
+    path.write_bytes(train_zstd_dictionary(samples, size=16 * 1024))
+    yield str(path)
+    load_zstd_dictionary.cache_clear()
+
+
+def store(chat, compression, dictionary_path=""):
+    with (
+        patch.object(chats, "CHAT_PAYLOAD_COMPRESSION", compression),
+        patch.object(chats, "CHAT_PAYLOAD_ZSTD_DICT_PATH", dictionary_path),
+    ):
+        return ChatTable()._serialize_chat_payload(chat)
+
+
+def load(payload, dictionary_path=""):
+    with patch.object(chats, "CHAT_PAYLOAD_ZSTD_DICT_PATH", dictionary_path):
+        return ChatTable()._deserialize_chat_payload(payload)
+
+
+class TestChatPayloadCompression:
+    @pytest.mark.parametrize("compression", get_available_compressions())
+    def test_round_trip_and_plain_payloads(self, compression):
+        chat = make_chat(1)
+
+        stored = store(chat, compression)
+
+        assert stored["__compressed__"] == compression
+        assert load(stored) == chat
+        # Payloads stored before compression was enabled are read as is
+        assert store(chat, "") == chat
+        assert load(chat) == chat
+
+    @pytest.mark.skipif(not ZSTD_AVAILABLE, reason="zstandard is not installed")
+    def test_dictionary(self, dictionary_path):
+        chat = make_chat(1)
+
+        stored = store(chat, "zstd", dictionary_path)
+
+        assert len(stored["data"]) < len(store(chat, "zstd")["data"])
+        assert load(stored, dictionary_path) == chat
+        # Without the dictionary the payload can't be read
+        assert load(stored) == {}
+
+    @pytest.mark.parametrize("compression", get_available_compressions())
+    def test_client_payloads_are_never_decompressed(self, compression):
+        planted = {**compress_json({"title": "bomb"}, compression), "title": "chat"}
+
+        assert ChatForm(chat=planted).chat == {"title": "chat"}
+        assert store(planted, "") == {"title": "chat"}
+        assert load(store(planted, compression)) == {"title": "chat"}
+
+    @pytest.mark.parametrize("compression", get_available_compressions())
+    def test_decompressed_size_is_capped(self, compression):
+        bomb = compress_json("0" * 10_000_000, compression)
+
+        assert len(bomb["data"]) < 100_000
+        with pytest.raises(ValueError):
+            decompress_json(bomb, max_size=1_000_000)
+        assert decompress_json(bomb, max_size=20_000_000) == "0" * 10_000_000
+
+    def test_recompress_chats_and_restore_json(self, engine):
+        chat = make_chat(1)
+        with engine.begin() as conn:
+            conn.execute(
+                Chat.__table__.insert(),
+                [
+                    {"id": "plain", "user_id": "u", "chat": chat},
+                    {"id": "gzip", "user_id": "u", "chat": store(chat, "gzip")},
+                ],
+            )
+
+        def get_payloads():
+            with engine.connect() as conn:
+                rows = conn.execute(text("SELECT id, chat FROM chat")).all()
+            return {id: json.loads(payload) for id, payload in rows}
+
+        compression = get_available_compressions()[-1]
+        with patch.object(chats, "CHAT_PAYLOAD_ZSTD_DICT_PATH", ""):
+            recompressed = Chats.recompress_chats(compression)
+            upgraded = get_payloads()
+            restored = Chats.recompress_chats("")
+
+        assert recompressed == (2 if compression == "zstd" else 1)
+        assert {payload["__compressed__"] for payload in upgraded.values()} == {
+            compression
+        }
+        assert load(upgraded["plain"]) == chat
+        assert restored == 2
+        assert get_payloads() == {"plain": chat, "gzip": chat}
+
+    @pytest.mark.skipif(not ZSTD_AVAILABLE, reason="zstandard is not installed")
+    def test_dictionary_is_trained_and_required(self, engine, tmp_path):
+        with engine.begin() as conn:
+            conn.execute(
+                Chat.__table__.insert(),
+                [
+                    {"id": str(i), "user_id": "u", "chat": make_chat(i, messages=6)}
+                    for i in range(200)
+                ],
+            )
+
+        path = str(tmp_path / "chat.dict")
+        with patch.object(chats, "CHAT_PAYLOAD_ZSTD_DICT_PATH", path):
+            # A configured dictionary that can't be loaded is never used
+            with pytest.raises(ValueError):
+                Chats.recompress_chats("zstd")
+
+            Chats.train_payload_dictionary(path, samples=200)
+            assert Chats.recompress_chats("zstd") == 200
+
+        with engine.connect() as conn:
+            payload = json.loads(
+                conn.execute(text("SELECT chat FROM chat WHERE id = '1'")).scalar()
+            )
+        assert load(payload, path) == make_chat(1, messages=6)
+        assert load(payload) == {}
+        load_zstd_dictionary.cache_clear()
+
+
+class TestChatPayloadCompressionSize:
+    def test_bytes_stored(self, dictionary_path):
+        payloads = [make_chat(i) for i in range(20)]
+        raw_size = sum(len(json.dumps(chat)) for chat in payloads)
+
+        codecs = [("json", "", "")] + [
+            (compression, compression, "")
+            for compression in get_available_compressions()
+        ]
+        if ZSTD_AVAILABLE:
+            codecs.append(("zstd+dict", "zstd", dictionary_path))
+
+        results = {}
+        for name, compression, path in codecs:
+            stored = [store(chat, compression, path) for chat in payloads]
+            loaded = [load(payload, path) for payload in stored]
+
+            assert loaded == payloads
+            assert all(
+                is_compressed_json(payload) == bool(compression) for payload in stored
+            )
+            results[name] = sum(len(json.dumps(payload)) for payload in stored)
+
+        assert results["gzip"] < raw_size / 2
@@ -0,0 +1,121 @@
+import asyncio
+import tracemalloc
+
+import pytest
+from fastapi import HTTPException
+
+from open_webui.models.chats import ChatForm, ChatImportForm, Chats
+from open_webui.models.tags import Tags
+from open_webui.utils.compression import get_available_compressions, get_decompressor
+from open_webui.utils.jsonl import aiter_jsonl, iter_jsonl
+
+
+def read_jsonl(chunks, compression=None, **kwargs):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def read():
+        return [item async for item in aiter_jsonl(stream(), compression, **kwargs)]
+
+    return asyncio.run(read())
+
+
+def make_chat(i, size=0):
+    return {
+        "title": f"chat {i}",
+        "messages": [{"role": "user", "content": "x" * size}],
+    }
+
+
+class TestJsonl:
+    @pytest.mark.parametrize("compression", [None, *get_available_compressions()])
+    def test_round_trip(self, compression):
+        items = [{"id": i, "text": "line\nbreak " * (i % 50)} for i in range(3000)]
+
+        chunks = list(iter_jsonl(items, compression))
+
+        assert len(chunks) > 1 or compression
+        # Lines are split across chunks, re-chunk to exercise the buffering
+        data = b"".join(chunks)
+        assert (
+            read_jsonl(
+                [data[i : i + 1000] for i in range(0, len(data), 1000)], compression
+            )
+            == items
+        )
+
+    @pytest.mark.parametrize("compression", get_available_compressions())
+    def test_decompressed_pieces_are_bounded(self, compression):
+        data = b"".join(iter_jsonl([{"text": "x" * 64 * 1024 * 1024}], compression))
+        assert len(data) < 1024 * 1024
+
+        decompressor = get_decompressor(compression)
+        pieces = [len(piece) for piece in decompressor.decompress(data)]
+
+        assert decompressor.eof
+        assert sum(pieces) > 64 * 1024 * 1024
+        assert max(pieces) <= 9 * 1024 * 1024
+
+    @pytest.mark.parametrize("compression", [None, *get_available_compressions()])
+    def test_long_lines_are_refused(self, compression):
+        data = b"".join(iter_jsonl([{"id": 1}, {"text": "x" * 10_000}], compression))
+
+        with pytest.raises(HTTPException) as e:
+            read_jsonl([data], compression, max_line_size=1000)
+        assert e.value.status_code == 413
+
+    @pytest.mark.parametrize("compression", get_available_compressions())
+    def test_truncated_stream_is_refused(self, compression):
+        data = b"".join(iter_jsonl([{"id": i} for i in range(1000)], compression))
+
+        with pytest.raises(HTTPException) as e:
+            read_jsonl([data[: len(data) // 2]], compression)
+        assert e.value.status_code == 400
+
+
+class TestChatExportImport:
+    def test_export_then_import(self, engine):
+        chat = Chats.insert_new_chat("user-1", ChatForm(chat=make_chat(1)))
+        Chats.add_chat_tag_by_id_and_user_id_and_tag_name(chat.id, "user-1", "work")
+        Chats.insert_new_chat("user-2", ChatForm(chat=make_chat(2)))
+
+        data = b"".join(iter_jsonl(Chats.iter_chats("user-1"), "gzip"))
+        forms = [
+            ChatImportForm.model_validate(item) for item in read_jsonl([data], "gzip")
+        ]
+
+        assert Chats.import_chats("user-3", forms) == 1
+        [imported] = Chats.get_chats_by_user_id("user-3")
+        assert imported.id != chat.id
+        assert imported.chat == make_chat(1)
+        assert imported.meta["tags"] == ["work"]
+        assert imported.updated_at == chat.updated_at
+        assert [tag.id for tag in Tags.get_tags_by_user_id("user-3")] == ["work"]
+        assert Chats.count_chats_by_tag_name_and_user_id("work", "user-3") == 1
+
+
+class TestChatExportBenchmark:
+    def test_export_memory_is_bounded(self, engine):
+        forms = [
+            ChatImportForm(chat=make_chat(i, size=10_000), created_at=i, updated_at=i)
+            for i in range(2000)
+        ]
+        for i in range(0, len(forms), 100):
+            Chats.import_chats("user-1", forms[i : i + 100])
+        del forms
+
+        tracemalloc.start()
+        size = sum(len(chunk) for chunk in iter_jsonl(Chats.iter_chats("user-1")))
+        _, stream_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        size_all = sum(
+            len(chunk) for chunk in iter_jsonl(Chats.get_chats_by_user_id("user-1"))
+        )
+        _, list_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert size == size_all
+        assert stream_peak * 4 < list_peak
@@ -0,0 +1,133 @@
+from unittest.mock import patch
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from open_webui.models import chat_search
+from open_webui.models.chat_search import ChatMessageSearch, ChatSearchTable
+from open_webui.models.chats import Chat
+
+
+def make_chat(title, *contents):
+    messages = {
+        f"m{idx}": {"id": f"m{idx}", "content": content}
+        for idx, content in enumerate(contents)
+    }
+    return {"title": title, "history": {"messages": messages}}
+
+
+@pytest.fixture
+def db(load_migration):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        Chat.__table__.create(conn)
+        conn.execute(
+            Chat.__table__.insert(),
+            [
+                {
+                    "id": "legacy",
+                    "user_id": "user-1",
+                    "title": "Legacy",
+                    "chat": make_chat("Legacy", "an old conversation about tomatoes"),
+                }
+            ],
+        )
+        with Operations.context(MigrationContext.configure(conn)):
+            load_migration("add_chat_message_search_table").upgrade()
+
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def search(db, table, text, user_id="user-1"):
+    hits = table.get_search_subquery(db, user_id, text)
+    rows = db.execute(select(hits.c.chat_id).order_by(hits.c.score)).all()
+    return [row.chat_id for row in rows]
+
+
+class TestChatSearch:
+    def test_migration_indexes_existing_chats(self, db):
+        table = ChatSearchTable()
+
+        assert table.is_available(db)
+        assert search(db, table, "tomato") == ["legacy"]
+
+    def test_search_matches_word_prefixes_and_ranks(self, db):
+        table = ChatSearchTable()
+        table.index_chat(
+            db, "chat-1", "user-1", make_chat("Cooking", "pasta with basil", "basil")
+        )
+        table.index_chat(db, "chat-2", "user-1", make_chat("Garden", "growing basil"))
+        table.index_chat(db, "chat-3", "user-2", make_chat("Other", "basil"))
+        db.commit()
+
+        assert search(db, table, "bas") == ["chat-1", "chat-2"]
+        assert search(db, table, "growing BASIL") == ["chat-2"]
+        assert search(db, table, "cooking") == ["chat-1"]
+        assert search(db, table, "basil", user_id="user-2") == ["chat-3"]
+
+    @pytest.mark.parametrize("trigram", [True, False])
+    def test_search_matches_substrings(self, db, trigram):
+        table = ChatSearchTable()
+        table.index_chat(db, "chat-1", "user-1", make_chat("旅行", "今日は東京へ"))
+        table.index_chat(db, "chat-2", "user-1", make_chat("Garden", "growing basil"))
+        db.commit()
+        assert table.is_available(db) and table._trigram
+        table._trigram = trigram
+
+        assert search(db, table, "東京") == ["chat-1"]
+        assert search(db, table, "は東京") == ["chat-1"]
+        assert search(db, table, "asil") == ["chat-2"]
+        assert search(db, table, "owing ba") == ["chat-2"]
+        assert search(db, table, "東京 basil") == []
+
+    def test_only_changed_messages_are_reindexed(self, db):
+        table = ChatSearchTable()
+        table.index_chat(db, "chat-1", "user-1", make_chat("Notes", "first", "second"))
+        db.commit()
+        ids = dict(
+            db.query(ChatMessageSearch.message_id, ChatMessageSearch.id)
+            .filter_by(chat_id="chat-1")
+            .all()
+        )
+
+        table.index_chat(db, "chat-1", "user-1", make_chat("Notes", "first", "edited"))
+        db.commit()
+        updated = dict(
+            db.query(ChatMessageSearch.message_id, ChatMessageSearch.id)
+            .filter_by(chat_id="chat-1")
+            .all()
+        )
+
+        assert updated[""] == ids[""] and updated["m0"] == ids["m0"]
+        assert search(db, table, "second") == []
+        assert search(db, table, "edited") == ["chat-1"]
+
+        table.delete_by_chat_ids(db, ["chat-1"])
+        db.commit()
+        assert search(db, table, "first") == []
+
+    def test_hashed_index_does_not_store_text(self, db):
+        table = ChatSearchTable()
+        with (
+            patch.object(chat_search, "encryption_available", return_value=True),
+            patch.object(chat_search, "ENABLE_CHAT_SEARCH_HASH_INDEX", True),
+        ):
+            table.index_chat(
+                db, "chat-1", "user-1", make_chat("Secret", "launch codes")
+            )
+            db.commit()
+
+            contents = [row.content for row in db.query(ChatMessageSearch.content)]
+            assert not any("launch" in content for content in contents)
+            assert search(db, table, "launch codes") == ["chat-1"]
+            assert search(db, table, "launc") == []
+            # Plaintext rows of chats indexed before encryption are ignored
+            assert search(db, table, "tomatoes") == []
+
+        with patch.object(chat_search, "encryption_available", return_value=True):
+            assert table.get_search_subquery(db, "user-1", "launch") is None
@@ -0,0 +1,166 @@
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from open_webui.retrieval.batching import EmbeddingService, get_embedding_service
+from open_webui.retrieval.utils import get_embedding_function
+
+
+class FakeSentenceTransformer:
+    """
+    Embeds a text as [length, prompt length], each batch of `batch_size` texts
+    costs `overhead` seconds.
+    """
+
+    def __init__(self, overhead=0.0):
+        self.overhead = overhead
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def encode(self, texts, batch_size=32, prompt=None):
+        with self.lock:
+            self.batches.append((list(texts), prompt))
+            time.sleep(self.overhead * math.ceil(len(texts) / batch_size))
+        return np.array([[len(text), len(prompt or "")] for text in texts])
+
+
+class TestEmbeddingService:
+    def test_concurrent_requests_are_batched(self):
+        model = FakeSentenceTransformer(overhead=0.01)
+        service = EmbeddingService(model, batch_size=64, batch_wait=0.05)
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(
+                executor.map(lambda i: service.encode(["x" * i, "y"]), range(8))
+            )
+
+        assert results == [[[i, 0], [1, 0]] for i in range(8)]
+        assert sum(len(texts) for texts, _ in model.batches) == 16
+        assert len(model.batches) < 8
+
+    def test_batches_are_sorted_by_length_and_grouped_by_prefix(self):
+        model = FakeSentenceTransformer()
+        service = EmbeddingService(model, batch_size=2, batch_wait=0.05)
+
+        futures = [
+            service.submit(["xxx", "x", "xxxx", "xx"], "doc: ", "bulk"),
+            service.submit(["y"], "query: ", "bulk"),
+        ]
+
+        assert futures[0].result() == [[3, 5], [1, 5], [4, 5], [2, 5]]
+        assert futures[1].result() == [[1, 7]]
+        assert model.batches == [
+            (["x", "xx"], "doc: "),
+            (["xxx", "xxxx"], "doc: "),
+            (["y"], "query: "),
+        ]
+
+    def test_queries_preempt_bulk_ingestion(self):
+        model = FakeSentenceTransformer(overhead=0.01)
+        service = EmbeddingService(model, batch_size=4, batch_wait=0)
+
+        bulk = service.submit([f"document {i}" for i in range(40)], lane="bulk")
+        time.sleep(0.015)
+        assert service.get_metrics()["lanes"]["bulk"]["queued"] > 0
+        assert service.encode(["query"]) == [[5, 0]]
+
+        assert len(bulk.result()) == 40
+        texts = [texts for texts, _ in model.batches]
+        # The query waited for at most the bulk batches in progress
+        assert texts.index(["query"]) <= 2
+        metrics = service.get_metrics()
+        assert metrics["lanes"] == {
+            "query": {"requests": 0, "queued": 0},
+            "bulk": {"requests": 0, "queued": 0},
+        }
+        assert metrics["batches"] == 11
+        assert metrics["encoded"] == 41
+
+    def test_async_api(self):
+        service = EmbeddingService(FakeSentenceTransformer(), batch_wait=0.05)
+
+        async def embed():
+            return await asyncio.gather(
+                service.aencode(["a"]), service.aencode(["bb", "ccc"], lane="bulk")
+            )
+
+        assert asyncio.run(embed()) == [[[1, 0]], [[2, 0], [3, 0]]]
+
+    def test_errors_are_raised_to_every_request(self):
+        class FailingModel:
+            def encode(self, texts, batch_size=32, prompt=None):
+                raise RuntimeError("out of memory")
+
+        service = EmbeddingService(FailingModel(), batch_wait=0.05)
+
+        futures = [service.submit(["a"]), service.submit(["b"] * 100, lane="bulk")]
+
+        for future in futures:
+            with pytest.raises(RuntimeError, match="out of memory"):
+                future.result()
+        assert service.get_metrics()["lanes"]["bulk"] == {"requests": 0, "queued": 0}
+
+    def test_embedding_function(self):
+        model = FakeSentenceTransformer()
+        embed = get_embedding_function("", "fake", model, None, None, 1)
+
+        assert embed("query", prefix="q: ") == [5, 3]
+        assert embed(["a", "bb"]) == [[1, 0], [2, 0]]
+        # Every embedding function of a model shares its worker
+        get_embedding_function("", "fake", model, None, None, 1)("x")
+        assert get_embedding_service(model).get_metrics()["encoded"] == 4
+
+    def test_embedding_function_lanes_without_prefixes(self):
+        model = FakeSentenceTransformer()
+        embed = get_embedding_function("", "fake", model, None, None, 1)
+        service = get_embedding_service(model)
+        lanes = []
+        submit = service.submit
+
+        def record_lane(texts, prefix=None, lane="query"):
+            lanes.append(lane)
+            return submit(texts, prefix, lane)
+
+        service.submit = record_lane
+
+        # RAG_EMBEDDING_QUERY_PREFIX and RAG_EMBEDDING_CONTENT_PREFIX are unset
+        embed(["query 1", "query 2"], prefix=None)
+        embed(["document"], prefix=None)
+        embed(["document 1", "document 2"], prefix=None, lane="bulk")
+
+        assert lanes == ["query", "query", "bulk"]
+
+
+@pytest.mark.benchmark
+class TestEmbeddingServiceBenchmark:
+    def test_query_latency_during_ingestion(self):
+        documents = [f"document {i} " * (i % 20) for i in range(2000)]
+        queries = [f"query {i}" for i in range(20)]
+
+        def run(embed_query, embed_documents):
+            # Queries arrive every 10ms while the documents are embedded
+            with ThreadPoolExecutor(2) as executor:
+                ingestion = executor.submit(embed_documents, documents)
+                latencies = []
+                for query in queries:
+                    start = time.perf_counter()
+                    embed_query([query])
+                    latencies.append(time.perf_counter() - start)
+                    time.sleep(0.01)
+                ingestion.result()
+            return max(latencies)
+
+        # One forward pass at a time, like a single GPU
+        model = FakeSentenceTransformer(overhead=0.002)
+
+        unbatched = run(model.encode, model.encode)
+
+        service = EmbeddingService(model, batch_size=32, batch_wait=0.001)
+        batched = run(service.encode, lambda texts: service.encode(texts, lane="bulk"))
+
+        assert batched < unbatched
@@ -0,0 +1,74 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from open_webui.socket import main as socket_main
+from open_webui.socket.main import MESSAGE_LOCKS, get_event_emitter
+
+
+class FakeChats:
+    def __init__(self):
+        self.message = {"content": "", "sources": []}
+
+    async def get_message_by_id_and_message_id(self, chat_id, message_id):
+        # The DB executor hands control back to the event loop
+        await asyncio.sleep(0)
+        return dict(self.message)
+
+    async def upsert_message_to_chat_by_id_and_message_id(
+        self, chat_id, message_id, message
+    ):
+        await asyncio.sleep(0)
+        self.message = {**self.message, **message}
+
+
+class TestEventEmitter:
+    @pytest.mark.asyncio
+    async def test_concurrent_events_of_a_message_are_all_stored(self):
+        chats = FakeChats()
+        emitter = get_event_emitter(
+            {"user_id": "user-1", "chat_id": "chat-1", "message_id": "message-1"}
+        )
+
+        with (
+            patch.object(socket_main, "AsyncChats", chats),
+            patch.object(socket_main, "emit_chat_event", AsyncMock()),
+            patch.object(socket_main.CHAT_EVENT_BATCHER, "window", 0),
+        ):
+            await asyncio.gather(
+                *[
+                    emitter({"type": "message", "data": {"content": "a"}})
+                    for _ in range(10)
+                ],
+                *[
+                    emitter({"type": "source", "data": {"name": f"source {i}"}})
+                    for i in range(5)
+                ],
+            )
+
+        assert chats.message["content"] == "a" * 10
+        assert len(chats.message["sources"]) == 5
+        assert len(MESSAGE_LOCKS) == 0
+
+    @pytest.mark.asyncio
+    async def test_only_event_stream_tasks_are_buffered(self):
+        buffer = AsyncMock(maxlen=10)
+
+        with (
+            patch.object(socket_main, "CHAT_EVENT_BUFFER", buffer),
+            patch.object(socket_main.sio, "emit", AsyncMock()),
+        ):
+            await socket_main.open_chat_event_stream("streamed", "user-1")
+            await socket_main.emit_chat_event(["user:user-1"], {"task_id": "socket"})
+            await socket_main.emit_chat_event(["user:user-1"], {"task_id": "streamed"})
+            await socket_main.close_chat_event_stream(
+                {"user_id": "user-1", "task_id": "streamed"}
+            )
+            await socket_main.close_chat_event_stream(
+                {"user_id": "user-1", "task_id": "socket"}
+            )
+
+        buffer.append.assert_awaited_once_with("streamed", {"task_id": "streamed"})
+        buffer.close.assert_awaited_once_with("streamed")
+        assert "streamed" not in socket_main.STREAMED_TASK_IDS
@@ -0,0 +1,163 @@
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, event, text
+
+from open_webui.models.chats import ChatForm, Chats
+from open_webui.models.folders import Folder, FolderForm, Folders
+
+
+def make_tree(engine, user_id, roots, depth, width):
+    """Bulk insert `roots` trees of `depth` levels of `width` children."""
+    rows = []
+
+    def add(parent, level):
+        for i in range(width if parent else roots):
+            id = f"{parent['id']}.{i}" if parent else str(i)
+            row = {
+                "id": id,
+                "parent_id": parent["id"] if parent else None,
+                "user_id": user_id,
+                "name": id,
+                "path": f"{parent['path'] if parent else '/'}{id}/",
+                "created_at": 0,
+                "updated_at": 0,
+            }
+            rows.append(row)
+            if level < depth:
+                add(row, level + 1)
+
+    add(None, 0)
+    with engine.begin() as conn:
+        conn.execute(Folder.__table__.insert(), rows)
+    return [row["id"] for row in rows]
+
+
+def get_children_recursively(id, user_id):
+    # Previous implementation, one query per folder, kept as the reference
+    folders = []
+
+    def get_children(folder_id):
+        for child in Folders.get_folders_by_parent_id_and_user_id(folder_id, user_id):
+            get_children(child.id)
+            folders.append(child)
+
+    get_children(id)
+    return folders
+
+
+class TestFolderPaths:
+    def test_subtree_is_fetched_by_path(self, engine):
+        root = Folders.insert_new_folder("user-1", FolderForm(name="root"))
+        child = Folders.insert_new_folder("user-1", FolderForm(name="child"), root.id)
+        leaf = Folders.insert_new_folder("user-1", FolderForm(name="leaf"), child.id)
+        Folders.insert_new_folder("user-1", FolderForm(name="other"))
+
+        assert leaf.path == f"/{root.id}/{child.id}/{leaf.id}/"
+        assert [
+            folder.id
+            for folder in Folders.get_children_folders_by_id_and_user_id(
+                root.id, "user-1"
+            )
+        ] == [child.id, leaf.id]
+
+    def test_move_updates_the_subtree_and_rejects_cycles(self, engine):
+        a = Folders.insert_new_folder("user-1", FolderForm(name="a"))
+        b = Folders.insert_new_folder("user-1", FolderForm(name="b"), a.id)
+        c = Folders.insert_new_folder("user-1", FolderForm(name="c"), b.id)
+        d = Folders.insert_new_folder("user-1", FolderForm(name="d"))
+
+        assert (
+            Folders.update_folder_parent_id_by_id_and_user_id(a.id, "user-1", c.id)
+            is None
+        )
+
+        Folders.update_folder_parent_id_by_id_and_user_id(b.id, "user-1", d.id)
+        assert (
+            Folders.get_folder_by_id_and_user_id(c.id, "user-1").path
+            == f"/{d.id}/{b.id}/{c.id}/"
+        )
+        assert Folders.get_children_folders_by_id_and_user_id(a.id, "user-1") == []
+
+        Folders.update_folder_parent_id_by_id_and_user_id(b.id, "user-1", None)
+        assert (
+            Folders.get_folder_by_id_and_user_id(c.id, "user-1").path
+            == f"/{b.id}/{c.id}/"
+        )
+
+    def test_subtree_chats_and_delete(self, engine):
+        root = Folders.insert_new_folder("user-1", FolderForm(name="root"))
+        child = Folders.insert_new_folder("user-1", FolderForm(name="child"), root.id)
+        other = Folders.insert_new_folder("user-1", FolderForm(name="other"))
+        for folder_id in [root.id, child.id, other.id]:
+            Chats.insert_new_chat(
+                "user-1", ChatForm(chat={"title": folder_id}, folder_id=folder_id)
+            )
+
+        assert sorted(
+            chat.title
+            for chat in Chats.get_chats_by_folder_subtree_and_user_id(root.id, "user-1")
+        ) == sorted([root.id, child.id])
+
+        folder_ids = Folders.delete_folder_by_id_and_user_id(root.id, "user-1")
+        Chats.delete_chats_by_user_id_and_folder_ids("user-1", folder_ids)
+
+        assert folder_ids == [root.id, child.id]
+        assert [folder.id for folder in Folders.get_folders_by_user_id("user-1")] == [
+            other.id
+        ]
+        assert [chat.title for chat in Chats.get_chats_by_user_id("user-1")] == [
+            other.id
+        ]
+
+    def test_migration_backfills_paths(self, load_migration):
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(
+                text("CREATE TABLE folder (id TEXT, parent_id TEXT, user_id TEXT)")
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO folder VALUES "
+                    "('a', NULL, 'u'), ('b', 'a', 'u'), ('c', 'b', 'u'), "
+                    "('orphan', 'missing', 'u'), ('x', 'y', 'u'), ('y', 'x', 'u')"
+                )
+            )
+
+            with Operations.context(MigrationContext.configure(conn)):
+                load_migration("add_path_column_to_folder").upgrade()
+
+            paths = dict(conn.execute(text("SELECT id, path FROM folder")).all())
+
+        assert paths["c"] == "/a/b/c/"
+        assert paths["orphan"] == "/orphan/"
+        assert {paths["x"], paths["y"]} in ({"/x/", "/x/y/"}, {"/y/", "/y/x/"})
+
+
+class TestFolderPathsAtScale:
+    def test_subtree_of_5000_folders(self, engine):
+        # 13 roots with 3 levels of 7 children: 13 * (1 + 7 + 49 + 343) = 5200
+        ids = make_tree(engine, "user-1", 13, 3, 7)
+        assert len(ids) == 5200
+
+        statements = []
+        event.listen(
+            engine, "before_cursor_execute", lambda *args: statements.append(1)
+        )
+
+        children = Folders.get_children_folders_by_id_and_user_id("0", "user-1")
+        path_queries = len(statements)
+
+        statements.clear()
+        baseline = get_children_recursively("0", "user-1")
+        recursive_queries = len(statements)
+
+        statements.clear()
+        deleted = Folders.delete_folder_by_id_and_user_id("0", "user-1")
+        delete_queries = len(statements)
+
+        assert sorted(child.id for child in children) == sorted(
+            child.id for child in baseline
+        )
+        assert len(deleted) == len(children) + 1
+        assert path_queries == 2 and recursive_queries > len(children)
+        assert delete_queries == 3
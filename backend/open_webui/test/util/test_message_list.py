@@ -0,0 +1,154 @@
+from open_webui.utils.misc import (
+    MessageListCache,
+    clean_message_content,
+    get_message_list,
+)
+
+
+def make_messages_map(count):
+    messages_map = {}
+    parent_id = None
+    for i in range(count):
+        messages_map[f"m{i}"] = {
+            "id": f"m{i}",
+            "parentId": parent_id,
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i} <details>reasoning</details> ![image](/a.png)",
+        }
+        parent_id = f"m{i}"
+    return messages_map
+
+
+def get_message_list_with_insert(messages_map, message_id):
+    # Previous implementation, kept as the benchmark baseline
+    message_list = []
+    current_message = messages_map.get(message_id)
+    while current_message:
+        message_list.insert(0, current_message)
+        parent_id = current_message.get("parentId")
+        current_message = messages_map.get(parent_id) if parent_id else None
+    return message_list
+
+
+class TestMessageList:
+    def test_reconstructs_branch_in_order(self):
+        messages_map = make_messages_map(5)
+        messages_map["m3"]["content"] = "edited"
+
+        assert [m["id"] for m in get_message_list(messages_map, "m3")] == [
+            "m0",
+            "m1",
+            "m2",
+            "m3",
+        ]
+        assert get_message_list(messages_map, "unknown") == []
+        assert get_message_list(None, "m0") == []
+
+    def test_parent_cycles_terminate(self):
+        messages_map = make_messages_map(3)
+        messages_map["m0"]["parentId"] = "m2"
+
+        assert [m["id"] for m in get_message_list(messages_map, "m2")] == [
+            "m0",
+            "m1",
+            "m2",
+        ]
+
+    def test_cache_extends_parent_chain_and_sees_edits(self):
+        cache = MessageListCache()
+        messages_map = make_messages_map(4)
+        cache.get_message_list("chat-1", messages_map, "m2")
+
+        messages_map["m1"]["content"] = "edited"
+        messages = cache.get_message_list("chat-1", messages_map, "m3")
+
+        assert [m["id"] for m in messages] == ["m0", "m1", "m2", "m3"]
+        assert messages[1]["content"] == "edited"
+        assert cache._chains[("chat-1", "m3")][1] == ("m0", "m1", "m2", "m3")
+
+    def test_cache_hits_are_not_walked_again(self):
+        cache = MessageListCache()
+        messages_map = make_messages_map(4)
+        message_ids = cache.get_message_id_list("chat-1", messages_map, "m3")
+
+        # Growing the chat keeps the chains of its existing messages
+        messages_map.update(make_messages_map(6))
+        messages_map["m2"]["parentId"] = "unknown"
+        assert cache.get_message_id_list("chat-1", messages_map, "m3") is message_ids
+        assert cache.get_message_id_list("chat-1", messages_map, "m5") == (
+            message_ids + ("m4", "m5")
+        )
+
+    def test_cache_sees_a_deleted_and_an_added_message(self):
+        cache = MessageListCache()
+        messages_map = make_messages_map(4)
+        cache.get_message_list("chat-1", messages_map, "m3")
+
+        # The map keeps its length
+        del messages_map["m2"]
+        messages_map["m3"]["parentId"] = "m1"
+        messages_map["m4"] = {"id": "m4", "parentId": "m3", "content": ""}
+
+        assert [
+            m["id"] for m in cache.get_message_list("chat-1", messages_map, "m4")
+        ] == ["m0", "m1", "m3", "m4"]
+
+    def test_cache_sees_deleted_and_reparented_messages(self):
+        cache = MessageListCache()
+        messages_map = make_messages_map(4)
+        cache.get_message_list("chat-1", messages_map, "m3")
+        cache.get_cleaned_message_list("chat-1", messages_map, "m2")
+
+        # Deleting messages reparents their children, like the chat UI does
+        del messages_map["m1"], messages_map["m2"]
+        messages_map["m3"]["parentId"] = "m0"
+
+        assert [
+            m["id"] for m in cache.get_message_list("chat-1", messages_map, "m3")
+        ] == ["m0", "m3"]
+        assert [
+            m["id"]
+            for m in cache.get_cleaned_message_list("chat-1", messages_map, "m3")
+        ] == ["m0", "m3"]
+        assert cache.get_message_list("chat-1", messages_map, "m2") == []
+
+    def test_cleaned_messages(self):
+        cache = MessageListCache()
+        messages_map = make_messages_map(2)
+        messages_map["m1"].pop("role")
+
+        messages = cache.get_cleaned_message_list("chat-1", messages_map, "m1")
+        messages[0]["content"] = "changed by caller"
+
+        assert cache.get_cleaned_message_list("chat-1", messages_map, "m1") == [
+            {**messages_map["m0"], "content": "message 0"},
+            {**messages_map["m1"], "role": "assistant", "content": "message 1"},
+        ]
+
+
+class TestMessageListLongChat:
+    COUNT = 5000
+
+    def test_full_branch(self):
+        messages_map = make_messages_map(self.COUNT)
+
+        assert get_message_list(
+            messages_map, f"m{self.COUNT - 1}"
+        ) == get_message_list_with_insert(messages_map, f"m{self.COUNT - 1}")
+
+    def test_growing_chat(self):
+        # A background task runs after every response, each time on a longer branch
+        messages_map = make_messages_map(self.COUNT)
+        cache = MessageListCache()
+
+        for i in range(0, self.COUNT, 10):
+            cache.get_message_list("chat-1", messages_map, f"m{i}")
+        for i in range(0, self.COUNT, 50):
+            assert cache.get_cleaned_message_list("chat-1", messages_map, f"m{i}") == [
+                {**message, "content": clean_message_content(message["content"])}
+                for message in get_message_list(messages_map, f"m{i}")
+            ]
+
+        assert cache.get_message_list("chat-1", messages_map, "m4999") == (
+            get_message_list(messages_map, "m4999")
+        )
@@ -0,0 +1,145 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from open_webui.models.functions import FunctionModel
+from open_webui.models.models import ModelModel
+from open_webui.utils import model_registry, plugin
+from open_webui.utils.model_registry import ModelRegistry
+
+
+BASE_MODELS = [
+    {"id": "llama3:8b", "name": "Llama 3", "owned_by": "ollama"},
+    {"id": "gpt-4o", "name": "GPT-4o", "owned_by": "openai"},
+]
+
+
+def custom_model(id, base_model_id=None, is_active=True, meta=None):
+    return ModelModel(
+        id=id,
+        user_id="user",
+        base_model_id=base_model_id,
+        name=id.title(),
+        params={},
+        meta=meta or {},
+        is_active=is_active,
+        updated_at=0,
+        created_at=0,
+    )
+
+
+def action_function(id, is_global=False):
+    return FunctionModel(
+        id=id,
+        user_id="user",
+        name=id.title(),
+        type="action",
+        content="",
+        meta={},
+        is_active=True,
+        is_global=is_global,
+        updated_at=0,
+        created_at=0,
+    )
+
+
+def load_module(function_id):
+    return SimpleNamespace()
+
+
+class TestModelRegistry:
+    def setup_method(self):
+        self.registry = ModelRegistry()
+        self.registry.load_custom_models(
+            [
+                custom_model("llama3", meta={"actionIds": ["summarize"]}),
+                custom_model("writer", base_model_id="gpt-4o"),
+            ]
+        )
+        self.registry.load_functions([action_function("summarize")], load_module)
+        self.registry.set_base_models(BASE_MODELS)
+
+    def test_overrides_presets_and_actions(self):
+        models = {model["id"]: model for model in self.registry.get_models()}
+
+        assert list(models) == ["llama3:8b", "gpt-4o", "writer"]
+        assert models["llama3:8b"]["name"] == "Llama3"
+        assert [action["id"] for action in models["llama3:8b"]["actions"]] == [
+            "summarize"
+        ]
+        assert models["gpt-4o"]["actions"] == []
+        assert models["writer"]["owned_by"] == "openai"
+        assert models["writer"]["preset"] is True
+
+    def test_snapshot_is_reused_until_a_change(self):
+        snapshot = self.registry.get_models()
+        version = self.registry.version
+
+        assert self.registry.set_base_models(BASE_MODELS) is False
+        assert self.registry.get_models() is snapshot
+        assert self.registry.version == version
+
+        self.registry.upsert_custom_model(custom_model("llama3", is_active=False))
+        assert self.registry.version > version
+        assert [model["id"] for model in self.registry.get_models()] == [
+            "gpt-4o",
+            "writer",
+        ]
+
+    def test_incremental_custom_model_and_function_updates(self):
+        self.registry.upsert_custom_model(custom_model("coder", base_model_id="llama3"))
+        assert self.registry.models["coder"]["owned_by"] == "ollama"
+
+        self.registry.remove_custom_model("writer")
+        assert "writer" not in self.registry.models
+
+        self.registry.upsert_function(
+            action_function("translate", is_global=True), load_module
+        )
+        assert [
+            action["id"] for action in self.registry.models["gpt-4o"]["actions"]
+        ] == ["translate"]
+
+        self.registry.remove_function("translate")
+        assert self.registry.models["gpt-4o"]["actions"] == []
+
+    def test_base_model_removal_updates_presets(self):
+        self.registry.upsert_custom_model(custom_model("coder", base_model_id="llama3"))
+        self.registry.set_base_models(BASE_MODELS[1:])
+
+        assert "llama3:8b" not in self.registry.models
+        assert self.registry.models["coder"]["owned_by"] == "openai"
+
+
+class TestFunctionDeactivation:
+    @pytest.mark.asyncio
+    async def test_failed_function_load_refreshes_the_registry(self):
+        request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+        function = action_function("summarize")
+        functions = MagicMock()
+        functions.get_function_by_id.side_effect = [
+            function,
+            function.model_copy(update={"is_active": False}),
+        ]
+        update_model_registry = AsyncMock()
+
+        with (
+            patch.object(plugin, "Functions", functions),
+            patch.object(
+                plugin,
+                "load_function_module_by_id",
+                side_effect=Exception("No Function class found in the module"),
+            ),
+            patch.object(
+                model_registry, "update_model_registry", update_model_registry
+            ),
+        ):
+            with pytest.raises(Exception):
+                plugin.get_function_module_from_cache(request, "summarize")
+            await asyncio.sleep(0)
+
+        update_model_registry.assert_awaited_once_with(
+            request, function_ids=["summarize"]
+        )
@@ -0,0 +1,85 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from open_webui.models.groups import Groups
+from open_webui.utils.model_registry import ModelRegistry
+from open_webui.utils.models import ModelsResponseCache, get_models_response
+
+
+def make_request(if_none_match=None):
+    state = SimpleNamespace(
+        MODEL_REGISTRY=ModelRegistry(),
+        MODELS_RESPONSE_CACHE=ModelsResponseCache(),
+        config=SimpleNamespace(MODEL_ORDER_LIST=[]),
+    )
+    return SimpleNamespace(
+        app=SimpleNamespace(state=state),
+        headers={"If-None-Match": if_none_match} if if_none_match else {},
+    )
+
+
+def with_headers(request, if_none_match):
+    return SimpleNamespace(app=request.app, headers={"If-None-Match": if_none_match})
+
+
+def member_of(*group_ids):
+    return patch.object(
+        Groups,
+        "get_groups_by_member_id",
+        return_value=[SimpleNamespace(id=group_id) for group_id in group_ids],
+    )
+
+
+class TestModelsResponse:
+    def setup_method(self):
+        self.user = SimpleNamespace(id="user-1", role="user")
+        self.builds = 0
+        self.visible = ["llama3"]
+
+    def get_models(self):
+        self.builds += 1
+        return [{"id": model_id} for model_id in self.visible]
+
+    def test_cached_until_registry_changes_and_304_on_matching_etag(self):
+        request = make_request()
+
+        with member_of():
+            response = get_models_response(request, self.user, self.get_models)
+            etag = response.headers["ETag"]
+            cached = get_models_response(
+                with_headers(request, f"W/{etag}"), self.user, self.get_models
+            )
+
+            request.app.state.MODEL_REGISTRY.set_base_models([{"id": "gpt-4o"}])
+            self.visible = ["llama3", "gpt-4o"]
+            updated = get_models_response(
+                with_headers(request, etag), self.user, self.get_models
+            )
+
+        assert json.loads(response.body) == {"data": [{"id": "llama3"}]}
+        assert response.headers["Cache-Control"] == "private, no-cache"
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == etag
+        assert updated.status_code == 200
+        assert updated.headers["ETag"] != etag
+        assert self.builds == 2
+
+    def test_group_membership_changes_are_seen(self):
+        request = make_request()
+
+        with member_of():
+            before = get_models_response(request, self.user, self.get_models)
+
+        # Joining a group a model is shared with
+        self.visible = ["llama3", "shared"]
+        with member_of("group-1"):
+            after = get_models_response(
+                with_headers(request, before.headers["ETag"]),
+                self.user,
+                self.get_models,
+            )
+
+        assert after.status_code == 200
+        assert json.loads(after.body) == {"data": [{"id": "llama3"}, {"id": "shared"}]}
+        assert self.builds == 2
@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from open_webui.models.chats import ChatForm, Chats
+from open_webui.models.notes import Note
+from open_webui.utils.pagination import (
+    apply_cursor,
+    decode_cursor,
+    encode_cursor,
+    get_next_cursor,
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Note.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    # Several notes share the same updated_at
+    session.add_all(
+        Note(id=f"note-{i:02d}", user_id="user-1", title=str(i), updated_at=i // 3)
+        for i in range(20)
+    )
+    session.commit()
+    yield session
+    session.close()
+
+
+def get_page(db, cursor=None, limit=6):
+    query = apply_cursor(db.query(Note), Note.updated_at, Note.id, cursor)
+    return query.limit(limit).all()
+
+
+class TestCursorPagination:
+    def test_pages_cover_every_item_once_in_order(self, db):
+        pages = []
+        cursor = None
+        while True:
+            page = get_page(db, cursor)
+            pages.append([note.id for note in page])
+            cursor = get_next_cursor(page, 6)
+            if cursor is None:
+                break
+
+        ids = [id for page in pages for id in page]
+        assert ids == [f"note-{i:02d}" for i in reversed(range(20))]
+        assert [len(page) for page in pages] == [6, 6, 6, 2]
+
+    def test_new_items_do_not_shift_pages(self, db):
+        first_page = get_page(db)
+        db.add(Note(id="note-new", user_id="user-1", title="new", updated_at=100))
+        db.commit()
+
+        second_page = get_page(db, get_next_cursor(first_page, 6))
+        assert second_page[0].id == "note-13"
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor(1700000000, "chat-1")
+
+        assert decode_cursor(cursor) == (1700000000, "chat-1")
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor("1700000000", "chat-1"))
+
+    def test_cursor_is_not_combined_with_order_by(self, engine):
+        Chats.insert_new_chat("user-1", ChatForm(chat={"title": "chat"}))
+        cursor = encode_cursor(1700000000, "chat-1")
+        filter = {"order_by": "title", "direction": "asc"}
+
+        assert len(Chats.get_chat_list_by_user_id("user-1", filter=filter)) == 1
+        with pytest.raises(ValueError):
+            Chats.get_chat_list_by_user_id("user-1", filter=filter, cursor=cursor)
+        with pytest.raises(ValueError):
+            Chats.get_archived_chat_list_by_user_id(
+                "user-1", filter=filter, cursor=cursor
+            )
@@ -0,0 +1,22 @@
+import asyncio
+
+import pytest
+
+from open_webui.utils.pubsub import PubSub
+
+
+class TestPubSub:
+    @pytest.mark.asyncio
+    async def test_messages_published_from_threads_reach_subscribers(self):
+        pubsub = PubSub("test")
+
+        async with pubsub.subscribe("file-1") as queue:
+            await asyncio.to_thread(pubsub.publish, "file-1", {"status": "embedding"})
+            await asyncio.to_thread(pubsub.publish, "file-2", {"status": "failed"})
+            pubsub.publish("file-1", {"status": "completed"})
+
+            assert await asyncio.wait_for(queue.get(), 1) == {"status": "embedding"}
+            assert await asyncio.wait_for(queue.get(), 1) == {"status": "completed"}
+            assert queue.empty()
+
+        assert pubsub._subscribers == {}
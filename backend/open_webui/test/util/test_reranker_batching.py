@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from open_webui.retrieval.batching import RerankerService
+
+
+class FakeCrossEncoder:
+    """Scores a pair by its document length, each call costs `overhead` seconds."""
+
+    def __init__(self, overhead=0.0):
+        self.overhead = overhead
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def predict(self, pairs):
+        with self.lock:
+            self.batches.append(list(pairs))
+        time.sleep(self.overhead)
+        return np.array([float(len(doc)) for _, doc in pairs])
+
+
+class FakeColBERT(FakeCrossEncoder):
+    def score_pairs(self, pairs, bsize=32):
+        return self.predict(pairs)
+
+    def normalize_scores(self, scores):
+        scores = np.array(scores)
+        return scores / scores.sum()
+
+
+def make_request(i, docs=4):
+    return [(f"query {i}", "x" * (j + 1)) for j in range(docs)]
+
+
+class TestRerankerService:
+    def test_concurrent_requests_are_batched(self):
+        model = FakeCrossEncoder(overhead=0.01)
+        service = RerankerService(model, "fake", batch_size=64, batch_wait=0.05)
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(
+                executor.map(lambda i: service.predict(make_request(i)), range(8))
+            )
+
+        assert results == [[1.0, 2.0, 3.0, 4.0]] * 8
+        # Same document scores of different queries are distinct pairs
+        assert sum(len(batch) for batch in model.batches) == 32
+        assert len(model.batches) < 8
+
+    def test_batches_are_bucketed_by_length(self):
+        model = FakeCrossEncoder()
+        service = RerankerService(model, "fake", batch_size=2, cache_size=0)
+
+        assert service.predict(
+            [("q", "xxxx"), ("q", "x"), ("q", "xxx"), ("q", "xx")]
+        ) == [4.0, 1.0, 3.0, 2.0]
+        assert model.batches == [
+            [("q", "x"), ("q", "xx")],
+            [("q", "xxx"), ("q", "xxxx")],
+        ]
+
+    def test_scores_are_cached(self):
+        model = FakeCrossEncoder()
+        service = RerankerService(model, "fake")
+
+        service.predict(make_request(1, docs=2))
+        assert service.predict(make_request(1, docs=3)) == [1.0, 2.0, 3.0]
+
+        assert model.batches == [make_request(1, docs=2), [("query 1", "xxx")]]
+
+    def test_scores_are_normalized_per_request(self):
+        model = FakeColBERT()
+        service = RerankerService(model, "colbert", batch_wait=0.05)
+
+        async def rerank():
+            return await asyncio.gather(
+                service.apredict(make_request(1, docs=2)),
+                service.apredict(make_request(2, docs=4)),
+            )
+
+        first, second = asyncio.run(rerank())
+
+        assert first == pytest.approx([1 / 3, 2 / 3])
+        assert second == pytest.approx([0.1, 0.2, 0.3, 0.4])
+        assert len(model.batches) == 1
+
+    def test_errors_are_raised_to_every_request(self):
+        class FailingModel:
+            def predict(self, pairs):
+                raise RuntimeError("out of memory")
+
+        service = RerankerService(FailingModel(), "failing", batch_wait=0.05)
+
+        futures = [service.submit(make_request(i)) for i in range(2)]
+
+        for future in futures:
+            with pytest.raises(RuntimeError, match="out of memory"):
+                future.result()
+
+
+@pytest.mark.benchmark
+class TestRerankerServiceBenchmark:
+    def test_concurrent_throughput(self):
+        requests = [make_request(i, docs=10) for i in range(64)]
+
+        def run(rerank):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(16) as executor:
+                list(executor.map(rerank, requests))
+            return time.perf_counter() - start
+
+        # One forward pass at a time with a fixed cost per call, like a GPU
+        model = FakeCrossEncoder(overhead=0.01)
+        predict = model.predict
+        serial = threading.Lock()
+
+        def serial_predict(pairs):
+            with serial:
+                return predict(pairs)
+
+        model.predict = serial_predict
+        unbatched = run(model.predict)
+        unbatched_calls = len(model.batches)
+
+        model.batches = []
+        service = RerankerService(model, "fake", batch_size=64, cache_size=0)
+        batched = run(service.predict)
+
+        assert len(model.batches) < unbatched_calls
+        assert batched < unbatched / 2
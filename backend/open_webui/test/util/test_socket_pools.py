@@ -0,0 +1,160 @@
+import asyncio
+
+import fakeredis
+import pytest
+from redis.crc import key_slot
+
+from open_webui.socket.utils import (
+    ChatEventBatcher,
+    ChatEventBuffer,
+    SessionPool,
+    UsagePool,
+)
+
+
+class TestSessionPool:
+    @pytest.mark.asyncio
+    async def test_user_stays_active_until_last_session_is_removed(self):
+        pool = SessionPool()
+        await pool.add("sid-1", {"id": "user-1"})
+        await pool.add("sid-2", {"id": "user-1"})
+
+        assert sorted(await pool.get_session_ids("user-1")) == ["sid-1", "sid-2"]
+        assert await pool.get_active_user_ids() == ["user-1"]
+
+        assert (await pool.remove("sid-1"))["id"] == "user-1"
+        assert await pool.is_active("user-1")
+
+        await pool.remove("sid-2")
+        assert not await pool.is_active("user-1")
+        assert await pool.get_active_user_ids() == []
+        assert await pool.remove("sid-2") is None
+
+    @pytest.mark.asyncio
+    async def test_get_many(self):
+        pool = SessionPool()
+        await pool.add("sid-1", {"id": "user-1"})
+
+        assert await pool.get_many(["sid-1", "unknown"]) == [{"id": "user-1"}, None]
+        assert await pool.contains("sid-1")
+
+    @pytest.mark.asyncio
+    async def test_redis_keys_share_a_cluster_slot(self):
+        redis = fakeredis.FakeAsyncRedis()
+        pool = SessionPool(redis)
+        await pool.add("sid-1", {"id": "user-1"})
+        await pool.add("sid-2", {"id": "user-1"})
+        keys = await redis.keys("*")
+
+        await pool.remove("sid-1")
+        assert await pool.is_active("user-1")
+        await pool.remove("sid-2")
+
+        assert not await pool.is_active("user-1")
+        assert await pool.get_active_user_ids() == []
+        assert len(keys) == 3
+        assert len({key_slot(key) for key in keys}) == 1
+
+
+class TestUsagePool:
+    @pytest.mark.asyncio
+    async def test_models_expire_without_cleanup(self):
+        pool = UsagePool(timeout=0.05)
+        await pool.touch("llama3")
+
+        assert await pool.get_models_in_use() == ["llama3"]
+        await asyncio.sleep(0.1)
+        assert await pool.get_models_in_use() == []
+
+
+def make_event(type, **data):
+    return {
+        "chat_id": "chat-1",
+        "message_id": "message-1",
+        "data": {"type": type, "data": data},
+    }
+
+
+class TestChatEventBatcher:
+    @pytest.mark.asyncio
+    async def test_streamed_events_are_merged_into_one_emit(self):
+        emitted = []
+
+        async def emit(to, payload):
+            emitted.append((to, payload["data"]))
+
+        batcher = ChatEventBatcher(emit, window=0.05, max_window=0.5)
+        batcher.add("user:1", make_event("status", description="Searching"))
+        for i in range(10):
+            batcher.add("user:1", make_event("message", content=str(i)))
+        for i in range(10):
+            batcher.add("user:1", make_event("chat:completion", content="x" * (i + 1)))
+        batcher.add("user:1", make_event("chat:completion", done=True))
+
+        await asyncio.sleep(0.1)
+        assert emitted == [
+            ("user:1", {"type": "status", "data": {"description": "Searching"}}),
+            ("user:1", {"type": "message", "data": {"content": "0123456789"}}),
+            (
+                "user:1",
+                {
+                    "type": "chat:completion",
+                    "data": {"content": "xxxxxxxxxx", "done": True},
+                },
+            ),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_flush_emits_pending_events(self):
+        emitted = []
+
+        async def emit(to, payload):
+            emitted.append(payload["data"]["type"])
+
+        batcher = ChatEventBatcher(emit, window=10, max_window=10)
+        batcher.add(["user:1", "sid-1"], make_event("status"))
+        await batcher.flush(["user:1", "sid-1"], make_event("input"))
+
+        assert emitted == ["status"]
+        assert not batcher.has_pending(["user:1", "sid-1"], make_event("status"))
+
+    @pytest.mark.asyncio
+    async def test_window_grows_while_emits_are_slow(self):
+        async def emit(to, payload):
+            await asyncio.sleep(0.05)
+
+        batcher = ChatEventBatcher(emit, window=0.01, max_window=1)
+        for _ in range(3):
+            batcher.add("user:1", make_event("status"))
+            await asyncio.sleep(0.03)
+
+        assert batcher._windows[("user:1", "chat-1", "message-1")] > 0.01
+
+
+class TestChatEventBuffer:
+    @pytest.mark.asyncio
+    async def test_resumes_after_last_event_id(self):
+        buffer = ChatEventBuffer(maxlen=3)
+        await buffer.open("task-1", "user-1")
+        for i in range(5):
+            await buffer.append("task-1", {"data": i})
+
+        events = await buffer.read("task-1")
+        assert [payload["data"] for _, payload in events] == [2, 3, 4]
+
+        await buffer.close("task-1")
+        events = await buffer.read("task-1", events[0][0])
+        assert [payload and payload["data"] for _, payload in events] == [3, 4, None]
+        assert await buffer.get_owner("task-1") == "user-1"
+
+    @pytest.mark.asyncio
+    async def test_readers_wait_for_new_events(self):
+        buffer = ChatEventBuffer()
+        await buffer.open("task-1", "user-1")
+
+        reader = asyncio.create_task(buffer.read("task-1", timeout=1))
+        await asyncio.sleep(0.01)
+        await buffer.append("task-1", {"data": "hello"})
+
+        assert [payload for _, payload in await reader] == [{"data": "hello"}]
+        assert await buffer.read("task-unknown") == []
@@ -0,0 +1,71 @@
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+
+from open_webui.models.chats import Chats
+
+
+class TestChatTags:
+    def test_filter_and_count_by_tag(self, new_chat):
+        a = new_chat("a", "Work", "urgent")
+        b = new_chat("b", "work")
+        new_chat("c")
+
+        assert sorted(
+            chat.title
+            for chat in Chats.get_chat_list_by_user_id_and_tag_name("user-1", "work")
+        ) == ["a", "b"]
+        assert Chats.count_chats_by_tag_name_and_user_id("Work", "user-1") == 2
+
+        Chats.toggle_chat_archive_by_id(b.id)
+        assert Chats.count_chats_by_tag_name_and_user_id("work", "user-1") == 1
+
+        results = Chats.get_chats_by_user_id_and_search_text("user-1", "tag:urgent")
+        assert [chat.id for chat in results] == [a.id]
+        results = Chats.get_chats_by_user_id_and_search_text("user-1", "tag:none")
+        assert [chat.title for chat in results] == ["c"]
+
+    def test_orphaned_tags_are_deleted(self, engine, new_chat, get_tag_ids):
+        a = new_chat("a", "work", "urgent")
+        b = new_chat("b", "work")
+        assert get_tag_ids() == ["urgent", "work"]
+
+        Chats.delete_tag_by_id_and_user_id_and_tag_name(a.id, "user-1", "urgent")
+        Chats.delete_orphaned_tags_by_user_id("user-1", ["urgent"])
+        assert get_tag_ids() == ["work"]
+
+        Chats.delete_chat_by_id_and_user_id(a.id, "user-1")
+        Chats.delete_orphaned_tags_by_user_id("user-1", ["work"])
+        assert get_tag_ids() == ["work"]
+
+        Chats.delete_all_tags_by_id_and_user_id(b.id, "user-1")
+        Chats.delete_orphaned_tags_by_user_id("user-1", ["work"])
+        assert get_tag_ids() == []
+
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM chat_tag")).scalar() == 0
+
+    def test_migration_backfills_chat_tags(self, load_migration):
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE chat (id TEXT, user_id TEXT, meta JSON)"))
+            conn.execute(
+                text(
+                    "INSERT INTO chat VALUES "
+                    """('a', 'u', '{"tags": ["work", "work", "urgent"]}'), """
+                    """('b', 'u', '{}'), ('c', 'u', NULL), """
+                    """('d', 'shared-a', '{"tags": ["work"]}')"""
+                )
+            )
+
+            with Operations.context(MigrationContext.configure(conn)):
+                load_migration("add_chat_tag_table").upgrade()
+
+            rows = conn.execute(
+                text("SELECT chat_id, tag_id, user_id FROM chat_tag ORDER BY tag_id")
+            ).all()
+
+        assert [tuple(row) for row in rows] == [
+            ("a", "urgent", "u"),
+            ("a", "work", "u"),
+        ]
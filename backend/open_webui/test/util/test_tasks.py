@@ -0,0 +1,45 @@
+import asyncio
+
+import fakeredis
+import pytest
+from redis.crc import key_slot
+
+from open_webui import tasks
+
+
+class TestTasks:
+    @pytest.mark.asyncio
+    async def test_stop_task_reports_handled_cancellation(self):
+        async def process_chat():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                # Chat processing handles its own cancellation
+                pass
+
+        task_id, _ = await tasks.create_task(None, process_chat(), id="chat-1")
+        await asyncio.sleep(0)
+
+        assert await tasks.list_task_ids_by_item_id(None, "chat-1") == [task_id]
+        assert (await tasks.stop_task(None, task_id))["status"] is True
+        assert (await tasks.stop_task(None, task_id))["status"] is False
+
+        await asyncio.sleep(0)
+        assert task_id not in await tasks.list_tasks(None)
+
+    @pytest.mark.asyncio
+    async def test_redis_keys_share_a_cluster_slot(self):
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        await redis.set(f"{tasks.REDIS_HEARTBEAT_KEY}:{tasks.OWNER_ID}", "1")
+        done = asyncio.Event()
+
+        task_id, task = await tasks.create_task(redis, done.wait(), id="chat-1")
+        keys = await redis.keys("*")
+
+        assert await tasks.list_task_ids_by_item_id(redis, "chat-1") == [task_id]
+        assert len({key_slot(key.encode()) for key in keys}) == 1
+
+        done.set()
+        await task
+        await asyncio.sleep(0.01)
+        assert await tasks.list_tasks(redis) == []
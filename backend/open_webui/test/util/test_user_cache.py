@@ -0,0 +1,97 @@
+import time
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+from open_webui.models.users import USER_CACHE, UserCache, UserModel, Users
+
+
+def make_user(id="user-1", role="user"):
+    now = int(time.time())
+    return UserModel(
+        id=id,
+        name="User",
+        email=f"{id}@localhost",
+        role=role,
+        profile_image_url="/user.png",
+        last_active_at=now,
+        updated_at=now,
+        created_at=now,
+    )
+
+
+class TestUserCache:
+    def test_get_by_id_and_api_key(self):
+        cache = UserCache(ttl=60, maxsize=10)
+        cache.set(make_user(), api_key="sk-123")
+
+        assert cache.get("user-1").id == "user-1"
+        assert cache.get_by_api_key("sk-123").id == "user-1"
+        assert cache.get_by_api_key("sk-other") is None
+
+    def test_invalidate_drops_user_and_api_key(self):
+        cache = UserCache(ttl=60, maxsize=10)
+        cache.set(make_user(), api_key="sk-123")
+        cache.invalidate("user-1")
+
+        assert cache.get("user-1") is None
+        assert cache.get_by_api_key("sk-123") is None
+
+    def test_reads_started_before_an_invalidation_are_not_cached(self):
+        cache = UserCache(ttl=60, maxsize=10)
+        generation = cache.generation
+        cache.invalidate("user-1")
+        cache.set(make_user(), generation=generation)
+
+        assert cache.get("user-1") is None
+
+        cache.set(make_user(), generation=cache.generation)
+        assert cache.get("user-1") is not None
+
+    def test_users_are_invalidated_after_the_write_commits(self):
+        db = MagicMock()
+        db.query.return_value.filter_by.return_value.first.return_value = make_user(
+            role="admin"
+        )
+        # A concurrent request caches the row before the write commits
+        db.commit.side_effect = lambda: USER_CACHE.set(make_user())
+
+        @contextmanager
+        def get_db():
+            yield db
+
+        with patch("open_webui.models.users.get_db", get_db):
+            Users.update_user_role_by_id("user-1", "admin")
+
+        assert USER_CACHE.get("user-1") is None
+
+    def test_entries_expire(self):
+        cache = UserCache(ttl=0.01, maxsize=10)
+        cache.set(make_user())
+        time.sleep(0.02)
+
+        assert cache.get("user-1") is None
+
+    def test_size_bound_evicts_least_recently_used(self):
+        cache = UserCache(ttl=60, maxsize=2)
+        cache.set(make_user("a"))
+        cache.set(make_user("b"))
+        cache.get("a")
+        cache.set(make_user("c"))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_cached_users_are_copies(self):
+        cache = UserCache(ttl=60, maxsize=10)
+        cache.set(make_user())
+        cache.get("user-1").role = "admin"
+
+        assert cache.get("user-1").role == "user"
+
+    def test_last_active_updates_are_throttled(self):
+        cache = UserCache(ttl=60, maxsize=10)
+
+        assert cache.should_update_last_active("user-1") is True
+        assert cache.should_update_last_active("user-1") is False
+        assert UserCache(ttl=0).should_update_last_active("user-1") is True
@@ -0,0 +1,180 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
+import pycrdt as Y
+import pytest
+from redis.crc import key_slot
+
+from open_webui.socket import main as socket_main
+from open_webui.socket.utils import (
+    DocumentSaveScheduler,
+    YdocManager,
+    decode_ydoc_update,
+)
+
+
+def make_updates(count):
+    ydoc = Y.Doc()
+    text = ydoc.get("text", type=Y.Text)
+
+    updates = []
+    ydoc.observe(lambda event: updates.append(event.update))
+    for i in range(count):
+        text += str(i % 10)
+
+    return ydoc, updates
+
+
+def get_text(update):
+    ydoc = Y.Doc()
+    ydoc.apply_update(update)
+    return str(ydoc.get("text", type=Y.Text))
+
+
+class TestYdocManager:
+    @pytest.mark.asyncio
+    async def test_compacts_after_threshold(self):
+        manager = YdocManager(compaction_threshold=10)
+        source, updates = make_updates(25)
+
+        for update in updates:
+            await manager.append_to_updates("note:1", update)
+
+        stored = await manager.get_updates("note:1")
+        assert len(stored) == 1 + 5  # snapshot plus tail
+
+        state, state_vector = await manager.get_state("note:1")
+        assert get_text(state) == str(source.get("text", type=Y.Text))
+        assert state_vector == source.get_state()
+
+    @pytest.mark.asyncio
+    async def test_idle_documents_are_compacted(self):
+        manager = YdocManager(compaction_threshold=100, idle_timeout=0)
+        _, updates = make_updates(5)
+
+        for update in updates:
+            await manager.append_to_updates("note:1", update)
+        await manager.compact_idle_documents()
+
+        assert len(await manager.get_updates("note:1")) == 1
+
+    @pytest.mark.asyncio
+    async def test_state_vector_returns_missing_changes_only(self):
+        manager = YdocManager()
+        source, updates = make_updates(10)
+
+        client = Y.Doc()
+        for update in updates[:6]:
+            client.apply_update(update)
+        for update in updates:
+            await manager.append_to_updates("note:1", update)
+
+        diff, _ = await manager.get_state("note:1", client.get_state())
+        full, _ = await manager.get_state("note:1")
+        client.apply_update(diff)
+
+        assert len(diff) < len(full)
+        assert str(client.get("text", type=Y.Text)) == str(
+            source.get("text", type=Y.Text)
+        )
+
+    @pytest.mark.asyncio
+    async def test_disconnect_only_clears_documents_left_empty(self):
+        manager = YdocManager()
+        _, updates = make_updates(3)
+        for update in updates:
+            await manager.append_to_updates("note:1", update)
+            await manager.append_to_updates("note:2", update)
+
+        await manager.add_user("note:1", "sid-1")
+        await manager.add_user("note:2", "sid-1")
+        await manager.add_user("note:2", "sid-2")
+        await manager.remove_user_from_all_documents("sid-1")
+
+        assert not await manager.document_exists("note:1")
+        assert await manager.document_exists("note:2")
+        assert list(await manager.get_users("note:2")) == ["sid-2"]
+        assert "sid-1" not in manager._sessions
+
+    @pytest.mark.asyncio
+    async def test_redis_document_keys_share_a_cluster_slot(self):
+        redis = fakeredis.FakeAsyncRedis()
+        manager = YdocManager(redis, "ydoc", compaction_threshold=2)
+        source, updates = make_updates(3)
+        for update in updates:
+            await manager.append_to_updates("note:1", update)
+            await manager.append_to_updates("note:2", update)
+        await manager.add_user("note:1", "sid-1")
+        await manager.add_user("note:2", "sid-1")
+        await manager.add_user("note:2", "sid-2")
+
+        slots = {}
+        for key in await redis.keys("ydoc:{*}:*"):
+            slots.setdefault(key.split(b":")[1], set()).add(key_slot(key))
+        await manager.remove_user_from_all_documents("sid-1")
+
+        assert {document: len(slot) for document, slot in slots.items()} == {
+            b"{note_1}": 1,
+            b"{note_2}": 1,
+        }
+        state, _ = await manager.get_state("note:2")
+        assert get_text(state) == str(source.get("text", type=Y.Text))
+        assert not await manager.document_exists("note:1")
+        assert await manager.get_users("note:2") == ["sid-2"]
+
+    def test_decodes_legacy_json_updates(self):
+        update = bytes([1, 2, 3])
+
+        assert decode_ydoc_update(json.dumps(list(update)).encode()) == update
+        assert decode_ydoc_update(update) == update
+
+
+class TestYdocPayloads:
+    @pytest.mark.asyncio
+    async def test_updates_are_sent_as_bytes_and_legacy_lists(self):
+        payload = {"document_id": "note:1", "update": b"\x01\x02"}
+
+        with patch.object(socket_main.sio, "emit", new=AsyncMock()) as emit:
+            await socket_main.emit_to_document(
+                "ydoc:document:update", payload, "update", "note:1", skip_sid="a"
+            )
+
+        sent = {call.kwargs["room"]: call.args[1] for call in emit.call_args_list}
+        assert sent["doc_note:1:binary"]["update"] == b"\x01\x02"
+        assert sent["doc_note:1:json"]["update"] == [1, 2]
+
+
+class TestDocumentSaveScheduler:
+    @pytest.mark.asyncio
+    async def test_burst_of_changes_is_saved_once(self):
+        saves = []
+
+        async def save(document_id, data):
+            saves.append((document_id, data))
+
+        scheduler = DocumentSaveScheduler(save, debounce=0.05, max_delay=1)
+        for i in range(20):
+            scheduler.schedule("note:1", {"content": i})
+            await asyncio.sleep(0.005)
+
+        await asyncio.sleep(0.1)
+        assert saves == [("note:1", {"content": 19})]
+        assert not scheduler.has_pending("note:1")
+
+    @pytest.mark.asyncio
+    async def test_continuous_changes_are_saved_within_max_delay(self):
+        saves = []
+
+        async def save(document_id, data):
+            saves.append(data)
+
+        scheduler = DocumentSaveScheduler(save, debounce=0.05, max_delay=0.1)
+        for i in range(30):
+            scheduler.schedule("note:1", i)
+            await asyncio.sleep(0.01)
+
+        assert 1 <= len(saves) <= 4
+        await asyncio.sleep(0.1)
+        assert saves[-1] == 29
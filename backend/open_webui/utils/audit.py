@@ -191,6 +191,11 @@ class AuditLoggingMiddleware:
             await self._log_audit_entry(request, context)
 
     async def _get_authenticated_user(self, request: Request) -> Optional[UserModel]:
+        # Reuse the user resolved by the route's auth dependency, if any
+        user = getattr(request.state, "user", None)
+        if user is not None:
+            return user
+
         auth_header = request.headers.get("Authorization")
 
         try:
@@ -21,7 +21,7 @@ from typing import Optional, Union, List, Dict
 
 from opentelemetry import trace
 
-from open_webui.models.users import Users
+from open_webui.models.users import Users, USER_CACHE
 
 from open_webui.constants import ERROR_MESSAGES
 
@@ -250,16 +250,8 @@ def get_current_user(
                     status.HTTP_403_FORBIDDEN, detail=ERROR_MESSAGES.API_KEY_NOT_ALLOWED
                 )
 
-        user = get_current_user_by_api_key(token)
-
-        # Add user info to current span
-        current_span = trace.get_current_span()
-        if current_span:
-            current_span.set_attribute("client.user.id", user.id)
-            current_span.set_attribute("client.user.email", user.email)
-            current_span.set_attribute("client.user.role", user.role)
-            current_span.set_attribute("client.auth.type", "api_key")
-
+        user = get_current_user_by_api_key(token, background_tasks)
+        request.state.user = user
         return user
 
     # auth by jwt token
@@ -274,7 +266,7 @@ def get_current_user(
             )
 
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            user = Users.get_cached_user_by_id(data["id"])
             if user is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -291,10 +283,11 @@ def get_current_user(
 
                 # Refresh the user's last active timestamp asynchronously
                 # to prevent blocking the request
-                if background_tasks:
+                if background_tasks and USER_CACHE.should_update_last_active(user.id):
                     background_tasks.add_task(
                         Users.update_user_last_active_by_id, user.id
                     )
+            request.state.user = user
             return user
         else:
             raise HTTPException(
@@ -309,8 +302,10 @@ def get_current_user(
         raise e
 
 
-def get_current_user_by_api_key(api_key: str):
-    user = Users.get_user_by_api_key(api_key)
+def get_current_user_by_api_key(
+    api_key: str, background_tasks: Optional[BackgroundTasks] = None
+):
+    user = Users.get_cached_user_by_api_key(api_key)
 
     if user is None:
         raise HTTPException(
@@ -326,7 +321,11 @@ def get_current_user_by_api_key(api_key: str):
             current_span.set_attribute("client.user.role", user.role)
             current_span.set_attribute("client.auth.type", "api_key")
 
-        Users.update_user_last_active_by_id(user.id)
+        if USER_CACHE.should_update_last_active(user.id):
+            if background_tasks:
+                background_tasks.add_task(Users.update_user_last_active_by_id, user.id)
+            else:
+                Users.update_user_last_active_by_id(user.id)
 
     return user
 
@@ -0,0 +1,193 @@
+import base64
+import gzip
+import json
+import logging
+import zlib
+from functools import lru_cache
+from typing import Any, Iterator, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Key of the JSON objects wrapping a compressed JSON value, see `compress_json`
+COMPRESSED_MARKER = "__compressed__"
+
+ZSTD_LEVEL = 3
+
+# Largest JSON value `decompress_json` inflates, in bytes
+MAX_DECOMPRESSED_SIZE = 128 * 1024 * 1024
+
+# Output size a `Decompressor` step stops at, in bytes
+DECOMPRESS_CHUNK_SIZE = 64 * 1024
+
+# Compressed bytes fed to zstd at once. A zstd block holds up to 128KB and takes
+# as little as 4 bytes, so a step inflates to at most about 8MB.
+ZSTD_INPUT_SLICE = 256
+
+
+def get_available_compressions() -> list[str]:
+    return ["gzip", "zstd"] if ZSTD_AVAILABLE else ["gzip"]
+
+
+def get_compressor(compression: str):
+    """Incremental compressor with `compress(data)` and `flush()` methods."""
+    if compression == "gzip":
+        # 16 + MAX_WBITS writes a gzip header and trailer
+        return zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    if compression == "zstd" and ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+class Decompressor:
+    """
+    Incremental decompressor whose output comes in pieces of bounded size,
+    however well the input compresses.
+    """
+
+    def __init__(self, compression: str, max_length: int = DECOMPRESS_CHUNK_SIZE):
+        if compression == "gzip":
+            self._decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        elif compression == "zstd" and ZSTD_AVAILABLE:
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+        self.compression = compression
+        self.max_length = max_length
+
+    @property
+    def eof(self) -> bool:
+        """Whether the end of the compressed stream has been reached."""
+        return self._decompressor.eof
+
+    def decompress(self, data: bytes) -> Iterator[bytes]:
+        if self.compression == "zstd":
+            # zstd can't cap its output, bound it by the input instead
+            for i in range(0, len(data), ZSTD_INPUT_SLICE):
+                chunk = self._decompressor.decompress(data[i : i + ZSTD_INPUT_SLICE])
+                if chunk:
+                    yield chunk
+            return
+
+        # Sliced, so the unconsumed tail copied at every step stays small
+        for i in range(0, len(data), self.max_length):
+            tail = data[i : i + self.max_length]
+            while True:
+                chunk = self._decompressor.decompress(tail, self.max_length)
+                if chunk:
+                    yield chunk
+                tail = self._decompressor.unconsumed_tail
+                # A full chunk may leave output behind even without input left
+                if not tail and len(chunk) < self.max_length:
+                    break
+
+
+def get_decompressor(compression: str) -> Decompressor:
+    """Incremental decompressor with a `decompress(data)` generator method."""
+    return Decompressor(compression)
+
+
+####################
+# Compressed JSON values
+####################
+
+
+@lru_cache(maxsize=None)
+def load_zstd_dictionary(path: str):
+    """
+    zstd dictionary (trained with `train_zstd_dictionary` or `zstd --train`)
+    from a file, None when it can't be loaded.
+    """
+    if not ZSTD_AVAILABLE:
+        return None
+
+    try:
+        with open(path, "rb") as f:
+            dictionary = zstandard.ZstdCompressionDict(f.read())
+        # Digest the dictionary once rather than for every compressed value
+        dictionary.precompute_compress(level=ZSTD_LEVEL)
+        return dictionary
+    except Exception as e:
+        log.warning(f"Unable to load the zstd dictionary {path}: {e}")
+        return None
+
+
+def train_zstd_dictionary(samples: list[bytes], size: int = 112640) -> bytes:
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+
+def is_compressed_json(value: Any) -> bool:
+    return isinstance(value, dict) and COMPRESSED_MARKER in value
+
+
+def strip_compressed_json(value: dict) -> dict:
+    """
+    `value` without the keys of a compressed JSON value, for JSON values from
+    clients, so only values wrapped by `compress_json` are ever decompressed.
+    """
+    if not is_compressed_json(value):
+        return value
+    return {k: v for k, v in value.items() if k not in (COMPRESSED_MARKER, "data")}
+
+
+def compress_json(value: Any, compression: str, dictionary=None) -> dict:
+    """
+    Wrap a JSON value as `{"__compressed__": <codec>, "data": <base64>}`, which
+    `decompress_json` reads back whatever the current settings are. zstd falls
+    back to gzip when zstandard isn't installed.
+    """
+    data = json.dumps(value, separators=(",", ":")).encode()
+
+    if compression == "zstd" and ZSTD_AVAILABLE:
+        data = zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL, dict_data=dictionary
+        ).compress(data)
+    elif compression in ("zstd", "gzip"):
+        compression = "gzip"
+        data = gzip.compress(data, mtime=0)
+    else:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    return {COMPRESSED_MARKER: compression, "data": base64.b64encode(data).decode()}
+
+
+def decompress_json(
+    value: dict, dictionary=None, max_size: int = MAX_DECOMPRESSED_SIZE
+) -> Any:
+    compression = value[COMPRESSED_MARKER]
+    data = base64.b64decode(value["data"])
+
+    if compression == "gzip":
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        data = decompressor.decompress(data, max_size)
+        if decompressor.unconsumed_tail or not decompressor.eof:
+            raise ValueError(
+                f"Compressed value is truncated or larger than {max_size} bytes"
+            )
+    elif compression == "zstd" and ZSTD_AVAILABLE:
+        # Values compressed with a dictionary can only be read with the same one
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        if dict_id and (dictionary is None or dictionary.dict_id() != dict_id):
+            raise ValueError(f"zstd dictionary {dict_id} is not available")
+        # Read incrementally, the content size in the frame header can't be
+        # trusted to bound the allocation
+        with zstandard.ZstdDecompressor(
+            dict_data=dictionary if dict_id else None
+        ).stream_reader(data) as reader:
+            data = reader.read(max_size + 1)
+        if len(data) > max_size:
+            raise ValueError(f"Decompressed value is larger than {max_size} bytes")
+    else:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    return json.loads(data)
@@ -0,0 +1,133 @@
+import json
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from open_webui.utils.compression import (
+    MAX_DECOMPRESSED_SIZE,
+    get_available_compressions,
+    get_compressor,
+    get_decompressor,
+)
+
+JSONL_MEDIA_TYPE = "application/x-ndjson"
+
+MEDIA_TYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+# Size of the chunks written to the response before compression
+CHUNK_SIZE = 64 * 1024
+
+# Longest line `aiter_jsonl` reads, in bytes. A chat can't be larger than a
+# stored payload is allowed to inflate to.
+MAX_LINE_SIZE = MAX_DECOMPRESSED_SIZE
+
+
+def check_compression(compression: Optional[str]):
+    if compression and compression not in get_available_compressions():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported compression: {compression}",
+        )
+
+
+def iter_jsonl(items: Iterable, compression: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Encode `items` (dicts or pydantic models) as JSON lines, yielded in chunks
+    of about CHUNK_SIZE bytes, compressed when a compression is given.
+    """
+    compressor = get_compressor(compression) if compression else None
+
+    buffer = bytearray()
+    for item in items:
+        if isinstance(item, BaseModel):
+            buffer += item.model_dump_json().encode()
+        else:
+            buffer += json.dumps(item).encode()
+        buffer += b"\n"
+
+        if len(buffer) >= CHUNK_SIZE:
+            chunk = bytes(buffer)
+            buffer.clear()
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    chunk = bytes(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+async def aiter_jsonl(
+    chunks: AsyncIterator[bytes],
+    compression: Optional[str] = None,
+    max_line_size: int = MAX_LINE_SIZE,
+) -> AsyncIterator[dict]:
+    """
+    Decode the JSON lines of a stream of chunks, compressed when given. Lines
+    longer than `max_line_size` bytes are refused with a 413.
+    """
+    decompressor = get_decompressor(compression) if compression else None
+
+    buffer = bytearray()
+    async for chunk in chunks:
+        for data in decompressor.decompress(chunk) if decompressor else [chunk]:
+            for item in _read_lines(buffer, data, max_line_size):
+                yield item
+
+    if decompressor and not decompressor.eof:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Compressed stream is truncated",
+        )
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+def _read_lines(buffer: bytearray, data: bytes, max_line_size: int) -> Iterator[dict]:
+    """
+    Decode the lines `data` completes, keeping the rest of it in `buffer`.
+    Only `data` is searched for line breaks, `buffer` never holds one.
+    """
+    start = 0
+    end = data.find(b"\n")
+    while end != -1:
+        buffer += data[start:end]
+        _check_line_size(buffer, max_line_size)
+        if buffer.strip():
+            yield json.loads(buffer)
+        buffer.clear()
+
+        start = end + 1
+        end = data.find(b"\n", start)
+
+    buffer += data[start:]
+    _check_line_size(buffer, max_line_size)
+
+
+def _check_line_size(line: bytearray, max_line_size: int):
+    if len(line) > max_line_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Line longer than {max_line_size} bytes",
+        )
+
+
+def get_jsonl_response(
+    items: Iterable, filename: str, compression: Optional[str] = None
+) -> StreamingResponse:
+    """Stream `items` as a JSON lines file download."""
+    check_compression(compression)
+    return StreamingResponse(
+        iter_jsonl(items, compression),
+        media_type=MEDIA_TYPES.get(compression, JSONL_MEDIA_TYPE),
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}.jsonl"
+            + EXTENSIONS.get(compression, "")
+        },
+    )
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import OrderedDict, deque
+from typing import Optional
+
+from opentelemetry import metrics, trace
+
+from open_webui.env import (
+    EVENT_LOOP_LAG_THRESHOLD,
+    EVENT_LOOP_MONITOR_HISTORY_SIZE,
+    EVENT_LOOP_MONITOR_INTERVAL,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+tracer = trace.get_tracer(__name__)
+meter = metrics.get_meter(__name__)
+
+lag_histogram = meter.create_histogram(
+    "event_loop.lag",
+    unit="s",
+    description="How late the event loop woke up for a scheduled callback",
+)
+blocked_counter = meter.create_counter(
+    "event_loop.blocked",
+    description="Number of times a callback blocked the event loop past the threshold",
+)
+
+# Request scopes by the task handling them, so a blocked task can be attributed to a route
+_task_scopes = weakref.WeakKeyDictionary()
+
+MAX_TRACKED_LABELS = 256
+
+
+def get_task_label(task: Optional[asyncio.Task]) -> str:
+    """
+    Describe what a task is doing: the route template for HTTP/WebSocket requests,
+    the task name for named tasks (e.g. `task:<id>`) or its coroutine otherwise.
+    """
+    if task is None:
+        return "unknown"
+
+    scope = _task_scopes.get(task)
+    if scope is not None:
+        route = scope.get("route")
+        path = getattr(route, "path", None) or scope.get("path", "")
+        method = scope.get("method", scope["type"].upper())
+        return f"{method} {path}"
+
+    name = task.get_name()
+    if not name.startswith("Task-"):
+        return name
+
+    coro = task.get_coro()
+    return getattr(coro, "__qualname__", None) or name
+
+
+class EventLoopMonitorMiddleware:
+    """
+    Pure ASGI middleware that maps the task handling a request to its scope.
+
+    Must be added before any other middleware so that it is the innermost one
+    and runs in the same task as the route handler.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            task = asyncio.current_task()
+            if task is not None:
+                _task_scopes[task] = scope
+
+        await self.app(scope, receive, send)
+
+
+class EventLoopMonitor:
+    """
+    Measures event loop lag by sleeping for a fixed interval and checking how
+    late the loop woke up. Anything later than the threshold means a callback
+    blocked the loop (e.g. a synchronous database or network call).
+
+    While the loop is stalled, a watchdog thread captures the loop thread's
+    stack and the task that was running, so each blocking event can be
+    attributed to a route or task. Recent events and per-route totals are kept
+    in memory and also exported through OpenTelemetry.
+    """
+
+    def __init__(
+        self,
+        interval: float = EVENT_LOOP_MONITOR_INTERVAL,
+        threshold: float = EVENT_LOOP_LAG_THRESHOLD,
+        history_size: int = EVENT_LOOP_MONITOR_HISTORY_SIZE,
+        stack_depth: int = 20,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked_count = 0
+
+        self.events = deque(maxlen=history_size)
+        self.labels = OrderedDict()
+
+        self._task = None
+        self._loop = None
+        self._loop_thread_id = None
+
+        self._watchdog = None
+        self._stopped = threading.Event()
+
+        self._deadline = None
+        self._captured_deadline = None
+        self._capture = None
+
+    def record(self, lag: float, capture: Optional[dict] = None):
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        lag_histogram.record(lag)
+
+        if lag < self.threshold:
+            return
+
+        self.blocked_count += 1
+
+        label = capture["label"] if capture else "unknown"
+        stack = capture["stack"] if capture else []
+
+        stats = self.labels.pop(label, None) or {"count": 0, "total": 0.0, "max": 0.0}
+        stats["count"] += 1
+        stats["total"] += lag
+        stats["max"] = max(stats["max"], lag)
+        self.labels[label] = stats
+        if len(self.labels) > MAX_TRACKED_LABELS:
+            self.labels.popitem(last=False)
+
+        self.events.append(
+            {
+                "timestamp": time.time(),
+                "duration": lag,
+                "label": label,
+                "stack": stack,
+            }
+        )
+
+        blocked_counter.add(1, {"label": label})
+        end_time = time.time_ns()
+        span = tracer.start_span(
+            "event_loop.blocked",
+            start_time=end_time - int(lag * 1e9),
+            attributes={
+                "event_loop.lag": lag,
+                "event_loop.label": label,
+                "code.stacktrace": "".join(stack),
+            },
+        )
+        span.end(end_time=end_time)
+
+        log.warning(
+            f"Event loop was blocked for {lag * 1000:.0f}ms in {label}"
+            + (f" at {stack[-1].strip()}" if stack else "")
+        )
+        if stack:
+            log.debug("".join(stack))
+
+    def _capture_loop_state(self) -> dict:
+        task = asyncio.current_task(self._loop)
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame, limit=self.stack_depth) if frame else []
+
+        return {"label": get_task_label(task), "stack": stack}
+
+    def _take_capture(self, deadline: float) -> Optional[dict]:
+        if self._captured_deadline == deadline:
+            return self._capture
+        return None
+
+    def _watch(self):
+        while not self._stopped.wait(self.threshold / 2):
+            deadline = self._deadline
+            if deadline is None or self._captured_deadline == deadline:
+                continue
+
+            if time.perf_counter() - deadline >= self.threshold:
+                try:
+                    self._capture = self._capture_loop_state()
+                    self._captured_deadline = deadline
+                except Exception as e:
+                    log.debug(f"Failed to capture event loop state: {e}")
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+
+        while True:
+            deadline = time.perf_counter() + self.interval
+            self._deadline = deadline
+            await asyncio.sleep(self.interval)
+
+            lag = max(0.0, time.perf_counter() - deadline)
+            self.record(lag, self._take_capture(deadline))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(), name="event-loop-monitor")
+
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._stopped.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch, name="event-loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+        return self._task
+
+    def stop(self):
+        self._stopped.set()
+        self._watchdog = None
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        self._deadline = None
+
+    def get_stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "blocked_count": self.blocked_count,
+            "labels": sorted(
+                (
+                    {"label": label, **stats}
+                    for label, stats in list(self.labels.items())
+                ),
+                key=lambda item: item["total"],
+                reverse=True,
+            ),
+            "events": list(reversed(self.events)),
+        }
@@ -75,7 +75,7 @@ from open_webui.utils.task import (
 )
 from open_webui.utils.misc import (
     deep_update,
-    get_message_list,
+    MESSAGE_LIST_CACHE,
     add_or_update_system_message,
     add_or_update_user_message,
     get_last_user_message,
@@ -878,7 +878,7 @@ async def chat_completion_files_handler(
                         items=files,
                         queries=queries,
                         embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
-                            query, prefix=prefix, user=user
+                            query, prefix=prefix, user=user, lane="query"
                         ),
                         k=request.app.state.config.TOP_K,
                         reranking_function=(
@@ -1394,42 +1394,19 @@ async def process_chat_response(
     request, response, form_data, user, metadata, model, events, tasks
 ):
     async def background_tasks_handler():
-        messages_map = Chats.get_messages_map_by_chat_id(metadata["chat_id"])
+        chat = Chats.get_chat_by_id(metadata["chat_id"])
+        messages_map = (
+            chat.chat.get("history", {}).get("messages", {}) if chat else None
+        )
         message = messages_map.get(metadata["message_id"]) if messages_map else None
 
         if message:
-            message_list = get_message_list(messages_map, metadata["message_id"])
-
-            # Remove details tags and files from the messages.
-            # as get_message_list creates a new list, it does not affect
+            # Remove details tags and images from the messages.
+            # The cache returns copies, so this does not affect
             # the original messages outside of this handler
-
-            messages = []
-            for message in message_list:
-                content = message.get("content", "")
-                if isinstance(content, list):
-                    for item in content:
-                        if item.get("type") == "text":
-                            content = item["text"]
-                            break
-
-                if isinstance(content, str):
-                    content = re.sub(
-                        r"<details\b[^>]*>.*?<\/details>|!\[.*?\]\(.*?\)",
-                        "",
-                        content,
-                        flags=re.S | re.I,
-                    ).strip()
-
-                messages.append(
-                    {
-                        **message,
-                        "role": message.get(
-                            "role", "assistant"
-                        ),  # Safe fallback for missing role
-                        "content": content,
-                    }
-                )
+            messages = MESSAGE_LIST_CACHE.get_cleaned_message_list(
+                chat.id, messages_map, metadata["message_id"]
+            )
 
             if tasks and messages:
                 if (
@@ -1592,8 +1569,7 @@ async def process_chat_response(
     event_emitter = None
     event_caller = None
     if (
-        "session_id" in metadata
-        and metadata["session_id"]
+        (metadata.get("session_id") or metadata.get("task_id"))
         and "chat_id" in metadata
         and metadata["chat_id"]
         and "message_id" in metadata
@@ -1691,7 +1667,7 @@ async def process_chat_response(
                             )
 
                             # Send a webhook notification if the user is not active
-                            if not get_active_status_by_user_id(user.id):
+                            if not await get_active_status_by_user_id(user.id):
                                 webhook_url = Users.get_user_webhook_url_by_id(user.id)
                                 if webhook_url:
                                     await post_webhook(
@@ -2934,7 +2910,7 @@ async def process_chat_response(
                     )
 
                 # Send a webhook notification if the user is not active
-                if not get_active_status_by_user_id(user.id):
+                if not await get_active_status_by_user_id(user.id):
                     webhook_url = Users.get_user_webhook_url_by_id(user.id)
                     if webhook_url:
                         await post_webhook(
@@ -1,4 +1,5 @@
 import hashlib
+import itertools
 import re
 import threading
 import time
@@ -26,6 +27,29 @@ def deep_update(d, u):
     return d
 
 
+def get_message_id_list(messages_map, message_id) -> list:
+    """
+    Follows the parentId links from message_id up to the root.
+
+    :return: List of message ids starting from the root to the given message
+    """
+    message_ids = []
+    visited = set()
+
+    current_id = message_id
+    while current_id and current_id not in visited:
+        message = messages_map.get(current_id)
+        if not message:
+            break
+
+        message_ids.append(current_id)
+        visited.add(current_id)
+        current_id = message.get("parentId")
+
+    message_ids.reverse()
+    return message_ids
+
+
 def get_message_list(messages_map, message_id):
     """
     Reconstructs a list of messages in order up to the specified message_id.
@@ -39,23 +63,183 @@ def get_message_list(messages_map, message_id):
     if not messages_map:
         return []  # Return empty list instead of None to prevent iteration errors
 
-    # Find the message by its id
-    current_message = messages_map.get(message_id)
+    return [messages_map[id] for id in get_message_id_list(messages_map, message_id)]
 
-    if not current_message:
-        return []  # Return empty list instead of None to prevent iteration errors
 
-    # Reconstruct the chain by following the parentId links
-    message_list = []
+def clean_message_content(content):
+    """
+    Reduces message content to text without <details> blocks and images, as
+    used for follow-up, title and tag generation.
+    """
+    if isinstance(content, list):
+        for item in content:
+            if item.get("type") == "text":
+                content = item["text"]
+                break
+
+    if isinstance(content, str):
+        content = re.sub(
+            r"<details\b[^>]*>.*?<\/details>|!\[.*?\]\(.*?\)",
+            "",
+            content,
+            flags=re.S | re.I,
+        ).strip()
+
+    return content
+
 
-    while current_message:
-        message_list.insert(
-            0, current_message
-        )  # Insert the message at the beginning of the list
-        parent_id = current_message.get("parentId")  # Use .get() for safety
-        current_message = messages_map.get(parent_id) if parent_id else None
+class MessageListCache:
+    """
+    Caches linearized message branches of chats, so long chats are not walked
+    from the leaf to the root on every request.
+
+    Branches are stored as id chains by (chat_id, message_id). A new message
+    only walks up to the nearest ancestor with a known chain and extends it.
+    Messages are added at the end of the messages map, and deleting one (which
+    reparents its children) removes it from the map. So while the map has only
+    grown since a chat's chains were cached, as seen from its length and the id
+    of its last message, they are used as is. Otherwise they are dropped.
+    Cleaned message contents are cached by message and checked against the
+    content they were cleaned from, so only edited messages are cleaned again.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+
+        self._chains = collections.OrderedDict()
+        # (length, last message id, generation) of each chat's messages map
+        self._structures = collections.OrderedDict()
+        self._cleaned_contents = collections.OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _get(self, cache: collections.OrderedDict, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _set(self, cache: collections.OrderedDict, key, value, maxsize: int):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > maxsize:
+                cache.popitem(last=False)
+
+    def _get_generation(self, chat_id: str, messages_map) -> int:
+        """
+        Generation of the chat's chains that are valid for `messages_map`, a new
+        one when messages were deleted since the chains were cached.
+        """
+        length = len(messages_map)
+        last_id = next(reversed(messages_map))
+
+        generation = None
+        structure = self._get(self._structures, chat_id)
+        if structure is not None:
+            known_length, known_last_id, known_generation = structure
+            added = length - known_length
+            # Only grown if the known last message is followed by exactly the
+            # added ones
+            ids = list(itertools.islice(reversed(messages_map), max(added, 0) + 1))
+            if len(ids) == added + 1 and ids[-1] == known_last_id:
+                generation = known_generation
+
+        if generation is None:
+            with self._lock:
+                self._generation += 1
+                generation = self._generation
+        self._set(
+            self._structures, chat_id, (length, last_id, generation), self.maxsize
+        )
+        return generation
+
+    def get_message_id_list(self, chat_id: str, messages_map, message_id) -> tuple:
+        if not messages_map or message_id not in messages_map:
+            return ()
+
+        generation = self._get_generation(chat_id, messages_map)
+
+        def get_chain(id):
+            cached = self._get(self._chains, (chat_id, id))
+            if cached is not None and cached[0] == generation:
+                return cached[1]
+            return None
+
+        message_ids = get_chain(message_id)
+        if message_ids is not None:
+            return message_ids
+
+        # Walk up only until reaching a message whose chain is already known
+        new_ids = []
+        ancestor_ids = ()
+
+        visited = set()
+
+        current_id = message_id
+        while current_id in messages_map and current_id not in visited:
+            cached = get_chain(current_id)
+            if cached is not None:
+                ancestor_ids = cached
+                break
+
+            new_ids.append(current_id)
+            visited.add(current_id)
+            current_id = messages_map[current_id].get("parentId")
+
+        new_ids.reverse()
+        message_ids = ancestor_ids + tuple(new_ids)
+        self._set(
+            self._chains,
+            (chat_id, message_id),
+            (generation, message_ids),
+            self.maxsize,
+        )
+
+        return message_ids
+
+    def get_message_list(self, chat_id: str, messages_map, message_id) -> list:
+        return [
+            messages_map[id]
+            for id in self.get_message_id_list(chat_id, messages_map, message_id)
+        ]
 
-    return message_list
+    def get_cleaned_message_list(self, chat_id: str, messages_map, message_id) -> list:
+        """
+        Returns the branch up to message_id with cleaned content (see
+        `clean_message_content`) and a role on every message.
+        """
+        messages = []
+        for message in self.get_message_list(chat_id, messages_map, message_id):
+            content = message.get("content", "")
+            cached = self._get(self._cleaned_contents, (chat_id, message.get("id")))
+            if cached is not None and cached[0] == content:
+                cleaned = cached[1]
+            else:
+                cleaned = clean_message_content(content)
+                self._set(
+                    self._cleaned_contents,
+                    (chat_id, message.get("id")),
+                    (content, cleaned),
+                    self.maxsize * 100,
+                )
+
+            # Copies, callers may modify the returned messages
+            messages.append(
+                {
+                    **message,
+                    "role": message.get(
+                        "role", "assistant"
+                    ),  # Safe fallback for missing role
+                    "content": cleaned,
+                }
+            )
+
+        return messages
+
+
+MESSAGE_LIST_CACHE = MessageListCache()
 
 
 def get_messages_content(messages: list[dict]) -> str:
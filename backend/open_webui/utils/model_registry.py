@@ -0,0 +1,556 @@
+import logging
+from typing import Callable, Optional
+
+from fastapi import Request
+
+from open_webui.models.functions import Functions, FunctionModel
+from open_webui.models.models import Models, ModelModel
+from open_webui.utils.plugin import get_function_module_from_cache
+
+from open_webui.env import SRC_LOG_LEVELS, REDIS_KEY_PREFIX
+
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+REDIS_MODELS_GENERATION_KEY = f"{REDIS_KEY_PREFIX}:models:generation"
+
+REGISTRY_FUNCTION_TYPES = ("action", "filter")
+
+
+def get_short_id(model_id: str) -> str:
+    # Ollama may return model ids in different formats (e.g., 'llama3' vs. 'llama3:7b')
+    return model_id.split(":")[0]
+
+
+def get_function_icon(function: FunctionModel, module) -> Optional[str]:
+    return (
+        function.meta.manifest.get("icon_url", None)
+        or getattr(module, "icon_url", None)
+        or getattr(module, "icon", None)
+    )
+
+
+def get_action_items_from_module(function: FunctionModel, module) -> list[dict]:
+    if hasattr(module, "actions"):
+        return [
+            {
+                "id": f"{function.id}.{action['id']}",
+                "name": action.get("name", f"{function.name} ({action['id']})"),
+                "description": function.meta.description,
+                "icon": action.get("icon_url", get_function_icon(function, module)),
+            }
+            for action in module.actions
+        ]
+    else:
+        return [
+            {
+                "id": function.id,
+                "name": function.name,
+                "description": function.meta.description,
+                "icon": get_function_icon(function, module),
+            }
+        ]
+
+
+def get_filter_items_from_module(function: FunctionModel, module) -> list[dict]:
+    # Only toggleable filters are surfaced on the model
+    if not getattr(module, "toggle", None):
+        return []
+
+    return [
+        {
+            "id": function.id,
+            "name": function.name,
+            "description": function.meta.description,
+            "icon": get_function_icon(function, module),
+            "has_user_valves": hasattr(module, "UserValves"),
+        }
+    ]
+
+
+class ModelRegistry:
+    """
+    Indexed view over base models, custom models (overrides and presets) and
+    action/filter functions.
+
+    Every mutation only re-assembles the model entries it can affect and bumps
+    `version`; `get_models` serves a snapshot that is rebuilt at most once per
+    version.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.models: dict[str, dict] = {}
+
+        # Last shared generation seen (see `sync_model_registry`)
+        self.generation: Optional[int] = None
+        self.loaded = False
+
+        self._base_models: dict[str, dict] = {}
+        self._base_positions: dict[str, int] = {}
+        self._base_ids_by_short_id: dict[str, list[str]] = {}
+
+        self._arena_models: dict[str, dict] = {}
+
+        self._custom_models: dict[str, ModelModel] = {}
+        self._preset_ids_by_base_id: dict[str, set[str]] = {}
+
+        self._functions: dict[str, FunctionModel] = {}
+        self._function_items: dict[str, list[dict]] = {}
+        self._global_action_ids: set[str] = set()
+        self._enabled_action_ids: set[str] = set()
+        self._global_filter_ids: set[str] = set()
+        self._enabled_filter_ids: set[str] = set()
+
+        self._snapshot: Optional[list[dict]] = None
+
+    ####################
+    # Base models
+    ####################
+
+    def set_base_models(self, base_models: list[dict]) -> bool:
+        base_models_by_id = {model["id"]: model for model in base_models}
+        if list(base_models_by_id) == list(self._base_models) and all(
+            self._base_models[model_id] == model
+            for model_id, model in base_models_by_id.items()
+        ):
+            return False
+
+        changed_ids = {
+            model_id
+            for model_id in set(base_models_by_id) | set(self._base_models)
+            if base_models_by_id.get(model_id) != self._base_models.get(model_id)
+        }
+        was_empty = not self._base_models
+
+        self._base_models = base_models_by_id
+        self._base_positions = {
+            model_id: idx for idx, model_id in enumerate(base_models_by_id)
+        }
+        self._base_ids_by_short_id = {}
+        for model_id in base_models_by_id:
+            self._base_ids_by_short_id.setdefault(get_short_id(model_id), []).append(
+                model_id
+            )
+
+        if was_empty or not self._base_models:
+            # Models are only listed while at least one base model exists
+            self._rebuild()
+        else:
+            affected_ids = set(changed_ids)
+            for model_id in changed_ids:
+                affected_ids |= self._preset_ids_by_base_id.get(model_id, set())
+                affected_ids |= self._preset_ids_by_base_id.get(
+                    get_short_id(model_id), set()
+                )
+            self._update(affected_ids)
+            self._touch()
+
+        return True
+
+    ####################
+    # Arena models
+    ####################
+
+    def set_arena_models(self, arena_models: list[dict]) -> bool:
+        arena_models_by_id = {model["id"]: model for model in arena_models}
+
+        # "created" is stamped at build time, so leave it out of the comparison
+        def strip(model):
+            return {k: v for k, v in model.items() if k != "created"}
+
+        if list(arena_models_by_id) == list(self._arena_models) and all(
+            strip(self._arena_models[model_id]) == strip(model)
+            for model_id, model in arena_models_by_id.items()
+        ):
+            return False
+
+        affected_ids = set(arena_models_by_id) | set(self._arena_models)
+        self._arena_models = arena_models_by_id
+        self._update(affected_ids)
+        self._touch()
+        return True
+
+    ####################
+    # Custom models
+    ####################
+
+    def load_custom_models(self, custom_models: list[ModelModel]):
+        self._custom_models = {model.id: model for model in custom_models}
+        self._preset_ids_by_base_id = {}
+        for model in custom_models:
+            if model.base_model_id is not None:
+                self._preset_ids_by_base_id.setdefault(model.base_model_id, set()).add(
+                    model.id
+                )
+
+        self._rebuild()
+
+    def upsert_custom_model(self, custom_model: ModelModel):
+        affected_ids = {custom_model.id}
+        previous = self._custom_models.get(custom_model.id)
+        if previous is not None:
+            self._unindex_custom_model(previous)
+            affected_ids |= self._get_custom_model_targets(previous)
+
+        # Assigning in place keeps the model's position in the listing
+        self._custom_models[custom_model.id] = custom_model
+        if custom_model.base_model_id is not None:
+            self._preset_ids_by_base_id.setdefault(
+                custom_model.base_model_id, set()
+            ).add(custom_model.id)
+        affected_ids |= self._get_custom_model_targets(custom_model)
+
+        self._update(affected_ids)
+        self._touch()
+
+    def remove_custom_model(self, model_id: str):
+        affected_ids = self._remove_custom_model(model_id)
+        self._update(affected_ids)
+        self._touch()
+
+    def _remove_custom_model(self, model_id: str) -> set[str]:
+        custom_model = self._custom_models.pop(model_id, None)
+        if custom_model is None:
+            return {model_id}
+
+        self._unindex_custom_model(custom_model)
+        return self._get_custom_model_targets(custom_model)
+
+    def _unindex_custom_model(self, custom_model: ModelModel):
+        if custom_model.base_model_id is not None:
+            preset_ids = self._preset_ids_by_base_id.get(custom_model.base_model_id)
+            if preset_ids:
+                preset_ids.discard(custom_model.id)
+                if not preset_ids:
+                    del self._preset_ids_by_base_id[custom_model.base_model_id]
+
+    def _get_custom_model_targets(self, custom_model: ModelModel) -> set[str]:
+        # Ids of the entries a custom model can show up in
+        target_ids = {custom_model.id}
+        if custom_model.base_model_id is None:
+            target_ids |= {
+                model_id
+                for model_id in self._base_ids_by_short_id.get(custom_model.id, [])
+                if self._base_models[model_id].get("owned_by") == "ollama"
+            }
+        return target_ids
+
+    ####################
+    # Functions
+    ####################
+
+    def load_functions(
+        self,
+        functions: list[FunctionModel],
+        module_loader: Callable[[str], object],
+    ):
+        self._functions = {}
+        self._function_items = {}
+        for function in functions:
+            self._set_function(function, module_loader)
+
+        self._index_functions()
+        self._rebuild()
+
+    def upsert_function(
+        self, function: FunctionModel, module_loader: Callable[[str], object]
+    ):
+        self._set_function(function, module_loader)
+        self._index_functions()
+        self._update_functions()
+        self._touch()
+
+    def remove_function(self, function_id: str):
+        self._functions.pop(function_id, None)
+        self._function_items.pop(function_id, None)
+        self._index_functions()
+        self._update_functions()
+        self._touch()
+
+    def _set_function(
+        self, function: FunctionModel, module_loader: Callable[[str], object]
+    ):
+        self._function_items.pop(function.id, None)
+        if function.type not in REGISTRY_FUNCTION_TYPES:
+            self._functions.pop(function.id, None)
+            return
+
+        self._functions[function.id] = function
+        if not function.is_active:
+            return
+
+        try:
+            module = module_loader(function.id)
+            if function.type == "action":
+                items = get_action_items_from_module(function, module)
+            else:
+                items = get_filter_items_from_module(function, module)
+            self._function_items[function.id] = items
+        except Exception as e:
+            log.exception(f"Error loading function {function.id}: {e}")
+
+    def _index_functions(self):
+        def ids(type, global_only=False):
+            return {
+                function.id
+                for function in self._functions.values()
+                if function.type == type
+                and function.is_active
+                and (function.is_global or not global_only)
+            }
+
+        self._enabled_action_ids = ids("action")
+        self._global_action_ids = ids("action", global_only=True)
+        self._enabled_filter_ids = ids("filter")
+        self._global_filter_ids = ids("filter", global_only=True)
+
+    def _update_functions(self):
+        for model in self.models.values():
+            self._attach_functions(model)
+
+    ####################
+    # Assembly
+    ####################
+
+    def _get_override(self, model_id: str) -> Optional[ModelModel]:
+        # An exact id match takes precedence over an Ollama short name match
+        custom_model = self._custom_models.get(model_id)
+        if custom_model is not None and custom_model.base_model_id is None:
+            return custom_model
+
+        base_model = self._base_models.get(model_id)
+        if base_model is not None and base_model.get("owned_by") == "ollama":
+            custom_model = self._custom_models.get(get_short_id(model_id))
+            if custom_model is not None and custom_model.base_model_id is None:
+                return custom_model
+
+        return None
+
+    def _get_preset_base_model(self, base_model_id: str) -> Optional[dict]:
+        candidate_ids = list(self._base_ids_by_short_id.get(base_model_id, []))
+        if base_model_id in self._base_models:
+            candidate_ids.append(base_model_id)
+
+        if not candidate_ids:
+            return None
+        return self._base_models[min(candidate_ids, key=self._base_positions.get)]
+
+    def _assemble(self, model_id: str) -> Optional[dict]:
+        if not self._base_models:
+            return None
+
+        if model_id in self._base_models:
+            model = self._base_models[model_id].copy()
+            action_ids, filter_ids = [], []
+
+            custom_model = self._get_override(model_id)
+            if custom_model is not None:
+                if not custom_model.is_active:
+                    return None
+
+                model["name"] = custom_model.name
+                model["info"] = custom_model.model_dump()
+                action_ids = model["info"]["meta"].get("actionIds", [])
+                filter_ids = model["info"]["meta"].get("filterIds", [])
+
+            model["action_ids"] = action_ids
+            model["filter_ids"] = filter_ids
+            return self._attach_functions(model)
+
+        if model_id in self._arena_models:
+            model = {
+                **self._arena_models[model_id],
+                "action_ids": [],
+                "filter_ids": [],
+            }
+            return self._attach_functions(model)
+
+        custom_model = self._custom_models.get(model_id)
+        if (
+            custom_model is None
+            or custom_model.base_model_id is None
+            or not custom_model.is_active
+        ):
+            return None
+
+        owned_by = "openai"
+        pipe = None
+        base_model = self._get_preset_base_model(custom_model.base_model_id)
+        if base_model is not None:
+            owned_by = base_model.get("owned_by", "unknown owner")
+            pipe = base_model.get("pipe")
+
+        meta = custom_model.meta.model_dump() if custom_model.meta else {}
+        model = {
+            "id": f"{custom_model.id}",
+            "name": custom_model.name,
+            "object": "model",
+            "created": custom_model.created_at,
+            "owned_by": owned_by,
+            "info": custom_model.model_dump(),
+            "preset": True,
+            **({"pipe": pipe} if pipe is not None else {}),
+            "action_ids": list(meta.get("actionIds", [])),
+            "filter_ids": list(meta.get("filterIds", [])),
+        }
+        return self._attach_functions(model)
+
+    def _attach_functions(self, model: dict) -> dict:
+        action_ids = sorted(
+            (set(model["action_ids"]) | self._global_action_ids)
+            & self._enabled_action_ids
+        )
+        filter_ids = sorted(
+            (set(model["filter_ids"]) | self._global_filter_ids)
+            & self._enabled_filter_ids
+        )
+
+        model["actions"] = [
+            item
+            for action_id in action_ids
+            for item in self._function_items.get(action_id, [])
+        ]
+        model["filters"] = [
+            item
+            for filter_id in filter_ids
+            for item in self._function_items.get(filter_id, [])
+        ]
+        return model
+
+    def _update(self, model_ids: set[str]):
+        for model_id in model_ids:
+            model = self._assemble(model_id)
+            if model is None:
+                self.models.pop(model_id, None)
+            else:
+                self.models[model_id] = model
+
+    def _rebuild(self):
+        self.models.clear()
+        self._update(
+            set(self._base_models) | set(self._arena_models) | set(self._custom_models)
+        )
+        self._touch()
+
+    def _touch(self):
+        self.version += 1
+        self._snapshot = None
+
+    ####################
+    # Listing
+    ####################
+
+    def get_models(self) -> list[dict]:
+        if self._snapshot is None:
+            ordered_ids = (
+                list(self._base_models)
+                + list(self._arena_models)
+                + [
+                    model_id
+                    for model_id in self._custom_models
+                    if model_id not in self._base_models
+                    and model_id not in self._arena_models
+                ]
+            )
+            self._snapshot = [
+                self.models[model_id]
+                for model_id in ordered_ids
+                if model_id in self.models
+            ]
+        return self._snapshot
+
+
+def get_model_registry(app) -> ModelRegistry:
+    if getattr(app.state, "MODEL_REGISTRY", None) is None:
+        app.state.MODEL_REGISTRY = ModelRegistry()
+        app.state.MODELS = app.state.MODEL_REGISTRY.models
+    return app.state.MODEL_REGISTRY
+
+
+def get_function_module_loader(request: Request) -> Callable[[str], object]:
+    def load(function_id: str):
+        function_module, _, _ = get_function_module_from_cache(request, function_id)
+        return function_module
+
+    return load
+
+
+def get_registry_functions() -> list[FunctionModel]:
+    return [
+        function
+        for type in REGISTRY_FUNCTION_TYPES
+        for function in Functions.get_functions_by_type(type)
+    ]
+
+
+async def get_models_generation(redis) -> Optional[int]:
+    if redis is None:
+        return None
+
+    generation = await redis.get(REDIS_MODELS_GENERATION_KEY)
+    return int(generation) if generation is not None else 0
+
+
+async def sync_model_registry(request: Request, reload: bool = False) -> ModelRegistry:
+    """
+    Load custom models and functions into the registry on first use, when
+    `reload` is set, or when another instance has published a change.
+    """
+    registry = get_model_registry(request.app)
+    generation = await get_models_generation(request.app.state.redis)
+
+    if reload or not registry.loaded or generation != registry.generation:
+        registry.load_custom_models(Models.get_all_models())
+        registry.load_functions(
+            get_registry_functions(), get_function_module_loader(request)
+        )
+        registry.generation = generation
+        registry.loaded = True
+
+    return registry
+
+
+async def update_model_registry(
+    request: Request,
+    model_ids: Optional[list[str]] = None,
+    function_ids: Optional[list[str]] = None,
+    reload: bool = False,
+):
+    """
+    Apply a change to custom models or functions to the local registry and
+    let other instances know they need to resync.
+    """
+    registry = get_model_registry(request.app)
+
+    if registry.loaded:
+        if reload:
+            registry.load_custom_models(Models.get_all_models())
+            registry.load_functions(
+                get_registry_functions(), get_function_module_loader(request)
+            )
+
+        for model_id in model_ids or []:
+            custom_model = Models.get_model_by_id(model_id)
+            if custom_model:
+                registry.upsert_custom_model(custom_model)
+            else:
+                registry.remove_custom_model(model_id)
+
+        for function_id in function_ids or []:
+            function = Functions.get_function_by_id(function_id)
+            if function:
+                registry.upsert_function(function, get_function_module_loader(request))
+            else:
+                registry.remove_function(function_id)
+
+    redis = request.app.state.redis
+    if redis is not None:
+        generation = await redis.incr(REDIS_MODELS_GENERATION_KEY)
+        # Only skip the next resync if nobody else changed anything in between
+        if registry.generation is not None and generation == registry.generation + 1:
+            registry.generation = generation
+        else:
+            registry.generation = None
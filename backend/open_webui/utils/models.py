@@ -1,24 +1,26 @@
 import time
+import json
+import hashlib
 import logging
 import asyncio
 import sys
+from collections import OrderedDict
+from typing import Callable, Optional
 
 from aiocache import cached
-from fastapi import Request
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
 
 from open_webui.routers import openai, ollama
 from open_webui.functions import get_function_models
 
 
-from open_webui.models.functions import Functions
+from open_webui.models.groups import Groups
 from open_webui.models.models import Models
 
 
-from open_webui.utils.plugin import (
-    load_function_module_by_id,
-    get_function_module_from_cache,
-)
 from open_webui.utils.access_control import has_access
+from open_webui.utils.model_registry import get_model_registry, sync_model_registry
 
 
 from open_webui.config import (
@@ -26,7 +28,12 @@ from open_webui.config import (
     DEFAULT_ARENA_MODEL,
 )
 
-from open_webui.env import BYPASS_MODEL_ACCESS_CONTROL, SRC_LOG_LEVELS, GLOBAL_LOG_LEVEL
+from open_webui.env import (
+    BYPASS_MODEL_ACCESS_CONTROL,
+    MODELS_RESPONSE_CACHE_SIZE,
+    SRC_LOG_LEVELS,
+    GLOBAL_LOG_LEVEL,
+)
 from open_webui.models.users import UserModel
 
 
@@ -78,8 +85,10 @@ async def get_all_base_models(request: Request, user: UserModel = None):
 
 
 async def get_all_models(request, refresh: bool = False, user: UserModel = None):
+    registry = get_model_registry(request.app)
+
     if (
-        request.app.state.MODELS
+        registry.models
         and request.app.state.BASE_MODELS
         and (request.app.state.config.ENABLE_BASE_MODELS_CACHE and not refresh)
     ):
@@ -88,16 +97,12 @@ async def get_all_models(request, refresh: bool = False, user: UserModel = None)
         base_models = await get_all_base_models(request, user=user)
         request.app.state.BASE_MODELS = base_models
 
-    # deep copy the base models to avoid modifying the original list
-    models = [model.copy() for model in base_models]
-
-    # If there are no models, return an empty list
-    if len(models) == 0:
-        return []
+    registry = await sync_model_registry(request, reload=refresh)
+    registry.set_base_models(base_models)
 
     # Add arena models
+    arena_models = []
     if request.app.state.config.ENABLE_EVALUATION_ARENA_MODELS:
-        arena_models = []
         if len(request.app.state.config.EVALUATION_ARENA_MODELS) > 0:
             arena_models = [
                 {
@@ -128,188 +133,14 @@ async def get_all_models(request, refresh: bool = False, user: UserModel = None)
                     "arena": True,
                 }
             ]
-        models = models + arena_models
-
-    global_action_ids = [
-        function.id for function in Functions.get_global_action_functions()
-    ]
-    enabled_action_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("action", active_only=True)
-    ]
-
-    global_filter_ids = [
-        function.id for function in Functions.get_global_filter_functions()
-    ]
-    enabled_filter_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
-    ]
-
-    custom_models = Models.get_all_models()
-    for custom_model in custom_models:
-        if custom_model.base_model_id is None:
-            # Applied directly to a base model
-            for model in models:
-                if custom_model.id == model["id"] or (
-                    model.get("owned_by") == "ollama"
-                    and custom_model.id
-                    == model["id"].split(":")[
-                        0
-                    ]  # Ollama may return model ids in different formats (e.g., 'llama3' vs. 'llama3:7b')
-                ):
-                    if custom_model.is_active:
-                        model["name"] = custom_model.name
-                        model["info"] = custom_model.model_dump()
-
-                        # Set action_ids and filter_ids
-                        action_ids = []
-                        filter_ids = []
-
-                        if "info" in model and "meta" in model["info"]:
-                            action_ids.extend(
-                                model["info"]["meta"].get("actionIds", [])
-                            )
-                            filter_ids.extend(
-                                model["info"]["meta"].get("filterIds", [])
-                            )
-
-                        model["action_ids"] = action_ids
-                        model["filter_ids"] = filter_ids
-                    else:
-                        models.remove(model)
-
-        elif custom_model.is_active and (
-            custom_model.id not in [model["id"] for model in models]
-        ):
-            owned_by = "openai"
-            pipe = None
-
-            action_ids = []
-            filter_ids = []
-
-            for model in models:
-                if (
-                    custom_model.base_model_id == model["id"]
-                    or custom_model.base_model_id == model["id"].split(":")[0]
-                ):
-                    owned_by = model.get("owned_by", "unknown owner")
-                    if "pipe" in model:
-                        pipe = model["pipe"]
-                    break
-
-            if custom_model.meta:
-                meta = custom_model.meta.model_dump()
-
-                if "actionIds" in meta:
-                    action_ids.extend(meta["actionIds"])
-
-                if "filterIds" in meta:
-                    filter_ids.extend(meta["filterIds"])
-
-            models.append(
-                {
-                    "id": f"{custom_model.id}",
-                    "name": custom_model.name,
-                    "object": "model",
-                    "created": custom_model.created_at,
-                    "owned_by": owned_by,
-                    "info": custom_model.model_dump(),
-                    "preset": True,
-                    **({"pipe": pipe} if pipe is not None else {}),
-                    "action_ids": action_ids,
-                    "filter_ids": filter_ids,
-                }
-            )
-
-    # Process action_ids to get the actions
-    def get_action_items_from_module(function, module):
-        actions = []
-        if hasattr(module, "actions"):
-            actions = module.actions
-            return [
-                {
-                    "id": f"{function.id}.{action['id']}",
-                    "name": action.get("name", f"{function.name} ({action['id']})"),
-                    "description": function.meta.description,
-                    "icon": action.get(
-                        "icon_url",
-                        function.meta.manifest.get("icon_url", None)
-                        or getattr(module, "icon_url", None)
-                        or getattr(module, "icon", None),
-                    ),
-                }
-                for action in actions
-            ]
-        else:
-            return [
-                {
-                    "id": function.id,
-                    "name": function.name,
-                    "description": function.meta.description,
-                    "icon": function.meta.manifest.get("icon_url", None)
-                    or getattr(module, "icon_url", None)
-                    or getattr(module, "icon", None),
-                }
-            ]
-
-    # Process filter_ids to get the filters
-    def get_filter_items_from_module(function, module):
-        return [
-            {
-                "id": function.id,
-                "name": function.name,
-                "description": function.meta.description,
-                "icon": function.meta.manifest.get("icon_url", None)
-                or getattr(module, "icon_url", None)
-                or getattr(module, "icon", None),
-                "has_user_valves": hasattr(module, "UserValves"),
-            }
-        ]
-
-    def get_function_module_by_id(function_id):
-        function_module, _, _ = get_function_module_from_cache(request, function_id)
-        return function_module
-
-    for model in models:
-        action_ids = [
-            action_id
-            for action_id in list(set(model.pop("action_ids", []) + global_action_ids))
-            if action_id in enabled_action_ids
-        ]
-        filter_ids = [
-            filter_id
-            for filter_id in list(set(model.pop("filter_ids", []) + global_filter_ids))
-            if filter_id in enabled_filter_ids
-        ]
-
-        model["actions"] = []
-        for action_id in action_ids:
-            action_function = Functions.get_function_by_id(action_id)
-            if action_function is None:
-                raise Exception(f"Action not found: {action_id}")
-
-            function_module = get_function_module_by_id(action_id)
-            model["actions"].extend(
-                get_action_items_from_module(action_function, function_module)
-            )
-
-        model["filters"] = []
-        for filter_id in filter_ids:
-            filter_function = Functions.get_function_by_id(filter_id)
-            if filter_function is None:
-                raise Exception(f"Filter not found: {filter_id}")
+    registry.set_arena_models(arena_models)
 
-            function_module = get_function_module_by_id(filter_id)
-
-            if getattr(function_module, "toggle", None):
-                model["filters"].extend(
-                    get_filter_items_from_module(filter_function, function_module)
-                )
-
-    log.debug(f"get_all_models() returned {len(models)} models")
+    models = registry.get_models()
+    log.debug(
+        f"get_all_models() returned {len(models)} models (version {registry.version})"
+    )
 
-    request.app.state.MODELS = {model["id"]: model for model in models}
+    request.app.state.MODELS = registry.models
     return models
 
 
@@ -336,12 +167,16 @@ def check_model_access(user, model):
             raise Exception("Model not found")
 
 
-def get_filtered_models(models, user):
-    # Filter out models that the user does not have access to
-    if (
+def is_model_access_filtered(user) -> bool:
+    return (
         user.role == "user"
         or (user.role == "admin" and not BYPASS_ADMIN_ACCESS_CONTROL)
-    ) and not BYPASS_MODEL_ACCESS_CONTROL:
+    ) and not BYPASS_MODEL_ACCESS_CONTROL
+
+
+def get_filtered_models(models, user):
+    # Filter out models that the user does not have access to
+    if is_model_access_filtered(user):
         filtered_models = []
         for model in models:
             if model.get("arena"):
@@ -371,3 +206,99 @@ def get_filtered_models(models, user):
         return filtered_models
     else:
         return models
+
+
+####################
+# Serialized /api/models responses
+####################
+
+
+class ModelsResponseCache:
+    """
+    Bounded LRU of serialized model list responses. Keys embed the registry
+    version, so entries for older versions simply age out.
+    """
+
+    def __init__(self, maxsize: int = MODELS_RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple, tuple[bytes, str]] = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[tuple[bytes, str]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: tuple, body: bytes) -> tuple[bytes, str]:
+        entry = (body, f'"{hashlib.sha256(body).hexdigest()}"')
+        if self.maxsize > 0:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+
+def get_models_response_cache_key(request: Request, user: UserModel) -> tuple:
+    registry = get_model_registry(request.app)
+
+    # Models are listed by the users and groups they're shared with, changes to
+    # models bump the registry version
+    if is_model_access_filtered(user):
+        audience = (
+            user.id,
+            user.role,
+            tuple(
+                sorted(group.id for group in Groups.get_groups_by_member_id(user.id))
+            ),
+        )
+    else:
+        # Users that see every model share a single entry per role
+        audience = f"role:{user.role}"
+
+    return (
+        registry.version,
+        tuple(request.app.state.config.MODEL_ORDER_LIST or []),
+        audience,
+    )
+
+
+def get_models_response(
+    request: Request, user: UserModel, get_models: Callable[[], list[dict]]
+) -> Response:
+    """
+    /api/models response with an ETag, `get_models` builds the user's model
+    list when it isn't cached. Clients with a current copy get a 304.
+    """
+    cache = request.app.state.MODELS_RESPONSE_CACHE
+    cache_key = get_models_response_cache_key(request, user)
+
+    cached_response = cache.get(cache_key)
+    if cached_response is None:
+        cached_response = cache.set(cache_key, serialize_models_response(get_models()))
+
+    body, etag = cached_response
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def serialize_models_response(models: list[dict]) -> bytes:
+    data = jsonable_encoder({"data": models})
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
@@ -354,7 +355,32 @@ def get_tool_module_from_cache(request, tool_id: str, load_from_db: bool = True)
     return tool_module, frontmatter
 
 
+def refresh_function_in_model_registry(request, function_id: str) -> None:
+    """
+    Schedule a model registry update for a function that failed to load and got
+    deactivated, once whatever is loading it right now is done.
+    """
+    # model_registry imports this module
+    from open_webui.utils.model_registry import update_model_registry
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    loop.create_task(update_model_registry(request, function_ids=[function_id]))
+
+
 def get_function_module_from_cache(request, function_id: str, load_from_db: bool = True):
+    try:
+        return _get_function_module_from_cache(request, function_id, load_from_db)
+    except Exception:
+        function = Functions.get_function_by_id(function_id)
+        if function and not function.is_active:
+            refresh_function_in_model_registry(request, function_id)
+        raise
+
+
+def _get_function_module_from_cache(request, function_id: str, load_from_db: bool):
     if load_from_db:
         function = Functions.get_function_by_id(function_id)
         if not function:
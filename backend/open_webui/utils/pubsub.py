@@ -0,0 +1,93 @@
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+from open_webui.env import REDIS_KEY_PREFIX, SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class PubSub:
+    """
+    Publish/subscribe of messages by key (e.g. a file id).
+
+    Publishing is thread safe, so sync handlers running in the thread pool can
+    notify subscribers waiting on the event loop. Once started with Redis,
+    messages go through a Redis channel so subscribers on every instance
+    receive them.
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+
+        self._redis = None
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, key: str, data: dict):
+        if self._redis is not None:
+            try:
+                self._redis.publish(
+                    self.channel, json.dumps({"key": key, "data": data})
+                )
+                return
+            except Exception as e:
+                log.error(f"Error publishing to {self.channel}: {e}")
+
+        self._dispatch(key, data)
+
+    def _dispatch(self, key: str, data: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, data)
+            except RuntimeError:
+                # The subscriber's event loop is closed
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, key: str):
+        """Yield a queue receiving the messages published for `key` from now on."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+
+        with self._lock:
+            self._subscribers.setdefault(key, set()).add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(key, set())
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(key, None)
+
+    async def listen(self, redis, async_redis):
+        """
+        Relay messages through Redis: publish with the sync `redis` client and
+        dispatch the channel's messages, received with `async_redis`, locally.
+        """
+        pubsub = async_redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        self._redis = redis
+
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    message = json.loads(message["data"])
+                    self._dispatch(message["key"], message["data"])
+                except Exception as e:
+                    log.exception(f"Error handling message on {self.channel}: {e}")
+        finally:
+            self._redis = None
+            await pubsub.unsubscribe(self.channel)
+
+
+# Processing status of files by file id
+FILE_STATUS_PUBSUB = PubSub(f"{REDIS_KEY_PREFIX}:files:status")
@@ -90,7 +90,10 @@ export class SocketIOCollaborationProvider {
 			document_id: this.documentId,
 			user_id: this.user?.id,
 			user_name: this.user?.name,
-			user_color: userColor
+			user_color: userColor,
+			// Receive Yjs data as binary attachments instead of JSON arrays
+			binary: true,
+			...this.getStateVector()
 		});
 
 		// Set user awareness info
@@ -103,6 +106,13 @@ export class SocketIOCollaborationProvider {
 		}
 	}
 
+	private getStateVector() {
+		// Only sync incrementally if we already have content (e.g. when rejoining)
+		return this.doc.store.clients.size > 0
+			? { state_vector: Y.encodeStateVector(this.doc) }
+			: {};
+	}
+
 	private setupEventListeners() {
 		// Listen for document updates from server
 		this.socket.on('ydoc:document:update', (data) => {
@@ -120,7 +130,20 @@ export class SocketIOCollaborationProvider {
 		this.socket.on('ydoc:document:state', async (data) => {
 			if (data.document_id === this.documentId) {
 				try {
-					if (data.state) {
+					if (data.state && data.state_vector) {
+						// Incremental sync: apply what we are missing and send what the server is missing
+						Y.applyUpdate(this.doc, new Uint8Array(data.state), 'server');
+
+						const update = Y.encodeStateAsUpdate(this.doc, new Uint8Array(data.state_vector));
+						if (!(update.length === 2 && update[0] === 0 && update[1] === 0)) {
+							this.socket.emit('ydoc:document:update', {
+								document_id: this.documentId,
+								user_id: this.user?.id,
+								socket_id: this.socket.id,
+								update: update
+							});
+						}
+					} else if (data.state) {
 						const state = new Uint8Array(data.state);
 
 						if (state.length === 2 && state[0] === 0 && state[1] === 0) {
@@ -159,7 +182,9 @@ export class SocketIOCollaborationProvider {
 
 					this.synced = false;
 					this.socket.emit('ydoc:document:state', {
-						document_id: this.documentId
+						document_id: this.documentId,
+						binary: true,
+						...this.getStateVector()
 					});
 				}
 			}
@@ -189,7 +214,7 @@ export class SocketIOCollaborationProvider {
 					document_id: this.documentId,
 					user_id: this.user?.id,
 					socket_id: this.socket.id,
-					update: Array.from(update),
+					update: update,
 					data: {
 						content: this.editorContentGetter?.() ?? {
 							md: '',
@@ -214,7 +239,7 @@ export class SocketIOCollaborationProvider {
 					this.socket.emit('ydoc:awareness:update', {
 						document_id: this.documentId,
 						user_id: this.socket.id,
-						update: Array.from(awarenessUpdate)
+						update: awarenessUpdate
 					});
 				}
 			}